@@ -0,0 +1,66 @@
+"""
+Event append throughput and writer contention: direct job store writes
+versus Redis Streams with batch persistence.
+
+    python -m benchmarks.bench_event_log --workers 64 --events 50
+    python -m benchmarks.bench_event_log --redis-url redis://localhost:6379/15
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from src.services.database.sqlite_store import SQLiteJobStore
+from src.services.database.event_stream import EventStream
+
+def run(append, workers: int, events: int):
+    """each worker appends `events` events to its own job, returns (elapsed, latencies)"""
+    def worker(index):
+        latencies = []
+        for event in range(events):
+            started = time.perf_counter()
+            append(f"bench-{index}", f"task {event} output " + "x" * 500)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        latencies = [latency for result in pool.map(worker, range(workers)) for latency in result]
+    return time.perf_counter() - started, latencies
+
+def report(name: str, elapsed: float, latencies: list):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name}: {len(latencies) / elapsed:.0f} events/s, "
+          f"p50 {statistics.median(latencies) * 1000:.2f}ms, p99 {p99 * 1000:.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--redis-url", help="real redis server, fakeredis when omitted")
+    args = parser.parse_args()
+
+    store = SQLiteJobStore(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    store.initialize()
+    report("sqlite direct", *run(store.append_event, args.workers, args.events))
+
+    if args.redis_url:
+        import redis
+        client = redis.Redis.from_url(args.redis_url)
+    else:
+        import fakeredis
+        client = fakeredis.FakeRedis()
+    stream = EventStream(client=client, prefix="bench:events")
+    store = SQLiteJobStore(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    store.initialize()
+    report("redis stream append", *run(stream.append, args.workers, args.events))
+    started = time.perf_counter()
+    persisted = stream.flush(store)
+    elapsed = time.perf_counter() - started
+    print(f"batch persist: {persisted} events in {elapsed:.2f}s ({persisted / elapsed:.0f} events/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Bulk export of completed jobs: streamed in chunks with iter_jobs versus loading
+every job with get_job_by_id, with a writer appending events throughout.
+
+    python -m benchmarks.bench_export --jobs 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from unittest import mock
+from src.services.database import job_store
+from src.services.database.sqlite_store import SQLiteJobStore
+
+
+def writer(store: SQLiteJobStore, stop: threading.Event, latencies: list):
+    """concurrent job progress, the latency of each append is recorded"""
+    index = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        store.append_event("bench-writer", f"progress {index}")
+        latencies.append(time.perf_counter() - started)
+        index += 1
+
+
+def measure(name: str, store: SQLiteJobStore, export) -> None:
+    stop, latencies = threading.Event(), []
+    thread = threading.Thread(target=writer, args=(store, stop, latencies))
+    tracemalloc.start()
+    thread.start()
+    started = time.perf_counter()
+    exported = export()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    stop.set()
+    thread.join()
+    tracemalloc.stop()
+    latencies.sort()
+    print(f"  {name}: {exported} jobs in {elapsed:.2f}s, peak {peak / 2**20:.1f}MiB, "
+          f"writer p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms over {len(latencies)} appends")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--result-kb", type=int, default=20)
+    args = parser.parse_args()
+
+    store = SQLiteJobStore(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    store.initialize()
+    job_ids = [f"export-{index}" for index in range(args.jobs)]
+    result = {"output": {"body": "market analysis " * (args.result_kb * 64)}, "tasks": {}}
+    for job_id in job_ids:
+        store.append_event(job_id, "Flow Started")
+        store.update_job(job_id, "COMPLETE", result, ["Flow complete"])
+
+    def per_job() -> int:
+        jobs = [store.get_job(job_id) for job_id in job_ids]
+        return len([json.dumps({"result": json.loads(job.result)}) for job in jobs])
+
+    def streamed() -> int:
+        return sum(1 for summary, job in job_store.iter_jobs(status="COMPLETE"))
+
+    print(f"{args.jobs} completed jobs, {args.result_kb}KB results")
+    with mock.patch.object(job_store, "get_job_store", return_value=store):
+        measure("get_job per id", store, per_job)
+        measure("iter_jobs", store, streamed)
+
+
+if __name__ == "__main__":
+    main()
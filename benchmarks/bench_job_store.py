@@ -0,0 +1,56 @@
+"""
+Throughput benchmark shared by every job store backend.
+
+    python -m benchmarks.bench_job_store --backend sqlite --jobs 500 --threads 8
+    python -m benchmarks.bench_job_store --backend redis --redis-url redis://localhost:6379/15
+    python -m benchmarks.bench_job_store --backend fakeredis
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from src.services.database.base_store import JobStore
+
+def build_store(args) -> JobStore:
+    if args.backend == "sqlite":
+        from src.services.database.sqlite_store import SQLiteJobStore
+        store = SQLiteJobStore(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    elif args.backend == "fakeredis":
+        import fakeredis
+        from src.services.database.redis_store import RedisJobStore
+        store = RedisJobStore(client=fakeredis.FakeRedis(), prefix="bench")
+    else:
+        from src.services.database.redis_store import RedisJobStore
+        store = RedisJobStore(url=args.redis_url, prefix="bench")
+    store.initialize()
+    return store
+
+def run_job(store: JobStore, job_id: str, events: int):
+    """one simulated job: progress events, final update, then a status poll"""
+    for index in range(events):
+        store.append_event(job_id, f"task {index} output " + "x" * 2000)
+    store.update_job(job_id, "COMPLETE", {"output": {"body": "y" * 3000}}, ["Flow complete"])
+    store.get_job(job_id)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["sqlite", "redis", "fakeredis"], default="sqlite")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--events", type=int, default=6)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    store = build_store(args)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(lambda i: run_job(store, f"bench-{i}", args.events), range(args.jobs)))
+    elapsed = time.perf_counter() - started
+    operations = args.jobs * (args.events + 2)
+    print(f"{args.backend}: {args.jobs} jobs, {operations} ops in {elapsed:.2f}s "
+          f"({operations / elapsed:.0f} ops/s, {args.threads} threads)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Logging cost on the worker thread per job: the previous synchronous
+console + rotating file handlers with the previous hot-path log lines
+(every event payload at INFO) versus the queue-based JSON pipeline with
+truncation, sampling and the per-event lines at DEBUG.
+
+Console output goes to a temporary file so that its I/O is real but quiet.
+
+    python -m benchmarks.bench_logging --jobs 20
+"""
+import argparse
+import logging
+import logging.config
+import statistics
+import sys
+import tempfile
+import time
+
+from unittest.mock import patch
+from src.config import logger as log_config
+
+EVENTS_PER_JOB = 80  # task outputs, metrics and stats events
+LARGE_EVENTS_PER_JOB = 8  # agent answers
+CACHE_HITS_PER_JOB = 200  # tool/blob lines logged in bursts
+LARGE_EVENT = "Final Answer: " + "The Metro 3 campaign targets urban runners. " * 150
+SMALL_EVENT = "Task metrics: {\"prompt_tokens\": 1800, \"context_tokens\": 420}"
+
+
+def previous_setup(log_dir: str) -> None:
+    """setup_logging as it was: synchronous handlers on the src logger"""
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "verbose": {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s [%(filename)s:%(lineno)d]"},
+            "simple": {"format": "%(levelname)s %(message)s"},
+        },
+        "handlers": {
+            "console": {"class": "logging.StreamHandler", "level": "INFO", "formatter": "simple", "stream": "ext://sys.stdout"},
+            "file": {
+                "class": "logging.handlers.RotatingFileHandler", "level": "INFO", "formatter": "verbose",
+                "filename": f"{log_dir}/marketflow.log", "maxBytes": 1024 * 1024 * 10, "backupCount": 5, "encoding": "utf8",
+            },
+        },
+        "loggers": {"src": {"handlers": ["console", "file"], "level": "INFO", "propagate": False}},
+        "root": {"handlers": ["console"], "level": "WARNING"},
+    })
+
+
+def run_job(logger: logging.Logger, job_id: str, previous: bool) -> None:
+    """the log lines a job emits on the worker thread"""
+    for index in range(EVENTS_PER_JOB):
+        event = LARGE_EVENT if index < LARGE_EVENTS_PER_JOB else SMALL_EVENT
+        if previous:
+            logger.info(f"Recording event for job {job_id}: {event}")
+            logger.info(f"Event recorded for job {job_id}")
+        else:
+            logger.debug(f"Event recorded for job {job_id} ({len(event)} chars)")
+        if index < LARGE_EVENTS_PER_JOB:
+            logger.info(f"Job {job_id} output: {event}")
+    for index in range(CACHE_HITS_PER_JOB):
+        logger.info(f"Tool cache hit for https://stridewell.example/page/{index}")
+    logger.info(f"Stored result of task content_production_task for job {job_id}")
+
+
+def measure(jobs: int, previous: bool) -> list:
+    timings = []
+    with tempfile.TemporaryDirectory() as log_dir, tempfile.TemporaryFile("w") as console, \
+            patch.object(sys, "stdout", console), patch.object(log_config, "LOG_DIR", log_dir):
+        if previous:
+            previous_setup(log_dir)
+        else:
+            log_config.setup_logging()
+        logger = logging.getLogger("src.bench")
+        for index in range(jobs):
+            started = time.perf_counter()
+            run_job(logger, f"job-{index}", previous)
+            timings.append(time.perf_counter() - started)
+        log_config.stop_logging()
+        for handler in logging.getLogger("src").handlers:
+            handler.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, previous in (("synchronous handlers", True), ("queue pipeline", False)):
+        timings = measure(args.jobs, previous)
+        print(f"{name}: median {statistics.median(timings) * 1000:.1f}ms of logging per job "
+              f"(p95 {statistics.quantiles(timings, n=20)[-1] * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+End-to-end Workflow latency with every task on the quality model versus the
+per-agent/per-task profiles of the crew YAML, against a local fake
+OpenAI-compatible server that simulates per-model speed.
+
+    python -m benchmarks.bench_model_routing --runs 3
+"""
+import os
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+from src.config.settings import LLM_PROFILES
+from src.core.flows.workflow import Workflow
+from src.services.llm.llm_service import LLMService
+from src.services.llm.model_registry import ModelRegistry
+
+# simulated speed per model: time to first token and output tokens per second
+MODELS = {
+    "small": {"first_token_s": 0.15, "tokens_per_s": 150},
+    "large": {"first_token_s": 0.6, "tokens_per_s": 30},
+}
+ANSWER = {
+    "name": "Run the city",
+    "description": "Community running tour for urban commuters.",
+    "title": "Meet Metro 3",
+    "body": "Lace up for spring with the new Metro 3, our lightest city trainer yet. " * 4,
+    "audience": "Urban runners aged 25-40",
+    "channel": "Events and Instagram",
+    "tactics": ["Run clubs", "Influencer seeding"],
+    "channels": ["Instagram", "Email"],
+    "kpis": ["Sign-ups", "Conversion rate"],
+}
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        speed = MODELS[request["model"]]
+        content = f"Thought: I now can give a great answer\nFinal Answer: {json.dumps(ANSWER)}"
+        completion_tokens = len(content) // 4
+        time.sleep(speed["first_token_s"] + completion_tokens / speed["tokens_per_s"])
+        body = json.dumps({
+            "id": f"chatcmpl-{uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": completion_tokens, "total_tokens": 100 + completion_tokens},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(profiles: dict, runs: int) -> list:
+    LLM_PROFILES.clear()
+    LLM_PROFILES.update(profiles)
+    models = ModelRegistry(LLMService())
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        Workflow(f"bench-{uuid4().hex[:8]}", models, {
+            "customer_domain": "stridewell.example",
+            "project_description": "Spring launch of the Metro 3 city running shoe",
+        }).kickoff()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = {"provider": "openai", "base_url": f"http://127.0.0.1:{server.server_port}/v1", "api_key": "fake"}
+
+    single = run({name: {**endpoint, "model": "large"} for name in ("default", "fast", "quality")}, args.runs)
+    mixed = run({
+        "default": {**endpoint, "model": "large"},
+        "fast": {**endpoint, "model": "small"},
+        "quality": {**endpoint, "model": "large"},
+    }, args.runs)
+    server.shutdown()
+
+    for name, latencies in (("quality model only", single), ("YAML profiles", mixed)):
+        print(f"{name}: median {statistics.median(latencies):.2f}s over {len(latencies)} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Tokens handed to the agent per scraped page: raw ScrapeWebsiteTool text
+versus the condensation pipeline, and the pipeline's own cost.
+
+    python -m benchmarks.bench_page_condenser --repeat 200
+    python -m benchmarks.bench_page_condenser --pages path/to/saved/*.html
+"""
+import argparse
+import glob
+import re
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+from src.config.settings import SCRAPE_TOP_K, SCRAPE_TOKEN_CAP
+from src.core.crews.context_budget import estimate_tokens
+from src.core.tools.page_condenser import condense_page
+
+QUERY = "Stridewell running shoes urban runners competitors market"
+
+def raw_text(html: str) -> str:
+    """what ScrapeWebsiteTool returns for a page"""
+    text = BeautifulSoup(html, "html.parser").get_text(" ")
+    text = re.sub("[ \t]+", " ", text)
+    return re.sub("\\s+\n\\s+", "\n", text)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="*", default=sorted(glob.glob("tests/fixtures/html/*.html")))
+    parser.add_argument("--query", default=QUERY)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+
+    raw_tokens = sum(estimate_tokens(raw_text(html)) for html in pages)
+    seen = set()
+    condensed_tokens = sum(
+        estimate_tokens(condense_page(html, args.query, SCRAPE_TOP_K, SCRAPE_TOKEN_CAP, seen)) for html in pages
+    )
+    print(f"{len(pages)} pages: raw {raw_tokens} tokens, condensed {condensed_tokens} tokens "
+          f"({100 * (1 - condensed_tokens / raw_tokens):.0f}% fewer)")
+
+    for name, run in (
+        ("raw get_text", lambda html: raw_text(html)),
+        ("condense_page", lambda html: condense_page(html, args.query, SCRAPE_TOP_K, SCRAPE_TOKEN_CAP)),
+    ):
+        latencies = []
+        for _ in range(args.repeat):
+            for html in pages:
+                started = time.perf_counter()
+                run(html)
+                latencies.append(time.perf_counter() - started)
+        print(f"{name}: p50 {statistics.median(latencies) * 1000:.2f}ms per page")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Research phase latency of queued jobs with and without the speculative
+prefetch, against local stub servers: a Serper-compatible search API and a
+site with slow pages, plus a fake OpenAI-compatible LLM scripted to search,
+scrape the two top results and answer.
+
+Jobs are submitted together and one worker runs them in order (queue backlog);
+with prefetch, submission also hands every job to the fast prefetch queue.
+Times are measured from the moment the worker picks the job up.
+
+    python -m benchmarks.bench_prefetch --jobs 4
+"""
+import os
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("SERPER_API_KEY", "fake")
+
+import argparse
+import json
+import re
+import statistics
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+from src.config.settings import LLM_PROFILES
+from src.core.crews.market_analyst.market_analyst import MarketAnalystCrew
+from src.core.flows.research_cache import NO_PRIOR_RESEARCH
+from src.core.tools.cached_search import CachedSerperDevTool
+from src.core.tools.prefetch import prefetch_research
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.llm.llm_service import LLMService
+from src.services.llm.model_registry import ModelRegistry
+
+SEARCH_LATENCY_S = 0.8
+PAGE_LATENCY_S = 1.5
+LLM_LATENCY_S = 0.3
+PAGE_HTML = (
+    "<html><body><h1>{domain}</h1>"
+    + "<p>{domain} sells lightweight running shoes for urban runners, competing on price and comfort.</p>" * 20
+    + "</body></html>"
+)
+
+LLM_CALLS = []  # (domain, tool results seen, perf_counter)
+PAGES_URL = ""
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """search, then scrape the two top results, then answer"""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = "\n".join(str(message.get("content")) for message in request["messages"])
+        domain = re.search(r"around their (\S+) offerings", prompt).group(1)
+        step = sum(1 for message in request["messages"] if message["role"] == "assistant")
+        LLM_CALLS.append((domain, step, time.perf_counter()))
+        time.sleep(LLM_LATENCY_S)
+
+        if step == 0:
+            action = ("Search the internet with Serper", {"search_query": f"{domain} competitors"})
+        elif step in (1, 2):
+            action = ("Read website content", {"website_url": f"{PAGES_URL}/{domain}/{step}"})
+        else:
+            action = None
+        if action:
+            content = f"Thought: I need more information\nAction: {action[0]}\nAction Input: {json.dumps(action[1])}"
+        else:
+            content = f"Thought: I now can give a great answer\nFinal Answer: {domain} competes on price and comfort."
+        body = json.dumps({
+            "id": f"chatcmpl-{uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+        }).encode()
+        self._send(body, "application/json")
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSerperHandler(FakeLLMHandler):
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["q"]
+        domain = query.split()[0]
+        time.sleep(SEARCH_LATENCY_S)
+        organic = [
+            {"title": f"{domain} page {rank}", "link": f"{PAGES_URL}/{domain}/{rank}", "snippet": query, "position": rank}
+            for rank in range(1, 4)
+        ]
+        self._send(json.dumps({"searchParameters": {"q": query}, "organic": organic}).encode(), "application/json")
+
+
+class FakeSiteHandler(FakeLLMHandler):
+    def do_GET(self):
+        domain = self.path.strip("/").split("/")[0]
+        time.sleep(PAGE_LATENCY_S)
+        self._send(PAGE_HTML.format(domain=domain).encode(), "text/html; charset=utf-8")
+
+
+def serve(handler) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(models: ModelRegistry, jobs: int, prefetch: bool) -> dict:
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM tool_cache")
+        conn.commit()
+    tag = uuid4().hex[:6]
+    domains = [f"brand{index}-{tag}.example" for index in range(jobs)]
+    prefetcher = ThreadPoolExecutor(max_workers=4)
+    if prefetch:
+        for domain in domains:
+            prefetcher.submit(prefetch_research, domain)
+
+    started, finished = {}, {}
+    for domain in domains:
+        started[domain] = time.perf_counter()
+        MarketAnalystCrew(job_id=f"bench-{domain}", models=models, input_data={
+            "customer_domain": domain,
+            "project_description": "Spring launch of the Metro 3 city running shoe",
+            "prior_research": NO_PRIOR_RESEARCH,
+        }).kickoff()
+        finished[domain] = time.perf_counter()
+    prefetcher.shutdown()
+
+    def first_call(domain: str, step: int) -> float:
+        return min(at for name, seen, at in LLM_CALLS if name == domain and seen >= step) - started[domain]
+
+    return {
+        "first LLM call": [first_call(domain, 0) for domain in domains],
+        "first LLM call after a tool result": [first_call(domain, 1) for domain in domains],
+        "research phase": [finished[domain] - started[domain] for domain in domains],
+    }
+
+
+def main():
+    global PAGES_URL
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    initialize_database()
+    llm, search, site = serve(FakeLLMHandler), serve(FakeSerperHandler), serve(FakeSiteHandler)
+    PAGES_URL = f"http://127.0.0.1:{site.server_port}"
+    CachedSerperDevTool._get_search_url = lambda self, search_type: f"http://127.0.0.1:{search.server_port}/{search_type}"
+    endpoint = {"provider": "openai", "base_url": f"http://127.0.0.1:{llm.server_port}/v1", "api_key": "fake", "model": "small"}
+    LLM_PROFILES.clear()
+    LLM_PROFILES.update({name: endpoint for name in ("default", "fast", "quality")})
+    models = ModelRegistry(LLMService())
+
+    results = {"without prefetch": run(models, args.jobs, False), "with prefetch": run(models, args.jobs, True)}
+    for server in (llm, search, site):
+        server.shutdown()
+
+    for mode, metrics in results.items():
+        print(mode)
+        for metric, values in metrics.items():
+            print(f"  {metric}: median {statistics.median(values):.2f}s, per job {[round(value, 2) for value in values]}")
+
+
+if __name__ == "__main__":
+    main()
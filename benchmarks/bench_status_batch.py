@@ -0,0 +1,55 @@
+"""
+Status lookups of many jobs: one get_job per id versus a single get_jobs call,
+and a full walk of the job listing in pages.
+
+    python -m benchmarks.bench_status_batch --backend sqlite --ids 1000
+    python -m benchmarks.bench_status_batch --backend redis --redis-url redis://localhost:6379/15
+"""
+import argparse
+import time
+
+from benchmarks.bench_job_store import build_store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["sqlite", "redis", "fakeredis"], default="sqlite")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--ids", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=6)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    store = build_store(args)
+    job_ids = [f"batch-{index}" for index in range(args.ids)]
+    for job_id in job_ids:
+        for index in range(args.events):
+            store.append_event(job_id, f"task {index} output " + "x" * 200)
+
+    started = time.perf_counter()
+    individual = [store.get_job(job_id, include_result=False) for job_id in job_ids]
+    individual_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = store.get_jobs(job_ids)
+    batch_s = time.perf_counter() - started
+    assert len(batch) == len(individual) == args.ids
+
+    started = time.perf_counter()
+    listed, after = 0, None
+    while True:
+        page = store.list_jobs(after=after, limit=args.page)
+        if not page:
+            break
+        listed += len(page)
+        after = (page[-1].updated_at, page[-1].job_id)
+    listing_s = time.perf_counter() - started
+
+    print(f"{args.backend}: {args.ids} jobs with {args.events} events each")
+    print(f"  get_job per id: {individual_s * 1000:.0f}ms")
+    print(f"  get_jobs batch: {batch_s * 1000:.0f}ms ({individual_s / batch_s:.1f}x)")
+    print(f"  list_jobs, pages of {args.page}: {listed} jobs in {listing_s * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
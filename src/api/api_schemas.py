@@ -1,6 +1,16 @@
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field, HttpUrl
+from src.config.settings import STATUS_BATCH_MAX_IDS
 
 class MarketFlowRequest(BaseModel):
     """workflow request schema"""
     customer_domain: str
-    project_description: str
\ No newline at end of file
+    project_description: str
+    refresh_research: bool = False  # ignore stored research of the domain
+    callback_url: Optional[HttpUrl] = None  # receives a POST once the job reaches a terminal status
+    profile: bool = False  # sample the job's stacks, served by GET /api/marketflow/{job_id}/profile
+
+class StatusBatchRequest(BaseModel):
+    """bulk status request schema"""
+    job_ids: List[str] = Field(min_length=1, max_length=STATUS_BATCH_MAX_IDS)
+    include_result: bool = False
@@ -4,13 +4,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from .routes import flow_router
 
 from src.config.logger import setup_logging
-from src.services.database.connection import initialize_database
+from src.config.settings import TRACING_ENABLED
+from src.services.database.job_store import get_job_store
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Service initialization complete")
     print("Database initialized")
-    initialize_database() 
+    get_job_store().initialize()
     yield
     print("Shutting down...")
 
@@ -30,6 +31,10 @@ def create_app() -> FastAPI:
     
     # register routes
     app.include_router(flow_router, prefix="/api")
+
+    if TRACING_ENABLED:
+        from src.services.tracing.tracer import trace_request
+        app.middleware("http")(trace_request)
     
     return app
 
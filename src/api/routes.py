@@ -1,58 +1,346 @@
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
+from celery import chain
+from dataclasses import asdict
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from uuid import uuid4
-from .api_schemas import MarketFlowRequest
-from src.services.database.job_store import get_job_by_id
+from typing import Iterator, Optional, Tuple
+from .api_schemas import MarketFlowRequest, StatusBatchRequest
+from .status_cache import CachedStatus, status_cache
+from src.config.settings import (
+    JOB_LIST_MAX_LIMIT, PREFETCH_ENABLED, STATUS_CACHE_TERMINAL_TTL, TERMINAL_STATUSES
+)
+from src.services.database.job_store import (
+    create_job_by_id, get_job_by_id, get_job_result, get_job_version, get_jobs_by_ids, get_research_stats,
+    get_task_result, iter_jobs, list_jobs, update_job_by_id
+)
+from src.services.database.lifecycle import lifecycle_stats
+from src.services.celery.admission import get_admission_controller
 from src.services.celery.celery_app import app as celery_app
+from src.services.celery.profiling import PROFILE_TASK, collapsed_stacks
+from src.services.webhooks.delivery import check_callback_url
+import base64
 import json
+import time
+import zlib
 
 logger = logging.getLogger(__name__)
 
 flow_router = APIRouter(tags=["MarketFlow"])
 
 @flow_router.post("/marketflow")
-async def start_marketflow_job(request: MarketFlowRequest):
+async def start_marketflow_job(request: MarketFlowRequest, http_request: Request):
     """starting work flow"""
+    if request.callback_url:
+        # resolves the host, off the event loop
+        refused = await asyncio.to_thread(check_callback_url, str(request.callback_url))
+        if refused:
+            raise HTTPException(422, detail=f"callback_url refused: {refused}")
+    job_id = str(uuid4())
+    # per-client quotas go by the X-Client-ID header, the caller's address otherwise
+    client_id = http_request.headers.get("X-Client-ID") or (http_request.client.host if http_request.client else "anonymous")
+    decision = get_admission_controller().admit(job_id, client_id)
+    if not decision.admitted:
+        raise HTTPException(
+            429,
+            detail={
+                "reason": decision.reason,
+                "estimated_wait_s": decision.estimated_wait_s,
+                "retry_after_s": decision.retry_after_s
+            },
+            headers={"Retry-After": str(decision.retry_after_s)}
+        )
     try:
-        job_id = str(uuid4())
         logger.info(f"Starting marketflow job: {job_id}")
         input_data = {
             "customer_domain": request.customer_domain,
-            "project_description": request.project_description
+            "project_description": request.project_description,
+            "refresh_research": request.refresh_research,
+            "client_id": client_id,
+            "callback_url": str(request.callback_url) if request.callback_url else None,
+            "profile": request.profile
         }
-        celery_app.send_task(
-            'src.tasks.market_tasks.kickoff_flow', 
-            args=[job_id, input_data],
-            queue='market_flow'
-        )
+        # the job is QUEUED (and queryable) before any worker sees it
+        if not create_job_by_id(job_id):
+            raise RuntimeError("job could not be recorded")
+        if PREFETCH_ENABLED:
+            _send_prefetch(job_id, input_data)
+        _send_flow(job_id, input_data)
         logger.debug(f"Job dispatched: {job_id}")
-        return {"job_id": job_id}
+        return {"job_id": job_id, "estimated_wait_s": decision.estimated_wait_s}
     except Exception as e:
         logger.error("Failed to start job", exc_info=True)
+        get_admission_controller().release_client(job_id, client_id)
         raise HTTPException(500, detail=f"Startup failure: {str(e)}")
 
+def _send_flow(job_id: str, input_data: dict) -> None:
+    """one task per flow phase, chained: each phase starts once the previous one stored its output"""
+    chain(
+        celery_app.signature(
+            'src.tasks.market_tasks.research_phase', args=[job_id, input_data], queue='market_flow', immutable=True
+        ),
+        celery_app.signature(
+            'src.tasks.market_tasks.content_phase', args=[job_id, input_data], queue='content_generation', immutable=True
+        ),
+    ).apply_async()
+
+def _send_prefetch(job_id: str, input_data: dict) -> None:
+    """speculative search/scrape on the fast prefetch queue, never fails the submission"""
+    try:
+        celery_app.send_task(
+            'src.tasks.prefetch_tasks.prefetch_research',
+            args=[job_id, input_data],
+            queue='prefetch'
+        )
+    except Exception:
+        logger.warning(f"Prefetch dispatch failed for job {job_id}", exc_info=True)
+
+@flow_router.post("/marketflow/status:batch")
+def get_marketflow_status_batch(request: StatusBatchRequest):
+    """Querying the status of many jobs at once"""
+    jobs = get_jobs_by_ids(request.job_ids, include_result=request.include_result)
+    missing = [job_id for job_id in dict.fromkeys(request.job_ids) if job_id not in jobs]
+    logger.info(f"Batch status of {len(request.job_ids)} jobs, {len(missing)} missing")
+
+    def members() -> Iterator[str]:
+        for job_id, job in jobs.items():
+            result = "null"
+            if request.include_result:
+                result = job.result if job.result_type == "json" else json.dumps(job.result)
+            yield _json_document(
+                {
+                    "job_id": job_id,
+                    "status": job.status,
+                    **_lifecycle(job),
+                    "events": [{"timestamp": event.timestamp, "data": event.data} for event in job.events]
+                },
+                result=result
+            )
+
+    return StreamingResponse(_stream_json_list("jobs", members(), missing=missing), media_type="application/json")
+
+@flow_router.get("/marketflow")
+def list_marketflow_jobs(
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=JOB_LIST_MAX_LIMIT)
+):
+    """Listing jobs by last update, oldest first; pass next_cursor back to get the next page"""
+    since = _parse_time(since, "since")
+    after = _decode_cursor(cursor) if cursor else None
+
+    # one extra row tells whether there is a next page
+    page = list_jobs(status=status, since=since, after=after, limit=limit + 1)
+    next_cursor = _encode_cursor(page[limit - 1].updated_at, page[limit - 1].job_id) if len(page) > limit else None
+    members = (
+        json.dumps(asdict(job)) for job in page[:limit]
+    )
+    return StreamingResponse(_stream_json_list("jobs", members, next_cursor=next_cursor), media_type="application/json")
+
+@flow_router.get("/marketflow/export")
+def export_marketflow_jobs(
+    status: Optional[str] = "COMPLETE",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    gzip: bool = False
+):
+    """
+    Exporting jobs with their results and events as NDJSON, one job per line in
+    last update order. Every line carries the cursor to resume the export after it.
+    """
+    since, until = _parse_time(since, "since"), _parse_time(until, "until")
+    after = _decode_cursor(cursor) if cursor else None
+    logger.info(f"Exporting {status or 'all'} jobs from {since} to {until}")
+
+    def lines() -> Iterator[str]:
+        for summary, job in iter_jobs(status=status or None, since=since, until=until, after=after):
+            result = job.result if job.result_type == "json" else json.dumps(job.result)
+            yield _json_document(
+                {
+                    "job_id": summary.job_id,
+                    "status": job.status,
+                    "updated_at": summary.updated_at,
+                    **_lifecycle(job),
+                    "events": [{"timestamp": event.timestamp, "data": event.data} for event in job.events],
+                    "cursor": _encode_cursor(summary.updated_at, summary.job_id)
+                },
+                result=result
+            ) + "\n"
+
+    if not gzip:
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    return StreamingResponse(
+        _gzip_stream(lines()),
+        media_type="application/gzip",
+        headers={"Content-Disposition": 'attachment; filename="marketflow-export.ndjson.gz"'}
+    )
+
+def _gzip_stream(chunks: Iterator[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8"))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _parse_time(value: Optional[str], name: str) -> Optional[str]:
+    """ISO 8601 query parameter to the stored yyyy-MM-dd HH:mm:ss format"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise HTTPException(400, detail=f"{name} must be an ISO 8601 date")
+
+def _lifecycle(job) -> dict:
+    return {"created_at": job.created_at, "started_at": job.started_at, "finished_at": job.finished_at}
+
+def _encode_cursor(updated_at: str, job_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{updated_at}|{job_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        updated_at, job_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return updated_at, job_id
+    except ValueError:
+        raise HTTPException(400, detail="Invalid cursor")
+
 @flow_router.get("/marketflow/{job_id}")
-async def get_marketflow_status(job_id: str):
+async def get_marketflow_status(job_id: str, request: Request, include_result: bool = True):
     """Querying Workflow Status"""
     logger.info(f"Querying job status: {job_id}")
 
-    job = get_job_by_id(job_id)
+    key = (job_id, include_result)
+    cached = status_cache.get(key)
+    if cached is None or not status_cache.is_settled(cached):
+        # the version is read before the job, a concurrent update can only make the entry look stale
+        current = get_job_version(job_id)
+        if current is None:
+            status_cache.discard(job_id)
+            logger.warning(f"Job not found: {job_id}")
+            raise HTTPException(404, detail="Task does not exist")
+        status, version = current
+        if cached is None or cached.version != version:
+            cached = _build_status(job_id, include_result, status, version)
+            if cached is None:
+                raise HTTPException(404, detail="Task does not exist")
+            status_cache.put(key, cached)
+
+    etag = f'"{job_id}:{cached.version}:{int(include_result)}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"max-age={STATUS_CACHE_TERMINAL_TTL}" if cached.status in TERMINAL_STATUSES else "no-cache"
+        ),
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+def _build_status(job_id: str, include_result: bool, status: str, version: str) -> Optional[CachedStatus]:
+    # large results are only decompressed when the client asks for them
+    job = get_job_by_id(job_id, include_result=include_result)
     if not job:
         logger.warning(f"Job not found: {job_id}")
+        return None
+
+    # stored results are already serialized, embed them without re-parsing
+    result = "null"
+    if include_result:
+        result = job.result if job.result_type == "json" else json.dumps(job.result)
+    response = _json_response(
+        {
+            "job_id": job_id,
+            "status": job.status,
+            **_lifecycle(job),
+            "events": [
+                {"timestamp": event.timestamp, "data": event.data}
+                for event in job.events
+            ]
+        },
+        result=result
+    )
+    # a job that moved on since its version was read is cached under the older version
+    return CachedStatus(version, status, response.body.decode(), time.monotonic())
+
+@flow_router.post("/marketflow/{job_id}/cancel")
+async def cancel_marketflow_job(job_id: str):
+    """Cancelling a queued or running job, its remaining phases are skipped"""
+    if update_job_by_id(job_id, "CANCELLED", "", ["Job cancelled"]):
+        logger.info(f"Job {job_id} cancelled")
+        return {"job_id": job_id, "status": "CANCELLED"}
+    current = get_job_version(job_id)
+    if current is None:
         raise HTTPException(404, detail="Task does not exist")
-    
-    try:
-        result = json.loads(str(job.result))
-    except json.JSONDecodeError:
-        logger.warning(f"Job runtime error: {job_id}")
-        result = str(job.result)
-    
-    return {
-        "job_id": job_id,
-        "status": job.status,
-        "result": result,
-        "events": [
-            {"timestamp": event.timestamp, "data": event.data}
-            for event in job.events
-        ]
-    }
+    raise HTTPException(409, detail=f"Task already {current[0]}")
+
+@flow_router.get("/marketflow/{job_id}/result")
+async def get_marketflow_result(job_id: str):
+    """Querying Workflow Result only"""
+    result = get_job_result(job_id)
+    if result is None:
+        logger.warning(f"Job not found: {job_id}")
+        raise HTTPException(404, detail="Task does not exist")
+    return _json_response({"job_id": job_id}, result=result)
+
+@flow_router.get("/marketflow/{job_id}/result/{task}")
+async def get_marketflow_task_result(job_id: str, task: str):
+    """Querying the structured output of a single crew task"""
+    result = get_task_result(job_id, task)
+    if result is None:
+        logger.warning(f"Task result not found: {job_id}/{task}")
+        raise HTTPException(404, detail="Task result does not exist")
+    return _json_response({"job_id": job_id, "task": task}, result=result)
+
+@flow_router.get("/marketflow/{job_id}/profile")
+def get_marketflow_profile(job_id: str):
+    """Sampled stacks of a job submitted with profile=true, in the collapsed format of flamegraph tools"""
+    profile = get_task_result(job_id, PROFILE_TASK)
+    if profile is None:
+        raise HTTPException(404, detail="Profile does not exist")
+    return PlainTextResponse(
+        collapsed_stacks(json.loads(profile)),
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.collapsed"'}
+    )
+
+@flow_router.get("/capacity")
+async def get_capacity():
+    """Admission model inputs and the queueing delay a job submitted now is expected to see"""
+    capacity = get_admission_controller().snapshot()
+    return {**capacity.to_dict(), "accepting": capacity.estimated_wait_s <= capacity.max_wait_s}
+
+@flow_router.get("/stats/lifecycle")
+def get_lifecycle_stats(hours: int = Query(24, ge=1, le=24 * 30)):
+    """Queue wait and service time of recently updated jobs, from their lifecycle timestamps"""
+    return lifecycle_stats(hours)
+
+@flow_router.get("/research/stats")
+async def get_research_reuse_stats():
+    """Market research reuse across jobs: researched domains, reuses and research runs"""
+    stats = get_research_stats()
+    jobs = stats["hits"] + stats["runs"]
+    return {**stats, "hit_rate": round(stats["hits"] / jobs, 3) if jobs else 0.0}
+
+def _json_document(fields: dict, **documents: str) -> str:
+    """Serialize a JSON object, embedding pre-serialized JSON documents verbatim"""
+    members = [f"{json.dumps(key)}:{json.dumps(value, default=str)}" for key, value in fields.items()]
+    members += [f"{json.dumps(key)}:{document}" for key, document in documents.items()]
+    return "{" + ",".join(members) + "}"
+
+def _json_response(fields: dict, **documents: str) -> Response:
+    """Build a JSON response, embedding pre-serialized JSON documents verbatim"""
+    return Response(content=_json_document(fields, **documents), media_type="application/json")
+
+def _stream_json_list(name: str, items: Iterator[str], **fields) -> Iterator[str]:
+    """Stream {name: [items...], **fields} one serialized item at a time"""
+    yield f"{{{json.dumps(name)}:["
+    for index, item in enumerate(items):
+        yield item if index == 0 else "," + item
+    yield "]"
+    for key, value in fields.items():
+        yield f",{json.dumps(key)}:{json.dumps(value)}"
+    yield "}"
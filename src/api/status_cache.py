@@ -0,0 +1,60 @@
+import threading
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from src.config.settings import STATUS_CACHE_SIZE, STATUS_CACHE_TERMINAL_TTL, TERMINAL_STATUSES
+
+
+@dataclass
+class CachedStatus:
+    version: str  # job version the body was built from
+    status: str
+    body: str  # serialized status response
+    cached_at: float
+
+
+class JobStatusCache:
+    """
+    Bounded LRU of serialized status responses in the API process, keyed by
+    (job_id, include_result). An entry is valid while the job's version is
+    unchanged; terminal jobs no longer change, their entries are served without
+    checking the version for STATUS_CACHE_TERMINAL_TTL seconds.
+    """
+
+    def __init__(self, max_entries: int = STATUS_CACHE_SIZE, terminal_ttl: int = STATUS_CACHE_TERMINAL_TTL):
+        self.max_entries = max_entries
+        self.terminal_ttl = terminal_ttl
+        self._entries: "OrderedDict[Tuple[str, bool], CachedStatus]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, bool]) -> Optional[CachedStatus]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[str, bool], entry: CachedStatus) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, job_id: str) -> None:
+        with self._lock:
+            for include_result in (True, False):
+                self._entries.pop((job_id, include_result), None)
+
+    def is_settled(self, entry: CachedStatus) -> bool:
+        """a terminal job's entry that can be served without a version check"""
+        return entry.status in TERMINAL_STATUSES and time.monotonic() - entry.cached_at < self.terminal_ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+status_cache = JobStatusCache()
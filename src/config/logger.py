@@ -1,52 +1,194 @@
+import atexit
+import json
 import logging
-import logging.config
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
-from src.config.settings import LOG_DIR, LOG_LEVEL
+from typing import Dict, Optional, Tuple
+from src.config.settings import (
+    LOG_DIR, LOG_LEVEL, LOG_FORMAT, LOG_MAX_MESSAGE_CHARS, LOG_SAMPLE_BURST, LOG_QUEUE_SIZE, LOG_DROP_REPORT_SECONDS
+)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_drop_lock = threading.Lock()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """never blocks the logging thread: records are dropped when the queue is full"""
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # only the message and traceback text cross the queue, formatting happens in the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _drop_lock:
+                _QueueHandler.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    """writer thread, reports the records dropped on a full queue since its last report"""
+
+    def __init__(self, log_queue: queue.Queue, *handlers, report_seconds: float = LOG_DROP_REPORT_SECONDS):
+        super().__init__(log_queue, *handlers, respect_handler_level=False)
+        self.report_seconds = report_seconds
+        self._reported = _QueueHandler.dropped
+        self._reported_at = time.monotonic()
+
+    def dequeue(self, block: bool):
+        # wakes up every report_seconds, drops are reported even when nothing else is logged
+        while True:
+            self.report_dropped()
+            try:
+                return self.queue.get(block, timeout=self.report_seconds)
+            except queue.Empty:
+                continue
+
+    def report_dropped(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._reported_at < self.report_seconds:
+            return
+        dropped = _QueueHandler.dropped
+        if dropped > self._reported:
+            record = logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                f"{dropped - self._reported} log records dropped in the last {now - self._reported_at:.0f}s, "
+                f"the log queue was full", None, None
+            )
+            self.handle(record)
+        self._reported, self._reported_at = dropped, now
+
+
+class TruncatingFilter(logging.Filter):
+    """cuts long messages (event payloads, LLM outputs) before they are queued"""
+
+    def __init__(self, max_chars: int = LOG_MAX_MESSAGE_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if len(message) > self.max_chars:
+            message = f"{message[:self.max_chars]}... [{len(message) - self.max_chars} chars truncated]"
+        record.msg, record.args = message, None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate limit per call site for INFO and below: at most `burst` records per second
+    from the same line, the number suppressed is reported with the next one let through.
+    Warnings and errors are never sampled.
+    """
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST):
+        super().__init__()
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, int], list] = {}  # call site -> [window start, count, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.burst <= 0:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(site, [now, 0, 0])
+            if now - window[0] >= 1.0:
+                window[0], window[1] = now, 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.filename}:{record.lineno}",
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if getattr(record, "suppressed", 0):
+            document["suppressed"] = record.suppressed
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, ensure_ascii=False)
+
+
+def _output_handlers() -> list:
+    """the blocking handlers, only ever called from the listener thread"""
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(
+        JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter("%(levelname)s %(message)s")
+    )
+    file = logging.handlers.RotatingFileHandler(
+        f"{LOG_DIR}/marketflow.log",
+        maxBytes=1024 * 1024 * 10,  # 10MB
+        backupCount=5,
+        encoding="utf8",
+    )
+    file.setFormatter(JsonFormatter())
+    return [console, file]
+
+
+def stop_logging() -> None:
+    """flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.report_dropped(force=True)
+        _listener = None
+
+
+atexit.register(stop_logging)
+
 
 def setup_logging():
-    """setup logging configuration"""
-    
+    """
+    setup logging configuration: loggers only put records on a queue, a listener
+    thread formats them (JSON) and writes them to the console and the log file
+    """
+    global _listener
     Path(LOG_DIR).mkdir(parents=True, exist_ok=True)
-    
-    logging_config = {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "verbose": {
-                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s [%(filename)s:%(lineno)d]"
-            },
-            "simple": {
-                "format": "%(levelname)s %(message)s"
-            },
-        },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "level": LOG_LEVEL,
-                "formatter": "simple",
-                "stream": "ext://sys.stdout",
-            },
-            "file": {
-                "class": "logging.handlers.RotatingFileHandler",
-                "level": LOG_LEVEL,
-                "formatter": "verbose",
-                "filename": f"{LOG_DIR}/marketflow.log",
-                "maxBytes": 1024 * 1024 * 10,  # 10MB
-                "backupCount": 5,
-                "encoding": "utf8",
-            },
-        },
-        "loggers": {
-            "src": {
-                "handlers": ["console", "file"],
-                "level": LOG_LEVEL,
-                "propagate": False,
-            },
-        },
-        "root": {
-            "handlers": ["console"],
-            "level": "WARNING",
-        },
-    }
-
-    logging.config.dictConfig(logging_config)
\ No newline at end of file
+    stop_logging()
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(TruncatingFilter())
+    _listener = _Listener(log_queue, *_output_handlers())
+    _listener.start()
+
+    src_logger = logging.getLogger("src")
+    src_logger.handlers = [queue_handler]
+    src_logger.setLevel(LOG_LEVEL)
+    src_logger.propagate = False
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(logging.WARNING)
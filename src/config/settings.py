@@ -10,6 +10,29 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+TASK_TIME_LIMIT = 300  # seconds a flow phase may take
+TASK_SOFT_TIME_LIMIT = TASK_TIME_LIMIT - 15  # the phase is interrupted first, so the job can be marked TIMEOUT
+PHASE_MAX_RETRIES = int(os.getenv("PHASE_MAX_RETRIES", 2))  # retries of a failed flow phase
+PHASE_RETRY_DELAY = 30  # seconds before a failed phase is retried
+# longest a job can run: its two phases with every retry and the delays in between, queue waits not included
+JOB_MAX_RUN_SECONDS = 2 * ((PHASE_MAX_RETRIES + 1) * TASK_TIME_LIMIT + PHASE_MAX_RETRIES * PHASE_RETRY_DELAY)
+
+# worker memory
+WORKER_MAX_MEMORY_MB = int(os.getenv("WORKER_MAX_MEMORY_MB", 1536))  # RSS past which a pool process is replaced after its task, 0 disables
+WORKER_MEMORY_PROFILE = os.getenv("WORKER_MEMORY_PROFILE", "off")  # off, rss or tracemalloc: per-task memory recorded as a job event
+WORKER_MEMORY_TOP = 5  # allocation sites listed per task with tracemalloc
+
+# per-job profiling ("profile": true on submission)
+PROFILE_INTERVAL_MS = 10  # stack sampling interval
+PROFILE_MAX_STACKS = 20000  # distinct stacks kept per phase, further ones are counted as [truncated]
+
+# admission control on job submission
+MARKETFLOW_WORKERS = int(os.getenv("MARKETFLOW_WORKERS", 2))  # total concurrency of the market_flow workers
+ADMISSION_REDIS_URL = os.getenv("ADMISSION_REDIS_URL", REDIS_BROKER_URL)  # must see the market_flow queue
+ADMISSION_MAX_WAIT_SECONDS = int(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 900))  # longest accepted queueing delay
+ADMISSION_CLIENT_QUOTA = int(os.getenv("ADMISSION_CLIENT_QUOTA", 5))  # queued + running jobs per client
+ADMISSION_DEFAULT_SERVICE_SECONDS = 180  # job duration assumed until jobs have finished
+ADMISSION_SERVICE_SAMPLES = 50  # recent job durations the estimate is the mean of
 
 # LLM default configs
 LLM_BASE_URL = "http://localhost:11434"
@@ -17,12 +40,122 @@ LLM_API_KEY = "ollama"
 LLM_MODEL = "qwen2.5:0.5b"
 LLM_PROVIDER="ollama"
 
+# model profiles, selected per agent or task with `llm_profile` in the crew YAML.
+# Each profile overrides fields of the default LLM config, "default" is the config itself.
+LLM_PROFILES = {
+    "default": {},
+    "fast": {"model": os.getenv("LLM_FAST_MODEL", LLM_MODEL), "temperature": 0.2},
+    "quality": {"model": os.getenv("LLM_QUALITY_MODEL", LLM_MODEL)},
+}
+
+# concurrent LLM calls of a fan-out stage (content production over campaign concepts)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 3))
+FAN_OUT_ATTEMPTS = 2  # attempts per unit before it is reported as failed
+
+# market research reuse across jobs of the same customer_domain
+RESEARCH_FRESH_HOURS = int(os.getenv("RESEARCH_FRESH_HOURS", 24))  # reused as is
+RESEARCH_MAX_AGE_HOURS = int(os.getenv("RESEARCH_MAX_AGE_HOURS", 168))  # refreshed from, then researched again
+
+# speculative prefetch of search results and pages while a job waits in the queue
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_QUERIES = [
+    "{customer_domain}",
+    "{customer_domain} competitors",
+    "{customer_domain} products",
+    "{customer_domain} market trends",
+]
+PREFETCH_PAGES = 3  # top organic results fetched per query
+TOOL_CACHE_TTL_SECONDS = int(os.getenv("TOOL_CACHE_TTL_SECONDS", 6 * 3600))
+
+# context budget configs
+# upstream task outputs passed through `context=[...]` are condensed to this many tokens (0 disables)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 800))
+CHARS_PER_TOKEN = 4  # token estimate without loading a tokenizer
+
+# scraped-page condensation configs
+SCRAPE_TOP_K = 8  # passages returned per page
+SCRAPE_TOKEN_CAP = 1200  # tokens returned per page
+
+# agent tool-loop configs, per-agent overrides go in agents.yaml (max_iter, max_tool_calls)
+AGENT_MAX_TOOL_CALLS = 10  # real tool calls per agent per crew run
+TOOL_REPEAT_LIMIT = 2  # identical repeats before the agent is told to answer
+
+# crew YAML configs, loaded once per process and reloaded when the files change
+CREW_CONFIG_RELOAD_SECONDS = float(os.getenv("CREW_CONFIG_RELOAD_SECONDS", 5))  # how often the files are checked
+
 # google search configs
 os.environ["SERPER_API_KEY"]  = "32b2b6c476b1fd71cf2a754a788ff4078a06745f0a3f9758bfc032584f059336"
 
+# job store configs
+# "sqlite" (single host) or "redis" (shared by API replicas and workers on several hosts)
+JOB_STORE_BACKEND = os.getenv("JOB_STORE_BACKEND", "sqlite")
+JOB_STORE_REDIS_URL = os.getenv("JOB_STORE_REDIS_URL", "redis://localhost:6379/1")
+
+# event log configs
+# "store" writes events straight to the job store, "redis_stream" appends them to
+# per-job Redis Streams and persists them in batches
+EVENT_LOG_BACKEND = os.getenv("EVENT_LOG_BACKEND", "store")
+EVENT_STREAM_REDIS_URL = os.getenv("EVENT_STREAM_REDIS_URL", REDIS_BROKER_URL)
+EVENT_STREAM_MAXLEN = 1000  # entries kept per job stream
+EVENT_STREAM_FLUSH_INTERVAL = 5  # seconds between batch persists
+EVENT_STREAM_TTL = 24 * 3600  # seconds a job's stream and offset outlive its last write, for streams never discarded
+
 # sqlite path
-DATABASE_PATH = "marketflow.db"
+DATABASE_PATH = os.getenv("DATABASE_PATH", "marketflow.db")
+
+# payload storage configs
+# results/events larger than the threshold (bytes) are compressed into the blobs table
+PAYLOAD_COMPRESSION_THRESHOLD = int(os.getenv("PAYLOAD_COMPRESSION_THRESHOLD", 4096))
+PAYLOAD_COMPRESSION_CODEC = os.getenv("PAYLOAD_COMPRESSION_CODEC", "zlib")  # zlib or zstd
+
+# retention configs
+# per terminal status: drop jobs older than max_age_days, keep at most max_jobs newest
+RETENTION_POLICY = {
+    "COMPLETE": {"max_age_days": 30, "max_jobs": 50000},
+    "ERROR": {"max_age_days": 7, "max_jobs": 5000},
+    "TIMEOUT": {"max_age_days": 7, "max_jobs": 5000},
+    "CANCELLED": {"max_age_days": 7, "max_jobs": 5000},
+}
+# job lifecycle: QUEUED (submitted) -> RUNNING (picked up by a worker) -> one of the terminal states;
+# jobs created by their first event instead of through the API start out as STARTED
+TERMINAL_STATUSES = ("COMPLETE", "ERROR", "TIMEOUT", "CANCELLED")  # jobs in these states no longer change
+RETENTION_BATCH_SIZE = 200  # jobs deleted per write transaction
+RETENTION_INTERVAL_SECONDS = 3600
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", str(Path(__file__).parent.parent.parent / "archive"))
+
+# job status cache of the API process
+STATUS_CACHE_SIZE = int(os.getenv("STATUS_CACHE_SIZE", 2000))  # (job, include_result) responses kept
+STATUS_CACHE_TERMINAL_TTL = 300  # seconds terminal jobs are served without a version check
+STATUS_BATCH_MAX_IDS = 1000  # job ids per POST /api/marketflow/status:batch
+JOB_LIST_MAX_LIMIT = 1000  # jobs per page of GET /api/marketflow
+EXPORT_CHUNK_SIZE = 100  # jobs loaded per read by GET /api/marketflow/export
+
+# completion webhooks (callback_url of a job)
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # HMAC-SHA256 key of the X-MarketFlow-Signature header, required for webhooks
+WEBHOOK_ALLOW_PRIVATE_HOSTS = os.getenv("WEBHOOK_ALLOW_PRIVATE_HOSTS", "false").lower() == "true"  # callback_urls on loopback/private networks
+WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", 20))  # requests in flight per delivery run
+WEBHOOK_TIMEOUT_SECONDS = 10
+WEBHOOK_BATCH_SIZE = 200  # deliveries claimed per run
+WEBHOOK_POLL_INTERVAL = 2  # seconds between delivery runs
+WEBHOOK_MAX_ATTEMPTS = 8  # then the delivery is dead
+WEBHOOK_RETRY_BASE_SECONDS = 5  # backoff doubles per failed attempt
+WEBHOOK_RETRY_MAX_SECONDS = 3600
+WEBHOOK_DEAD_RETENTION_DAYS = 7  # dead deliveries kept for inspection (Redis job store)
 
 # logging config
 LOG_DIR = os.getenv("LOG_DIR", str(Path(__file__).parent.parent.parent / "logs"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # console output: json or text, the log file is always json
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", 2000))  # longer messages are truncated
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", 20))  # INFO records per second and call site, 0 disables sampling
+LOG_QUEUE_SIZE = 10000  # records waiting for the writer thread, more are dropped
+LOG_DROP_REPORT_SECONDS = 10  # dropped records are reported as a warning at most this often
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() == "true"  # crewAI prints prompts and answers to stdout
+
+# distributed tracing (OpenTelemetry): API -> broker -> worker tasks -> phases, crew tasks, LLM, tool and DB calls
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")  # file (JSON lines) or otlp (OTLP/HTTP collector)
+TRACING_FILE = os.getenv("TRACING_FILE", str(Path(LOG_DIR) / "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", 0.05))  # share of jobs traced, decided at submission
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "marketflow")
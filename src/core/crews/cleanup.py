@@ -0,0 +1,63 @@
+"""
+crewAI keeps references to every crew a worker process has run:
+
+- the @agent/@task/@crew decorators memoize their results in a dict keyed by
+  the crew instance, so every crew, with its agents, tasks and executors, stays
+  reachable from the crew class
+- the event listener singleton keeps finished tasks as keys of execution_spans
+- each agent executor registers a token counter in litellm's callback lists,
+  which only get cleaned of the success callbacks
+
+Crews call release_crew once they are done, so a long-lived worker's memory
+stays flat across jobs.
+"""
+import logging
+
+import litellm
+from crewai.events.event_listener import event_listener
+from crewai.utilities.token_counter_callback import TokenCalcHandler
+
+logger = logging.getLogger(__name__)
+
+LITELLM_CALLBACK_LISTS = (
+    "input_callback", "success_callback", "failure_callback", "_async_success_callback", "_async_failure_callback"
+)
+
+
+def _memoized_caches(cls) -> list:
+    """the memoize() caches of a crew class' decorated methods"""
+    caches = []
+    for attribute in vars(cls).values():
+        func = attribute
+        while callable(func) and hasattr(func, "__code__"):
+            if func.__closure__ and "cache" in func.__code__.co_freevars:
+                cache = func.__closure__[func.__code__.co_freevars.index("cache")].cell_contents
+                if isinstance(cache, dict):
+                    caches.append(cache)
+            func = getattr(func, "__wrapped__", None)
+    return caches
+
+
+def release_crew(instance) -> int:
+    """drop what crewAI still holds of a finished crew, returns the memoized results released"""
+    released = 0
+    for cls in type(instance).__mro__:
+        for cache in _memoized_caches(cls):
+            for key in [key for key in list(cache) if key[0][:1] == (instance,)]:
+                cache.pop(key, None)
+                released += 1
+
+    # the listener only ends spans that are set, None marks a finished task
+    spans = event_listener.execution_spans
+    for task, span in list(spans.items()):
+        if span is None:
+            spans.pop(task, None)
+
+    # counters of running executors are also in litellm.callbacks, those stay
+    active = {id(callback) for callback in litellm.callbacks}
+    for name in LITELLM_CALLBACK_LISTS:
+        callbacks = getattr(litellm, name)
+        stale = [c for c in callbacks if isinstance(c, TokenCalcHandler) and id(c) not in active]
+        for callback in stale:
+            callbacks.remove(callback)
+    return released
@@ -0,0 +1,193 @@
+"""
+Agent and task configs of the crews, parsed and validated once per process
+instead of on every crew instantiation, and reloaded when their YAML changes.
+
+Each load is a CrewConfig version identified by the hash of its content. A crew
+takes one version when it is created and keeps it for its whole run; an edited
+file is checked (at most every CREW_CONFIG_RELOAD_SECONDS) and swapped in for
+the crews created after it, without restarting the workers. An edit that does
+not validate is logged and the previous version stays in use.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import yaml
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from src.config.settings import CREW_CONFIG_RELOAD_SECONDS
+from src.services.database.job_store import append_event_by_id, get_task_result, save_task_result
+
+logger = logging.getLogger(__name__)
+
+# the placeholders crewAI interpolates when a crew is kicked off
+PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_\-]*)\}")
+TEMPLATE_FIELDS = {"agent": ("role", "goal", "backstory"), "task": ("description", "expected_output")}
+# task result of a job naming the config version each of its crews ran with
+CREW_CONFIG_TASK = "crew_config"
+
+
+class CrewConfigError(ValueError):
+    """a crew's YAML can't be used"""
+
+
+@dataclass(frozen=True)
+class CrewConfig:
+    """one validated version of a crew's agents.yaml and tasks.yaml"""
+    crew: str
+    version: str  # sha256 prefix of the parsed content, comments and layout don't count
+    agents: Dict[str, Dict[str, Any]]
+    tasks: Dict[str, Dict[str, Any]]
+    placeholders: Dict[str, Tuple[str, ...]] = field(default_factory=dict)  # "task.research_task.description" -> names
+
+    def agents_config(self) -> Dict[str, Dict[str, Any]]:
+        # CrewBase replaces entry values with agents and tools, each crew gets its own entries
+        return {name: dict(entry) for name, entry in self.agents.items()}
+
+    def tasks_config(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(entry) for name, entry in self.tasks.items()}
+
+
+def _entries(data: Any, kind: str, path: Path) -> Dict[str, Dict[str, Any]]:
+    if not isinstance(data, dict) or not all(isinstance(entry, dict) for entry in data.values()):
+        raise CrewConfigError(f"{path}: expected a mapping of {kind} names to their config")
+    for name, entry in data.items():
+        missing = [key for key in TEMPLATE_FIELDS[kind] if not isinstance(entry.get(key), str)]
+        if missing:
+            raise CrewConfigError(f"{path}: {kind} {name} has no {', '.join(missing)}")
+    return data
+
+
+def compile_config(crew: str, agents_path: Path, tasks_path: Path, inputs: Iterable[str]) -> CrewConfig:
+    """parse and check a crew's YAML: every task has a known agent and context, every placeholder is an input"""
+    try:
+        agents = _entries(yaml.safe_load(agents_path.read_text(encoding="utf-8")), "agent", agents_path)
+        tasks = _entries(yaml.safe_load(tasks_path.read_text(encoding="utf-8")), "task", tasks_path)
+    except (OSError, yaml.YAMLError) as e:
+        raise CrewConfigError(f"Crew {crew} config can't be read: {e}") from e
+
+    for name, task in tasks.items():
+        if task.get("agent") not in (None, *agents):
+            raise CrewConfigError(f"{tasks_path}: task {name} has an unknown agent {task['agent']}")
+        unknown = [context for context in task.get("context") or [] if context not in tasks]
+        if unknown:
+            raise CrewConfigError(f"{tasks_path}: task {name} has an unknown context {', '.join(unknown)}")
+
+    known = set(inputs)
+    placeholders = {}
+    for kind, entries in (("agent", agents), ("task", tasks)):
+        for name, entry in entries.items():
+            for key in TEMPLATE_FIELDS[kind]:
+                names = tuple(dict.fromkeys(PLACEHOLDER.findall(entry[key])))
+                unknown = [placeholder for placeholder in names if placeholder not in known]
+                if unknown:
+                    raise CrewConfigError(
+                        f"Crew {crew} {kind} {name} {key} uses {{{unknown[0]}}}, inputs are {', '.join(sorted(known))}"
+                    )
+                if names:
+                    placeholders[f"{kind}.{name}.{key}"] = names
+
+    content = json.dumps({"agents": agents, "tasks": tasks}, sort_keys=True, ensure_ascii=False)
+    version = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+    return CrewConfig(crew=crew, version=version, agents=agents, tasks=tasks, placeholders=placeholders)
+
+
+@dataclass
+class _Source:
+    agents_path: Path
+    tasks_path: Path
+    inputs: Tuple[str, ...]
+    stamp: Optional[Tuple] = None  # (mtime_ns, size) of both files at the last load
+    checked: float = 0.0
+
+
+class CrewConfigRegistry:
+    """current CrewConfig of every registered crew, shared by the jobs of a worker process"""
+
+    def __init__(self, reload_seconds: float = CREW_CONFIG_RELOAD_SECONDS):
+        self.reload_seconds = reload_seconds
+        self._sources: Dict[str, _Source] = {}
+        self._configs: Dict[str, CrewConfig] = {}
+        self._lock = threading.Lock()
+
+    def register(self, crew: str, agents_path: Path, tasks_path: Path, inputs: Iterable[str]) -> None:
+        self._sources[crew] = _Source(Path(agents_path), Path(tasks_path), tuple(inputs))
+
+    def get(self, crew: str) -> CrewConfig:
+        """current version of a crew's config, reloaded first when its files changed"""
+        source = self._sources[crew]
+        config = self._configs.get(crew)
+        if config is None or time.monotonic() - source.checked >= self.reload_seconds:
+            with self._lock:
+                self._refresh(crew, source)
+            config = self._configs[crew]
+        return config
+
+    def _refresh(self, crew: str, source: _Source) -> None:
+        source.checked = time.monotonic()
+        try:
+            stats = [path.stat() for path in (source.agents_path, source.tasks_path)]
+            stamp = tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
+        except OSError:
+            stamp = None
+        if crew in self._configs and stamp == source.stamp:
+            return
+        try:
+            config = compile_config(crew, source.agents_path, source.tasks_path, source.inputs)
+        except CrewConfigError:
+            if crew not in self._configs:
+                raise
+            logger.exception(f"Crew {crew} config not reloaded, keeping version {self._configs[crew].version}")
+            source.stamp = stamp  # reported once, not on every check
+            return
+        previous = self._configs.get(crew)
+        source.stamp = stamp
+        # readers see the old or the new dict, never a half-updated one
+        self._configs = {**self._configs, crew: config}
+        if previous is not None and previous.version != config.version:
+            logger.info(f"Crew {crew} config reloaded: version {previous.version} -> {config.version}")
+
+
+@lru_cache(maxsize=None)
+def get_crew_config_registry() -> CrewConfigRegistry:
+    """Get the process-wide crew config registry (singleton per process)"""
+    return CrewConfigRegistry()
+
+
+def crew_config(*inputs: str):
+    """
+    Class decorator over @CrewBase: the crew's agents_config and tasks_config
+    come from the registry rather than from reading its YAML files, and the
+    version it was created with is kept as `crew_config`. `inputs` are the
+    placeholders its templates may use.
+    """
+    def decorate(cls):
+        name = cls._crew_name
+        get_crew_config_registry().register(
+            name, cls.base_directory / cls.original_agents_config_path,
+            cls.base_directory / cls.original_tasks_config_path, inputs
+        )
+
+        def load_configurations(self):
+            self.crew_config = get_crew_config_registry().get(name)
+            self.agents_config = self.crew_config.agents_config()
+            self.tasks_config = self.crew_config.tasks_config()
+
+        cls.load_configurations = load_configurations
+        cls.current_config = staticmethod(lambda: get_crew_config_registry().get(name))
+        return cls
+    return decorate
+
+
+def stamp_job(job_id: str, crew: str, version: str) -> bool:
+    """record the config version a crew of the job ran with, next to its results"""
+    stored = get_task_result(job_id, CREW_CONFIG_TASK)
+    versions = json.loads(stored) if stored else {}
+    versions[crew] = version
+    append_event_by_id(job_id, f"Crew config: {crew} version {version}")
+    return save_task_result(job_id, CREW_CONFIG_TASK, versions)
@@ -1,47 +1,88 @@
+import hashlib
+import json
 import logging
-from crewai import Agent, Crew, Process, Task
+from typing import Any, Dict
+from celery.exceptions import SoftTimeLimitExceeded
+from crewai import Agent, Crew, CrewOutput, LLM, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool
-from src.services.llm.models import MarketStrategy, CampaignDevelopment, ContentProduction
-from src.services.database.job_store import append_event_by_id
+from src.config.settings import AGENT_MAX_TOOL_CALLS, CREW_VERBOSE
+from src.core.tools.cached_search import CachedSerperDevTool
+from src.core.tools.condensed_scrape import CondensedScrapeWebsiteTool
+from src.core.tools.loop_guard import ToolGuard, ToolUsageStats
+from src.services.llm.models import MarketStrategy, CampaignPortfolio, ContentProduction
+from src.services.llm.json_repair import RepairStats, converter_with_stats
+from src.services.llm.model_registry import ModelRegistry
+from src.services.database.job_store import append_event_by_id, get_task_result, save_task_result
+from src.core.crews.fan_out import fan_out
+from src.core.crews.outputs import serialize_crew_output, serialize_task_output
+from src.core.crews.context_budget import apply_context_budget, task_metrics
+from src.core.crews.cleanup import release_crew
+from src.core.crews.config_registry import crew_config, stamp_job
 
 logger = logging.getLogger(__name__)
 
+@crew_config("customer_domain", "project_description")
 @CrewBase
 class ContentCreatorCrew():
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
-    def __init__(self, job_id, llm, input_data):
+    def __init__(self, job_id, models: ModelRegistry, input_data):
         self.job_id = job_id
-        self.llm = llm
+        self.models = models
         self.input_data = input_data
+        # malformed structured answers are repaired locally before crewAI re-asks the LLM
+        self.repair_stats = RepairStats()
+        self.converter_cls = converter_with_stats(self.repair_stats)
+        self.tool_stats = ToolUsageStats()
 
     def append_event_callback(self, task_output):
         append_event_by_id(self.job_id, task_output.raw)
+        save_task_result(self.job_id, task_output.name, serialize_task_output(task_output))
+        finished_task = getattr(self, task_output.name)()
+        append_event_by_id(self.job_id, f"Task metrics: {json.dumps(task_metrics(finished_task))}")
+        # downstream tasks get a condensed copy of this output as their context
+        apply_context_budget(finished_task, task_output)
+
+    def scrape_tool(self) -> CondensedScrapeWebsiteTool:
+        # scraped pages are ranked against the project, not dumped whole into the prompt
+        query = f"{self.input_data['customer_domain']} {self.input_data['project_description']}"
+        return CondensedScrapeWebsiteTool(query=query)
+
+    def agent_tools(self, name: str) -> list:
+        # per-agent tool-call budget and loop detection, max_tool_calls in agents.yaml
+        max_calls = self.agents_config[name].get('max_tool_calls', AGENT_MAX_TOOL_CALLS)
+        return ToolGuard(self.tool_stats, max_calls).wrap([CachedSerperDevTool(), self.scrape_tool()])
+
+    def agent_llm(self, name: str) -> LLM:
+        return self.models.get(self.agents_config[name].get('llm_profile'))
+
+    def task_agent(self, name: str, agent: Agent) -> Agent:
+        # a task's llm_profile takes precedence over its agent's
+        return self.models.for_task(agent, self.tasks_config[name].get('llm_profile'))
 
     @agent
     def chief_marketing_strategist(self) -> Agent:
         return Agent(
             config=self.agents_config['chief_marketing_strategist'],
-            llm=self.llm,
-            tools=[SerperDevTool(), ScrapeWebsiteTool()],
-            verbose=True
+            llm=self.agent_llm('chief_marketing_strategist'),
+            tools=self.agent_tools('chief_marketing_strategist'),
+            verbose=CREW_VERBOSE
         )
 
     @agent
     def creative_director(self) -> Agent:
         return Agent(
             config=self.agents_config['creative_director'],
-            llm=self.llm,
-            verbose=True
+            llm=self.agent_llm('creative_director'),
+            verbose=CREW_VERBOSE
         )
 
     @task
     def project_research_task(self) -> Task:
         return Task(
             config=self.tasks_config['project_research_task'],
-            agent=self.chief_marketing_strategist(),
+            agent=self.task_agent('project_research_task', self.chief_marketing_strategist()),
             callback=self.append_event_callback
         )
 
@@ -49,9 +90,10 @@ class ContentCreatorCrew():
     def marketing_strategy_task(self) -> Task:
         return Task(
             config=self.tasks_config['marketing_strategy_task'],
-            agent=self.chief_marketing_strategist(),
+            agent=self.task_agent('marketing_strategy_task', self.chief_marketing_strategist()),
             callback=self.append_event_callback,
             output_json=MarketStrategy,
+            converter_cls=self.converter_cls,
             context=[self.project_research_task()]
         )
 
@@ -59,29 +101,82 @@ class ContentCreatorCrew():
     def campaign_development_task(self) -> Task:
         return Task(
             config=self.tasks_config['campaign_development_task'],
-            agent=self.creative_director(),
+            agent=self.task_agent('campaign_development_task', self.creative_director()),
             callback=self.append_event_callback,
-            output_json=CampaignDevelopment,
+            output_json=CampaignPortfolio,
+            converter_cls=self.converter_cls,
             context=[self.marketing_strategy_task()]
         )
 
-    @task
     def content_production_task(self) -> Task:
+        # not a crew task: one instance per campaign concept, run by the fan-out stage.
+        # Each gets its own agent copy, agents keep per-execution state.
+        production_agent = self.task_agent('content_production_task', self.creative_director()).copy()
+        production_agent.crew = None  # copy() turns the crew into a plain dict
+        production_agent.verbose = False  # the console live display is not thread-safe
         return Task(
             config=self.tasks_config['content_production_task'],
-            agent=self.creative_director(),
-            callback=self.append_event_callback,
+            name='content_production_task',
+            agent=production_agent,
             output_json=ContentProduction,
-            context=[self.campaign_development_task()]
+            converter_cls=self.converter_cls
         )
 
+    def produce_content(self, index: int, campaign: Dict[str, Any]) -> Dict[str, Any]:
+        """copy for one campaign concept, persisted as its own task result"""
+        # keyed by the concept itself: a phase retry develops new campaigns, only identical ones reuse their copy
+        digest = hashlib.sha1(json.dumps(campaign, sort_keys=True).encode()).hexdigest()[:12]
+        unit = f"content_production_task[{digest}]"
+        stored = get_task_result(self.job_id, unit)
+        if stored:
+            # produced by an earlier attempt of this job
+            return json.loads(stored)
+
+        production_task = self.content_production_task()
+        production_task.interpolate_inputs_and_add_conversation_history(self.input_data)
+        output = production_task.execute_sync(
+            agent=production_task.agent,
+            context=f"Campaign concept:\n{json.dumps(campaign, ensure_ascii=False)}"
+        )
+        append_event_by_id(self.job_id, output.raw)
+        data = serialize_task_output(output)
+        if "raw" in data:
+            raise ValueError(f"no valid ContentProduction for campaign {index + 1}")
+        save_task_result(self.job_id, unit, data)
+        return data
+
+    def produce_contents(self, crew_output: CrewOutput) -> Dict[str, Any]:
+        """
+        Map-reduce over the campaign concepts: copy for each campaign is written in
+        parallel under LLM_MAX_CONCURRENCY and merged into a list of ContentProduction.
+        A campaign still failing after its unit retries fails the phase, a completed
+        job has content for every campaign.
+        """
+        campaign_output = crew_output.tasks_output[-1]
+        portfolio = serialize_task_output(campaign_output)
+        # an answer that couldn't be structured is written up as a single concept
+        campaigns = portfolio.get("campaigns") or [{"description": campaign_output.raw}]
+        append_event_by_id(self.job_id, f"Producing content for {len(campaigns)} campaigns")
+
+        results = fan_out(campaigns, self.produce_content)
+        failed = [result for result in results if result.error]
+        append_event_by_id(self.job_id, f"Content produced for {len(results) - len(failed)}/{len(campaigns)} campaigns")
+        if failed:
+            # retried as a whole phase, units of campaigns that come out unchanged are reused
+            raise ValueError(
+                f"no content for campaign {failed[0].index + 1} of {len(campaigns)}: {failed[0].error}"
+            )
+        production = {"contents": [result.data for result in results]}
+        save_task_result(self.job_id, "content_production_task", production)
+        return production
+
     @crew
     def crew(self) -> Crew:
         return Crew(
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
-            verbose=True
+            verbose=CREW_VERBOSE
         )
 
     def kickoff(self):
@@ -91,11 +186,25 @@ class ContentCreatorCrew():
             return "Error: ContentCreatorCrew not initialized"
 
         append_event_by_id(self.job_id, "ContentCreatorCrew execution started")
+        stamp_job(self.job_id, self.crew_config.crew, self.crew_config.version)
         try:
-            results = self.crew().kickoff(inputs = self.input_data)
+            crew_output = self.crew().kickoff(inputs = self.input_data)
+            production = self.produce_contents(crew_output)
+            results = serialize_crew_output(crew_output)
+            results["tasks"]["content_production_task"] = production
+            results["output"] = production
             append_event_by_id(self.job_id, "ContentCreatorCrew execution completed")
+            append_event_by_id(self.job_id, f"Output repair stats: {json.dumps(self.repair_stats.snapshot())}")
             return results
+        except SoftTimeLimitExceeded:
+            # not a crew error: the phase ran out of time, the task marks the job TIMEOUT
+            append_event_by_id(self.job_id, "ContentCreatorCrew stopped, the phase time limit was reached")
+            raise
         except Exception as e:
             append_event_by_id(self.job_id, f"ContentCreatorCrew execution error: {str(e)}")
             logger.error(f"ContentCreatorCrew execution error: {str(e)}")
-            return "Error: {}".format(str(e))
\ No newline at end of file
+            return "Error: {}".format(str(e))
+        finally:
+            append_event_by_id(self.job_id, f"Tool usage stats: {json.dumps(self.tool_stats.snapshot())}")
+            # crewAI would keep this crew's agents and tasks alive for the life of the worker
+            release_crew(self)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+import logging
+import re
+
+from collections import Counter
+from typing import Any, Dict
+from crewai import Task, TaskOutput
+from src.config.settings import CONTEXT_TOKEN_BUDGET, CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-zA-Z][a-zA-Z0-9'-]{2,}")
+_STOPWORDS = frozenset(
+    "the and for with that this from are was were will into their them they our your you has have "
+    "had not but can all any its also more most such than then there these those which while who "
+    "what when where how each other been being about over under between".split()
+)
+
+def estimate_tokens(text: str) -> int:
+    """cheap prompt-token estimate, avoids loading a tokenizer per call"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+def condense_text(text: str, max_tokens: int) -> str:
+    """
+    Extractive condensation: keep the highest scoring sentences (content-word
+    frequency, Luhn style) in their original order until the budget is used.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text) if sentence.strip()]
+    frequencies = Counter(
+        word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS
+    )
+
+    def score(sentence: str) -> float:
+        words = [word for word in _WORD.findall(sentence.lower()) if word not in _STOPWORDS]
+        return sum(frequencies[word] for word in words) / (len(words) + 1) if words else 0.0
+
+    ranked = sorted(range(len(sentences)), key=lambda index: score(sentences[index]), reverse=True)
+    selected, used = set(), 0
+    for index in ranked:
+        cost = estimate_tokens(sentences[index]) + 1
+        if used + cost > max_tokens:
+            continue
+        selected.add(index)
+        used += cost
+    return "\n".join(sentences[index] for index in sorted(selected))
+
+def project_structured(data: Dict[str, Any], max_tokens: int) -> str:
+    """
+    Structured-field projection for output_json results: compact JSON without
+    empty fields, long strings shortened until the document fits the budget.
+    """
+    data = {key: value for key, value in data.items() if value not in ("", [], None)}
+    document = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    limit = max(max_tokens * CHARS_PER_TOKEN // max(len(data), 1), 40)
+    while estimate_tokens(document) > max_tokens and limit >= 40:
+        data = {key: _shorten(value, limit) for key, value in data.items()}
+        document = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        limit //= 2
+    return document
+
+def _shorten(value: Any, limit: int) -> Any:
+    if isinstance(value, str) and len(value) > limit:
+        return value[:limit].rsplit(" ", 1)[0] + "..."
+    if isinstance(value, list):
+        return [_shorten(item, limit) for item in value]
+    return value
+
+def apply_context_budget(task: Task, task_output: TaskOutput, max_tokens: int = CONTEXT_TOKEN_BUDGET) -> int:
+    """
+    Make downstream `context=[task]` consumers see a condensed copy of this
+    task's output. The original output (returned by the crew and persisted)
+    is left untouched. Returns the token estimate downstream tasks will see.
+    """
+    tokens = estimate_tokens(task_output.raw)
+    if max_tokens <= 0 or tokens <= max_tokens:
+        return tokens
+    if task_output.json_dict:
+        condensed = project_structured(task_output.json_dict, max_tokens)
+    else:
+        condensed = condense_text(task_output.raw, max_tokens)
+    task.output = task_output.model_copy(update={"raw": condensed})
+    logger.info(f"Condensed {task_output.name} context from ~{tokens} to ~{estimate_tokens(condensed)} tokens")
+    return estimate_tokens(condensed)
+
+def task_metrics(task: Task) -> Dict[str, Any]:
+    """prompt-token estimate and latency of a finished task"""
+    context = task.prompt_context or ""
+    latency = (task.end_time - task.start_time).total_seconds() if task.start_time and task.end_time else None
+    return {
+        "task": task.name,
+        "prompt_tokens": estimate_tokens(task.description + task.expected_output + context),
+        "context_tokens": estimate_tokens(context),
+        "output_tokens": estimate_tokens(task.output.raw) if task.output else 0,
+        "latency_s": round(latency, 3) if latency is not None else None,
+    }
@@ -0,0 +1,45 @@
+import contextvars
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from src.config.settings import LLM_MAX_CONCURRENCY, FAN_OUT_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class UnitResult:
+    """outcome of one fan-out unit"""
+    index: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+def fan_out(units: List[T], run_unit: Callable[[int, T], Dict[str, Any]],
+            max_workers: int = LLM_MAX_CONCURRENCY, attempts: int = FAN_OUT_ATTEMPTS) -> List[UnitResult]:
+    """
+    Map step: run `run_unit(index, unit)` for every unit on at most `max_workers`
+    threads (the LLM concurrency limit). A failing unit is retried on its own up to
+    `attempts` times; the other units are not affected. Results keep unit order.
+    """
+    def run(index: int, unit: T) -> UnitResult:
+        error = None
+        for attempt in range(1, attempts + 1):
+            try:
+                return UnitResult(index=index, data=run_unit(index, unit), attempts=attempt)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Fan-out unit {index} failed (attempt {attempt}/{attempts}): {error}")
+        return UnitResult(index=index, error=error, attempts=attempts)
+
+    if not units:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(units)))) as pool:
+        # units run in the caller's context, e.g. under its trace span
+        futures = [pool.submit(contextvars.copy_context().run, run, index, unit) for index, unit in enumerate(units)]
+        return [future.result() for future in futures]
@@ -1,38 +1,71 @@
+import json
 import logging
-from crewai import Agent, Crew, Process, Task
+from celery.exceptions import SoftTimeLimitExceeded
+from crewai import Agent, Crew, LLM, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool
-from src.services.database.job_store import append_event_by_id
+from src.config.settings import AGENT_MAX_TOOL_CALLS, CREW_VERBOSE
+from src.core.tools.cached_search import CachedSerperDevTool
+from src.core.tools.condensed_scrape import CondensedScrapeWebsiteTool
+from src.core.tools.loop_guard import ToolGuard, ToolUsageStats
+from src.services.llm.model_registry import ModelRegistry
+from src.services.database.job_store import append_event_by_id, save_task_result
+from src.core.crews.outputs import serialize_task_output
+from src.core.crews.context_budget import task_metrics
+from src.core.crews.cleanup import release_crew
+from src.core.crews.config_registry import crew_config, stamp_job
 
 logger = logging.getLogger(__name__)
 
+@crew_config("customer_domain", "project_description", "prior_research")
 @CrewBase
 class MarketAnalystCrew():
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
-    def __init__(self, job_id, llm, input_data):
+    def __init__(self, job_id, models: ModelRegistry, input_data):
         self.job_id = job_id
-        self.llm = llm
+        self.models = models
         self.input_data = input_data
+        self.tool_stats = ToolUsageStats()
 
     def append_event_callback(self, task_output):
         # print("Callback called: %s", task_output)
         append_event_by_id(self.job_id, task_output.raw)
+        save_task_result(self.job_id, task_output.name, serialize_task_output(task_output))
+        finished_task = getattr(self, task_output.name)()
+        append_event_by_id(self.job_id, f"Task metrics: {json.dumps(task_metrics(finished_task))}")
+
+    def scrape_tool(self) -> CondensedScrapeWebsiteTool:
+        # scraped pages are ranked against the project, not dumped whole into the prompt
+        query = f"{self.input_data['customer_domain']} {self.input_data['project_description']}"
+        return CondensedScrapeWebsiteTool(query=query)
+
+    def agent_tools(self, name: str) -> list:
+        # per-agent tool-call budget and loop detection, max_tool_calls in agents.yaml
+        max_calls = self.agents_config[name].get('max_tool_calls', AGENT_MAX_TOOL_CALLS)
+        return ToolGuard(self.tool_stats, max_calls).wrap([CachedSerperDevTool(), self.scrape_tool()])
+
+    def agent_llm(self, name: str) -> LLM:
+        return self.models.get(self.agents_config[name].get('llm_profile'))
+
+    def task_agent(self, name: str, agent: Agent) -> Agent:
+        # a task's llm_profile takes precedence over its agent's
+        return self.models.for_task(agent, self.tasks_config[name].get('llm_profile'))
 
     @agent
     def lead_market_analyst(self) -> Agent:
         return Agent(
             config=self.agents_config['lead_market_analyst'],
-            verbose=True,
-            llm=self.llm,
-            tools=[SerperDevTool(), ScrapeWebsiteTool()],
+            verbose=CREW_VERBOSE,
+            llm=self.agent_llm('lead_market_analyst'),
+            tools=self.agent_tools('lead_market_analyst'),
         )
 
     @task
     def research_task(self) -> Task:
         return Task(
             config=self.tasks_config['research_task'],
+            agent=self.task_agent('research_task', self.lead_market_analyst()),
             callback=self.append_event_callback,
         )
 
@@ -42,7 +75,7 @@ class MarketAnalystCrew():
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
-            verbose=True
+            verbose=CREW_VERBOSE
         )
 
     def kickoff(self):
@@ -52,14 +85,23 @@ class MarketAnalystCrew():
             return "Error: MarketAnalystCrew not initialized"
         
         append_event_by_id(self.job_id, "MarketAnalystCrew's Task Started")
+        stamp_job(self.job_id, self.crew_config.crew, self.crew_config.version)
         try:
             results = self.crew().kickoff(inputs=self.input_data)
             append_event_by_id(self.job_id, "MarketAnalystCrew's Task Complete")
 
             return results
+        except SoftTimeLimitExceeded:
+            # not a crew error: the phase ran out of time, the task marks the job TIMEOUT
+            append_event_by_id(self.job_id, "MarketAnalystCrew stopped, the phase time limit was reached")
+            raise
         except Exception as e:
             append_event_by_id(self.job_id, f"An error occurred: {e}")
             logger.error("Error: {}".format(str(e)))
             return "Error: {}".format(str(e))
+        finally:
+            append_event_by_id(self.job_id, f"Tool usage stats: {json.dumps(self.tool_stats.snapshot())}")
+            # crewAI would keep this crew's agents and tasks alive for the life of the worker
+            release_crew(self)
         
 
@@ -0,0 +1,33 @@
+import logging
+
+from typing import Any, Dict
+from pydantic import ValidationError
+from crewai import CrewOutput, TaskOutput
+from src.services.llm.models import TASK_OUTPUT_MODELS
+
+logger = logging.getLogger(__name__)
+
+def serialize_task_output(task_output: TaskOutput) -> Dict[str, Any]:
+    """
+    Convert a task output to a JSON-serializable dict, validated once against
+    the task's output_json model. Unstructured outputs are kept as {"raw": ...}.
+    """
+    model = TASK_OUTPUT_MODELS.get(task_output.name)
+    data = task_output.to_dict()
+    if model is None or not data:
+        return {"raw": task_output.raw}
+    try:
+        return model.model_validate(data).model_dump(mode="json")
+    except ValidationError as e:
+        logger.warning(f"Output of {task_output.name} failed validation: {e.error_count()} errors")
+        errors = [{"loc": list(error["loc"]), "msg": error["msg"]} for error in e.errors()]
+        return {"raw": task_output.raw, "validation_errors": errors}
+
+def serialize_crew_output(crew_output: CrewOutput) -> Dict[str, Any]:
+    """Structured job result: the final task output plus every task output by name"""
+    tasks = {
+        task_output.name or f"task_{index}": serialize_task_output(task_output)
+        for index, task_output in enumerate(crew_output.tasks_output)
+    }
+    final = serialize_task_output(crew_output.tasks_output[-1]) if crew_output.tasks_output else {"raw": crew_output.raw}
+    return {"output": final, "tasks": tasks}
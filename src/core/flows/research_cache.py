@@ -0,0 +1,54 @@
+import logging
+import re
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from src.config.settings import CONTEXT_TOKEN_BUDGET, RESEARCH_FRESH_HOURS, RESEARCH_MAX_AGE_HOURS
+from src.core.crews.context_budget import condense_text
+from src.services.database.job_schemas import ResearchEntry
+
+logger = logging.getLogger(__name__)
+
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://")
+NO_PRIOR_RESEARCH = "No previous research on this client."
+
+
+def normalize_domain(domain: str) -> str:
+    """research key of a customer_domain: host only, lowercase, no scheme, www., port or path"""
+    host = _SCHEME.sub("", domain.strip().lower())
+    host = re.split(r"[/?#]", host, 1)[0].rsplit("@", 1)[-1].split(":", 1)[0].rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+def research_age_hours(entry: ResearchEntry, now: Optional[datetime] = None) -> float:
+    created_at = datetime.strptime(entry.created_at, '%Y-%m-%d %H:%M:%S')
+    return ((now or datetime.now()) - created_at).total_seconds() / 3600
+
+
+def research_freshness(entry: Optional[ResearchEntry], refresh: bool = False,
+                       now: Optional[datetime] = None, config_version: Optional[str] = None) -> str:
+    """
+    What to do with the stored research of a domain:
+    "fresh" reuse it as is, "stale" run the crew again with it as a starting point,
+    "miss" research from scratch (none stored, too old, or refresh asked for).
+    Research made with another `config_version` of the crew's prompts is at most stale.
+    """
+    if entry is None or refresh:
+        return "miss"
+    age = research_age_hours(entry, now)
+    outdated = config_version is not None and entry.data.get("config_version") != config_version
+    if age < RESEARCH_FRESH_HOURS and not outdated:
+        return "fresh"
+    if age < RESEARCH_MAX_AGE_HOURS:
+        return "stale"
+    return "miss"
+
+
+def prior_research_prompt(entry: ResearchEntry, max_tokens: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """condensed report of a stale entry, for the research task to update instead of redo"""
+    output: Dict[str, Any] = entry.data.get("output") or {}
+    report = output.get("raw") or ""
+    return (
+        f"Research from {entry.created_at} is available, verify and update it rather than "
+        f"starting over:\n{condense_text(report, max_tokens)}"
+    )
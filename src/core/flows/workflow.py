@@ -1,32 +1,62 @@
-from crewai import LLM
+from crewai import CrewOutput
 from crewai.flow.flow import Flow, listen, start
 
 from src.core.crews.content_creator.content_creator import ContentCreatorCrew
 from src.core.crews.market_analyst.market_analyst import MarketAnalystCrew
+from src.core.crews.config_registry import stamp_job
+from src.core.crews.outputs import serialize_crew_output
+from src.core.flows.research_cache import NO_PRIOR_RESEARCH, normalize_domain, prior_research_prompt, research_freshness
+from src.services.database.job_store import (
+    append_event_by_id, get_research, record_research_hit, save_research, save_task_result
+)
+from src.services.llm.model_registry import ModelRegistry
 
 class Workflow(Flow):
     """market analysis pipeline."""
-    def __init__(self, job_id: str, llm: LLM, input_data):
+    def __init__(self, job_id: str, models: ModelRegistry, input_data):
         super().__init__()
         self.job_id = job_id
-        self.llm = llm
+        self.models = models
         self.input_data = input_data
 
     @start()
     def analyze_market_crew(self):
-        """Execute market analysis phase"""
-        return MarketAnalystCrew(
+        """Execute market analysis phase, reusing recent research of the same customer domain"""
+        domain = normalize_domain(self.input_data["customer_domain"])
+        entry = get_research(domain)
+        freshness = research_freshness(
+            entry, refresh=bool(self.input_data.get("refresh_research")),
+            config_version=MarketAnalystCrew.current_config().version
+        )
+        if freshness == "fresh":
+            record_research_hit(domain)
+            stamp_job(self.job_id, MarketAnalystCrew.current_config().crew, entry.data["config_version"])
+            for task, data in entry.data.get("tasks", {}).items():
+                save_task_result(self.job_id, task, data)
+            append_event_by_id(self.job_id, f"Reusing market research of {domain} from {entry.created_at}")
+            return entry.data
+
+        prior_research = NO_PRIOR_RESEARCH
+        if freshness == "stale":
+            prior_research = prior_research_prompt(entry)
+            append_event_by_id(self.job_id, f"Refreshing market research of {domain} from {entry.created_at}")
+        crew = MarketAnalystCrew(
             job_id=self.job_id,
-            llm=self.llm,
-            input_data=self.input_data
-        ).kickoff()
+            models=self.models,
+            input_data={**self.input_data, "prior_research": prior_research}
+        )
+        results = crew.kickoff()
+        # kickoff reports failures as an error string, those are never reused
+        if isinstance(results, CrewOutput):
+            # research is keyed by the prompts that made it, see research_freshness
+            save_research(domain, {**serialize_crew_output(results), "config_version": crew.crew_config.version})
+        return results
 
     @listen(analyze_market_crew)
     def create_content_crew(self):
         """Execute market analysis phase after market analysis phase is completed"""
         return ContentCreatorCrew(
             job_id=self.job_id,
-            llm=self.llm,
+            models=self.models,
             input_data=self.input_data
         ).kickoff()
-
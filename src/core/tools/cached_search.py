@@ -0,0 +1,25 @@
+import json
+import logging
+
+from crewai_tools import SerperDevTool
+from src.services.database.job_store import get_tool_result, save_tool_result
+from .tool_cache import search_key
+
+logger = logging.getLogger(__name__)
+
+
+class CachedSerperDevTool(SerperDevTool):
+    """
+    SerperDevTool answering from the shared tool cache, which the prefetch task
+    fills while the job waits in the queue and every worker's searches refresh.
+    """
+
+    def _make_api_request(self, search_query: str, search_type: str) -> dict:
+        key = search_key(search_query, search_type, self.n_results)
+        cached = get_tool_result(key)
+        if cached is not None:
+            logger.info(f"Tool cache hit for search {search_query!r}")
+            return json.loads(cached)
+        results = super()._make_api_request(search_query, search_type)
+        save_tool_result(key, json.dumps(results))
+        return results
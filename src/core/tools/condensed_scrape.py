@@ -0,0 +1,38 @@
+import logging
+
+from typing import Any, Set
+from pydantic import PrivateAttr
+from crewai_tools import ScrapeWebsiteTool
+from src.config.settings import SCRAPE_TOP_K, SCRAPE_TOKEN_CAP
+from src.core.crews.context_budget import estimate_tokens
+from .page_condenser import condense_page
+from .tool_cache import fetch_page
+
+logger = logging.getLogger(__name__)
+
+
+class CondensedScrapeWebsiteTool(ScrapeWebsiteTool):
+    """
+    ScrapeWebsiteTool that returns only the passages of a page relevant to the
+    project instead of the whole page text: boilerplate is stripped, blocks
+    already seen on earlier pages are dropped, and the remaining passages are
+    ranked with BM25 against `query` and capped at `max_tokens`.
+    """
+    description: str = (
+        "A tool that can be used to read a website content. "
+        "Returns the passages of the page most relevant to the current project."
+    )
+    query: str = ""
+    top_k: int = SCRAPE_TOP_K
+    max_tokens: int = SCRAPE_TOKEN_CAP
+    _seen_blocks: Set[str] = PrivateAttr(default_factory=set)
+
+    def _run(self, **kwargs: Any) -> Any:
+        website_url = kwargs.get("website_url", self.website_url)
+        html = fetch_page(website_url, headers=self.headers, cookies=self.cookies)
+
+        condensed = condense_page(html, self.query, self.top_k, self.max_tokens, self._seen_blocks)
+        logger.info(
+            f"Condensed {website_url}: {len(html)} bytes of HTML -> ~{estimate_tokens(condensed)} tokens"
+        )
+        return condensed or "No relevant content found on this page."
@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+
+from typing import Any, Dict, List
+from pydantic import PrivateAttr
+from crewai.tools import BaseTool
+from src.config.settings import AGENT_MAX_TOOL_CALLS, TOOL_REPEAT_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+class ToolUsageStats:
+    """thread-safe per-job counters of tool calls and of the iterations wasted by loops"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"tool_calls": 0, "repeated_calls": 0, "over_budget_calls": 0}
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._counts)
+        counts["wasted_iterations"] = counts["repeated_calls"] + counts["over_budget_calls"]
+        return counts
+
+
+class ToolGuard:
+    """
+    Tool-call budget and loop detector shared by the tools of one agent.
+
+    Identical calls (same tool, same normalized arguments) are answered from the
+    first result instead of running the tool again; after TOOL_REPEAT_LIMIT repeats,
+    or once `max_calls` real calls were made, the agent is told to give its final answer.
+    """
+
+    def __init__(self, stats: ToolUsageStats, max_calls: int = AGENT_MAX_TOOL_CALLS,
+                 repeat_limit: int = TOOL_REPEAT_LIMIT):
+        self.stats = stats
+        self.max_calls = max_calls
+        self.repeat_limit = repeat_limit
+        self._lock = threading.Lock()
+        self._results: Dict[str, Any] = {}
+        self._repeats: Dict[str, int] = {}
+        self._calls = 0
+
+    @staticmethod
+    def signature(tool_name: str, arguments: Dict[str, Any]) -> str:
+        normalized = {
+            key: " ".join(value.lower().split()) if isinstance(value, str) else value
+            for key, value in arguments.items()
+        }
+        return f"{tool_name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+    def call(self, tool: BaseTool, arguments: Dict[str, Any]) -> Any:
+        key = self.signature(tool.name, arguments)
+        with self._lock:
+            if key in self._results:
+                self._repeats[key] = self._repeats.get(key, 0) + 1
+                repeats = self._repeats[key]
+                self.stats.record("repeated_calls")
+                logger.warning(f"Repeated call to {tool.name} ({repeats}x): {key}")
+                if repeats >= self.repeat_limit:
+                    return (
+                        f"{self._results[key]}\n\nYou have called {tool.name} with this exact input "
+                        f"{repeats + 1} times. Do not use any tool again, give your Final Answer now."
+                    )
+                return f"{self._results[key]}\n\n(Cached: you already called {tool.name} with this input.)"
+            if self._calls >= self.max_calls:
+                self.stats.record("over_budget_calls")
+                logger.warning(f"Tool call budget of {self.max_calls} used up, refused {tool.name}")
+                return (
+                    f"Tool call budget of {self.max_calls} calls is used up. "
+                    "Give your Final Answer now using the information you already have."
+                )
+            self._calls += 1
+        self.stats.record("tool_calls")
+
+        result = tool.run(**arguments)
+        with self._lock:
+            self._results[key] = result
+        return result
+
+    def wrap(self, tools: List[BaseTool]) -> List[BaseTool]:
+        return [GuardedTool.wrap(tool, self) for tool in tools]
+
+
+class GuardedTool(BaseTool):
+    """Delegates to a wrapped tool through a ToolGuard, keeping its name and args schema"""
+    _tool: BaseTool = PrivateAttr()
+    _guard: ToolGuard = PrivateAttr()
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, guard: ToolGuard) -> "GuardedTool":
+        # crewAI's own tool cache would answer repeats before the guard could count them
+        guarded = cls(name=tool.name, description="", args_schema=tool.args_schema,
+                      cache_function=lambda _args=None, _result=None: False)
+        guarded.description = tool.description
+        guarded._tool, guarded._guard = tool, guard
+        return guarded
+
+    def _run(self, **kwargs: Any) -> Any:
+        return self._guard.call(self._tool, kwargs)
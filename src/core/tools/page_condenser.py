@@ -0,0 +1,144 @@
+import hashlib
+import math
+import re
+
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, Set
+from bs4 import BeautifulSoup
+from src.core.crews.context_budget import estimate_tokens
+
+# elements that never carry page content
+_DROP_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "form", "nav", "header", "footer", "aside"]
+# class/id words of navigation, banners and other boilerplate containers, matched against the
+# words of each class name ("site-footer", "cookie_banner"), not as substrings ("shared", "subheader")
+_BOILERPLATE_WORDS = {
+    "nav", "navbar", "navigation", "menu", "footer", "header", "cookie", "cookies", "consent", "banner", "sidebar",
+    "breadcrumb", "breadcrumbs", "share", "sharing", "social", "subscribe", "newsletter", "advert", "advertisement",
+    "ads", "promo", "popup", "modal",
+}
+# state modifiers describe the page, not the element: "has-sidebar", "is-menu-open"
+_STATE_PREFIXES = {"has", "is", "with", "no", "show", "hide"}
+# the page's content containers, dropping them by a hint would drop the page
+_CONTENT_TAGS = {"html", "body", "main", "article"}
+_BLOCK_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "blockquote", "pre", "tr", "dd", "figcaption"]
+_TOKEN = re.compile(r"[a-z0-9]+")
+_MIN_BLOCK_CHARS = 40
+
+
+def _is_boilerplate(element) -> bool:
+    if element.name in _CONTENT_TAGS:
+        return False
+    for hint in [*element.get("class", []), element.get("id") or ""]:
+        words = re.split(r"[-_\s]+", hint.lower())
+        if words[0] not in _STATE_PREFIXES and _BOILERPLATE_WORDS.intersection(words):
+            return True
+    return False
+
+
+def extract_blocks(html: str) -> Iterator[str]:
+    """Stage 1: boilerplate removal, yields the text of content blocks in document order"""
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(_DROP_TAGS):
+        element.decompose()
+    for element in soup.find_all(True):
+        if not element.decomposed and _is_boilerplate(element):
+            element.decompose()
+
+    for block in soup.find_all(_BLOCK_TAGS + ["div"]):
+        # nested blocks (li > p) are emitted by the innermost element only
+        if block.find(_BLOCK_TAGS):
+            continue
+        # text set straight in <div>s (no <p>) comes from the innermost divs outside any block
+        if block.name == "div" and (block.find("div") or block.find_parent(_BLOCK_TAGS)):
+            continue
+        text = " ".join(block.get_text(" ").split())
+        if not text:
+            continue
+        # headings and table rows are short by nature
+        is_short_block = block.name == "tr" or (block.name[0] == "h" and block.name[1:].isdigit())
+        if not is_short_block and len(text) < _MIN_BLOCK_CHARS:
+            continue
+        # link lists (related articles, tag clouds) are mostly anchor text
+        link_chars = sum(len(link.get_text(" ").strip()) for link in block.find_all("a"))
+        if link_chars > 0.5 * len(text):
+            continue
+        yield text
+
+
+def dedup_blocks(blocks: Iterable[str], seen: Set[str]) -> Iterator[str]:
+    """Stage 2: drop blocks already emitted on this or earlier pages (shared `seen` set)"""
+    for block in blocks:
+        digest = hashlib.sha1(" ".join(_TOKEN.findall(block.lower())).encode()).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        yield block
+
+
+def chunk_blocks(blocks: Iterable[str], chunk_tokens: int = 120) -> Iterator[str]:
+    """Stage 3: merge consecutive blocks into passages of roughly `chunk_tokens`"""
+    passage, size = [], 0
+    for block in blocks:
+        tokens = estimate_tokens(block)
+        if passage and size + tokens > chunk_tokens:
+            yield "\n".join(passage)
+            passage, size = [], 0
+        passage.append(block)
+        size += tokens
+    if passage:
+        yield "\n".join(passage)
+
+
+class BM25:
+    """Okapi BM25 over an in-memory list of passages"""
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.documents = [Counter(_TOKEN.findall(passage.lower())) for passage in passages]
+        self.lengths = [sum(document.values()) for document in self.documents]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        frequencies = Counter(term for document in self.documents for term in document)
+        count = len(self.documents)
+        self.idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in frequencies.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        terms = set(_TOKEN.findall(query.lower()))
+        results = []
+        for document, length in zip(self.documents, self.lengths):
+            score = 0.0
+            for term in terms:
+                frequency = document.get(term)
+                if not frequency:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            results.append(score)
+        return results
+
+
+def select_passages(passages: List[str], query: str, top_k: int, max_tokens: int) -> List[str]:
+    """Stage 4: top-k passages by BM25 within the token cap, returned in document order"""
+    if not passages:
+        return []
+    scores = BM25(passages).scores(query)
+    ranked = sorted(range(len(passages)), key=lambda index: scores[index], reverse=True)
+    selected, used = [], 0
+    for index in ranked:
+        if len(selected) == top_k:
+            break
+        cost = estimate_tokens(passages[index])
+        if used + cost > max_tokens:
+            continue
+        selected.append(index)
+        used += cost
+    return [passages[index] for index in sorted(selected)]
+
+
+def condense_page(html: str, query: str, top_k: int, max_tokens: int, seen: Optional[Set[str]] = None) -> str:
+    """Run the full pipeline on one page"""
+    blocks = dedup_blocks(extract_blocks(html), seen if seen is not None else set())
+    passages = list(chunk_blocks(blocks))
+    return "\n\n".join(select_passages(passages, query, top_k, max_tokens))
@@ -0,0 +1,52 @@
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from src.config.settings import PREFETCH_QUERIES, PREFETCH_PAGES
+from .cached_search import CachedSerperDevTool
+from .tool_cache import fetch_page
+
+logger = logging.getLogger(__name__)
+
+
+def prefetch_research(customer_domain: str, queries: List[str] = PREFETCH_QUERIES,
+                      pages: int = PREFETCH_PAGES, max_workers: int = 4) -> Dict[str, int]:
+    """
+    Run the predictable searches of a job and fetch their top result pages into
+    the shared tool cache, so the research agent's first tool calls are cache hits.
+    Failures are logged and counted, the agent simply fetches those itself.
+    """
+    search = CachedSerperDevTool()
+    counts = {"queries": 0, "pages": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def count(outcome: str) -> None:
+        with lock:
+            counts[outcome] += 1
+
+    def run_search(query: str) -> List[str]:
+        try:
+            results = search.run(search_query=query)
+        except Exception as e:
+            logger.warning(f"Prefetch search {query!r} failed: {e}")
+            count("errors")
+            return []
+        count("queries")
+        return [result["link"] for result in results.get("organic", [])[:pages] if result.get("link")]
+
+    def run_fetch(url: str) -> None:
+        try:
+            fetch_page(url)
+        except Exception as e:
+            logger.warning(f"Prefetch of {url} failed: {e}")
+            count("errors")
+            return
+        count("pages")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        found = executor.map(run_search, [query.format(customer_domain=customer_domain) for query in queries])
+        urls = list(dict.fromkeys(url for links in found for url in links))
+        list(executor.map(run_fetch, urls))
+    logger.info(f"Prefetched research of {customer_domain}: {counts}")
+    return counts
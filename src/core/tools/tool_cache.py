@@ -0,0 +1,38 @@
+import hashlib
+import logging
+import requests
+
+from typing import Any, Dict, Optional
+from urllib.parse import urldefrag
+from src.services.database.job_store import get_tool_result, save_tool_result
+
+logger = logging.getLogger(__name__)
+
+def search_key(query: str, search_type: str = "search", n_results: int = 10) -> str:
+    """
+    cache key of a search: only case and whitespace are ignored. Punctuation stays,
+    search operators ("-site:", quoted phrases) change the results.
+    """
+    terms = " ".join(query.lower().split())
+    return "search:" + hashlib.sha1(f"{search_type}:{n_results}:{terms}".encode()).hexdigest()
+
+
+def page_key(url: str) -> str:
+    """cache key of a page, the fragment and a trailing slash don't matter"""
+    url = urldefrag(url.strip())[0].rstrip("/")
+    return "page:" + hashlib.sha1(url.encode()).hexdigest()
+
+
+def fetch_page(url: str, headers: Optional[Dict[str, str]] = None,
+               cookies: Optional[Dict[str, Any]] = None, timeout: int = 15) -> str:
+    """HTML of a page, from the shared tool cache when a worker fetched it recently"""
+    key = page_key(url)
+    cached = get_tool_result(key)
+    if cached is not None:
+        logger.info(f"Tool cache hit for {url}")
+        return cached
+    page = requests.get(url, timeout=timeout, headers=headers, cookies=cookies or {})
+    page.encoding = page.apparent_encoding
+    if page.ok:  # error pages are answered but not cached
+        save_tool_result(key, page.text)
+    return page.text
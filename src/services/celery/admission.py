@@ -0,0 +1,169 @@
+import logging
+import math
+import statistics
+import time
+import redis
+
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Optional
+from src.config.settings import (
+    ADMISSION_REDIS_URL, ADMISSION_MAX_WAIT_SECONDS, ADMISSION_CLIENT_QUOTA,
+    ADMISSION_DEFAULT_SERVICE_SECONDS, ADMISSION_SERVICE_SAMPLES, JOB_MAX_RUN_SECONDS, MARKETFLOW_WORKERS, TASK_TIME_LIMIT
+)
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_wait(queue_depth: int, in_flight: int, workers: int, service_time: float) -> float:
+    """
+    Expected queueing delay of a job submitted now. With every worker busy a slot
+    frees up every service_time / workers seconds on average, and the job has to
+    wait for one slot per job queued ahead of it, plus its own.
+    """
+    ahead = queue_depth + in_flight - workers + 1
+    return max(0, ahead) * service_time / workers
+
+
+@dataclass
+class CapacitySnapshot:
+    workers: int
+    queue_depth: int
+    in_flight: int
+    service_time_s: float
+    estimated_wait_s: float
+    max_wait_s: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class AdmissionDecision:
+    admitted: bool
+    reason: Optional[str] = None  # "capacity" or "client_quota"
+    estimated_wait_s: float = 0.0
+    retry_after_s: int = 0
+
+
+class AdmissionController:
+    """
+    Backpressure on job submission, shared by all API replicas through Redis.
+
+    Jobs are refused when their estimated queueing delay exceeds max_wait
+    (queue depth of the market_flow queue, jobs holding a market_flow slot and the
+    mean time they hold it), or when the client already has client_quota jobs
+    queued or running.
+
+    Keys:
+        {prefix}:inflight           zset   job_id -> start time
+        {prefix}:client:{client}    zset   job_id -> admission time
+        {prefix}:service_times      list   recent job durations in seconds
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, url: str = ADMISSION_REDIS_URL,
+                 queue: str = "market_flow", workers: int = MARKETFLOW_WORKERS,
+                 max_wait: int = ADMISSION_MAX_WAIT_SECONDS, client_quota: int = ADMISSION_CLIENT_QUOTA,
+                 prefix: str = "marketflow:admission"):
+        self.client = client or redis.Redis.from_url(url)
+        self.queue = queue
+        self.workers = workers
+        self.max_wait = max_wait
+        self.client_quota = client_quota
+        self.prefix = prefix
+        # how long a job holds its quota slot at most: its queue wait, then both phases and their retries
+        self.quota_window = max_wait + JOB_MAX_RUN_SECONDS
+
+    def service_time(self) -> float:
+        samples = [float(value) for value in self.client.lrange(f"{self.prefix}:service_times", 0, -1)]
+        return statistics.fmean(samples) if samples else float(ADMISSION_DEFAULT_SERVICE_SECONDS)
+
+    def snapshot(self) -> CapacitySnapshot:
+        # jobs of a killed worker never report back, they stop counting after the time limit
+        self.client.zremrangebyscore(f"{self.prefix}:inflight", 0, time.time() - TASK_TIME_LIMIT)
+        queue_depth = self.client.llen(self.queue)
+        in_flight = self.client.zcard(f"{self.prefix}:inflight")
+        service_time = self.service_time()
+        return CapacitySnapshot(
+            workers=self.workers,
+            queue_depth=queue_depth,
+            in_flight=in_flight,
+            service_time_s=round(service_time, 1),
+            estimated_wait_s=round(estimate_wait(queue_depth, in_flight, self.workers, service_time), 1),
+            max_wait_s=self.max_wait
+        )
+
+    def admit(self, job_id: str, client_id: str) -> AdmissionDecision:
+        """decide on a new job and, when admitted, count it against the client's quota"""
+        try:
+            capacity = self.snapshot()
+            wait = capacity.estimated_wait_s
+            if wait > self.max_wait:
+                # time until enough queued jobs have drained for the wait to fit again
+                retry_after = math.ceil(wait - self.max_wait)
+                logger.warning(f"Job {job_id} refused: estimated wait {wait}s over {self.max_wait}s")
+                return AdmissionDecision(False, "capacity", wait, max(1, retry_after))
+
+            if not self._take_quota(job_id, client_id):
+                # a quota slot frees up when one of the client's jobs completes
+                logger.warning(f"Job {job_id} refused: client {client_id} has {self.client_quota} jobs pending")
+                return AdmissionDecision(False, "client_quota", wait, max(1, math.ceil(capacity.service_time_s)))
+            return AdmissionDecision(True, estimated_wait_s=wait)
+
+        except redis.RedisError as e:
+            # admission is an optimization, never the reason jobs can't be submitted
+            logger.error(f"Redis error in admission of job {job_id}: {str(e)}")
+            return AdmissionDecision(True)
+
+    def _take_quota(self, job_id: str, client_id: str) -> bool:
+        """count the job against the client's quota unless it is used up"""
+        client_key = f"{self.prefix}:client:{client_id}"
+
+        def take(pipe) -> bool:
+            now = time.time()
+            # entries of jobs that never reported back don't count once the job can't be alive anymore,
+            # they are dropped in the same MULTI (a write before it would abort the transaction on our own WATCH)
+            stale_before = now - self.quota_window
+            if pipe.zcount(client_key, f"({stale_before}", "+inf") >= self.client_quota:
+                return False
+            pipe.multi()
+            pipe.zremrangebyscore(client_key, 0, stale_before)
+            pipe.zadd(client_key, {job_id: now})
+            pipe.expire(client_key, self.quota_window)
+            return True
+
+        # WATCH/MULTI: concurrent submissions of a client can't both take its last slot
+        return self.client.transaction(take, client_key, value_from_callable=True)
+
+    def job_started(self, job_id: str) -> None:
+        try:
+            self.client.zadd(f"{self.prefix}:inflight", {job_id: time.time()})
+        except redis.RedisError as e:
+            logger.error(f"Redis error recording start of job {job_id}: {str(e)}")
+
+    def job_finished(self, job_id: str, client_id: Optional[str], duration: float) -> None:
+        """release the job's slot and quota, its duration feeds the service time estimate"""
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zrem(f"{self.prefix}:inflight", job_id)
+            if client_id:
+                pipe.zrem(f"{self.prefix}:client:{client_id}", job_id)
+            pipe.lpush(f"{self.prefix}:service_times", round(duration, 3))
+            pipe.ltrim(f"{self.prefix}:service_times", 0, ADMISSION_SERVICE_SAMPLES - 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Redis error recording end of job {job_id}: {str(e)}")
+
+    def release_client(self, job_id: str, client_id: Optional[str]) -> None:
+        """the job left the pipeline (completed or failed), it no longer counts against the quota"""
+        if not client_id:
+            return
+        try:
+            self.client.zrem(f"{self.prefix}:client:{client_id}", job_id)
+        except redis.RedisError as e:
+            logger.error(f"Redis error releasing job {job_id} of client {client_id}: {str(e)}")
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController()
@@ -1,6 +1,9 @@
 import os
 from src.config.settings import *
 from celery import Celery
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_process_init
+from src.config.logger import setup_logging
+from src.services.celery.memory import TaskMemoryProfiler
 
 app = Celery('market_flow')
 app.conf.update(
@@ -9,17 +12,64 @@ app.conf.update(
     task_serializer='json',
     result_serializer='json',
     accept_content=['json'],
-    task_time_limit=300,
-    # task_soft_time_limit=60,
+    task_time_limit=TASK_TIME_LIMIT,
+    task_soft_time_limit=TASK_SOFT_TIME_LIMIT,
+    # a pool process past the limit finishes its task and is replaced, instead of being OOM-killed mid-job
+    worker_max_memory_per_child=WORKER_MAX_MEMORY_MB * 1024 or None,
     # task_default_retry_delay=60,
     # task_max_retries=3,
     # worker_send_task_events=True,
     # worker_prefetch_multiplier=1,
-    imports=['src.tasks.market_tasks'],
+    imports=['src.tasks.market_tasks', 'src.tasks.prefetch_tasks', 'src.tasks.maintenance_tasks'],
     task_routes={
         'src.tasks.market_tasks.kickoff_flow': {'queue': 'market_flow'},
+        # tool-bound research on I/O oriented workers, generation on LLM-bound ones
+        'src.tasks.market_tasks.research_phase': {'queue': 'market_flow'},
+        'src.tasks.market_tasks.content_phase': {'queue': 'content_generation'},
+        'src.tasks.prefetch_tasks.prefetch_research': {'queue': 'prefetch'},
+        'src.tasks.maintenance_tasks.purge_expired_jobs': {'queue': 'maintenance'},
+        'src.tasks.maintenance_tasks.flush_event_streams': {'queue': 'maintenance'},
+        'src.tasks.maintenance_tasks.deliver_webhooks': {'queue': 'maintenance'},
+    },
+    beat_schedule={
+        'purge-expired-jobs': {
+            'task': 'src.tasks.maintenance_tasks.purge_expired_jobs',
+            'schedule': RETENTION_INTERVAL_SECONDS,
+        },
+        'flush-event-streams': {
+            'task': 'src.tasks.maintenance_tasks.flush_event_streams',
+            'schedule': EVENT_STREAM_FLUSH_INTERVAL,
+        },
+        'deliver-webhooks': {
+            'task': 'src.tasks.maintenance_tasks.deliver_webhooks',
+            'schedule': WEBHOOK_POLL_INTERVAL,
+            'options': {'expires': WEBHOOK_POLL_INTERVAL},  # runs that queued up behind a slow one are skipped
+        },
     }
 )
+
+@worker_process_init.connect
+def init_worker_logging(**kwargs):
+    # the log writer thread does not survive the fork, each pool process starts its own
+    setup_logging()
+
+memory_profiler = TaskMemoryProfiler()
+
+@task_prerun.connect
+def profile_task_start(task_id=None, **kwargs):
+    memory_profiler.started(task_id)
+
+@task_postrun.connect
+def profile_task_end(task_id=None, task=None, args=None, **kwargs):
+    memory_profiler.record(task_id, task.name, args or ())
+
+if TRACING_ENABLED:
+    # a task's trace context goes in its message headers, the worker continues the trace
+    from src.services.tracing import tracer
+    before_task_publish.connect(tracer.inject_task_headers, weak=False)
+    task_prerun.connect(tracer.start_task_span, weak=False)
+    task_postrun.connect(tracer.end_task_span, weak=False)
+
 # src/tasks/market_tasks.kickoff_flow
 # expose celery_app for import in other modules
 __all__ = ['app']
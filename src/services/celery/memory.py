@@ -0,0 +1,101 @@
+import logging
+import os
+import resource
+import sys
+import tracemalloc
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.config.settings import WORKER_MEMORY_PROFILE, WORKER_MEMORY_TOP
+from src.services.database.job_store import append_event_by_id
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+# tasks taking (job_id, input_data), their memory is recorded with the job's events
+JOB_TASK_PREFIX = "src.tasks.market_tasks."
+# allocations of the profiler itself are not the task's
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> int:
+    """current resident set size of this process, its peak where /proc is missing"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class TaskMemory:
+    rss_before: int
+    rss_after: int
+    heap_delta: Optional[int] = None  # Python allocations left behind, tracemalloc only
+    top: List[Tuple[str, int]] = field(default_factory=list)  # (file:line, bytes) that grew the most
+
+    def describe(self) -> str:
+        text = f"Memory: RSS {self.rss_after / MIB:.1f} MiB ({(self.rss_after - self.rss_before) / MIB:+.1f} MiB)"
+        if self.heap_delta is not None:
+            text += f", Python heap {self.heap_delta / MIB:+.2f} MiB"
+        if self.top:
+            text += ", grew most at " + ", ".join(f"{site} {size / 1024:+.0f} KiB" for site, size in self.top)
+        return text
+
+
+class TaskMemoryProfiler:
+    """
+    Opt-in memory accounting of the tasks of a worker process: RSS before and
+    after each task and, in tracemalloc mode, the Python allocations it left
+    behind by source line. RSS is per process, the numbers are only the task's
+    own with the prefork pool (one task at a time per process).
+    """
+
+    def __init__(self, mode: str = WORKER_MEMORY_PROFILE, top: int = WORKER_MEMORY_TOP):
+        self.mode = mode
+        self.top = top
+        self._started: Dict[str, Tuple[int, Optional[tracemalloc.Snapshot]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("rss", "tracemalloc")
+
+    def started(self, task_id: str) -> None:
+        if not self.enabled:
+            return
+        snapshot = None
+        if self.mode == "tracemalloc":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            snapshot = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+        self._started[task_id] = (rss_bytes(), snapshot)
+
+    def finished(self, task_id: str) -> Optional[TaskMemory]:
+        started = self._started.pop(task_id, None)
+        if started is None:
+            return None
+        rss_before, before = started
+        usage = TaskMemory(rss_before, rss_bytes())
+        if before is not None and tracemalloc.is_tracing():
+            stats = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS).compare_to(before, "lineno")
+            usage.heap_delta = sum(stat.size_diff for stat in stats)
+            usage.top = [
+                (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size_diff)
+                for stat in stats[:self.top] if stat.size_diff > 0
+            ]
+        return usage
+
+    def record(self, task_id: str, task_name: str, args: Sequence) -> Optional[TaskMemory]:
+        """end of a task: log its memory, and add it to the job's events for flow tasks"""
+        usage = self.finished(task_id)
+        if usage is None:
+            return None
+        logger.info(f"Task {task_name}[{task_id}] {usage.describe()}")
+        if task_name.startswith(JOB_TASK_PREFIX) and args:
+            append_event_by_id(args[0], usage.describe())
+        return usage
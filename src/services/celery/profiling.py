@@ -0,0 +1,98 @@
+import json
+import logging
+import sys
+import threading
+import time
+
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+from src.config.settings import PROFILE_INTERVAL_MS, PROFILE_MAX_STACKS
+from src.services.database.job_store import get_task_result, save_task_result
+
+logger = logging.getLogger(__name__)
+
+# task result name of a job's profile, the phases of the job add to it in turn
+PROFILE_TASK = "profile"
+TRUNCATED = "[truncated]"
+_ROOT = str(Path(__file__).resolve().parents[3]) + "/"
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if "site-packages/" in path:
+        path = path.rsplit("site-packages/", 1)[1]
+    elif path.startswith(_ROOT):
+        path = path[len(_ROOT):]
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler for one flow phase. Every `interval_ms` a
+    background thread records the stack of the phase's thread and of the threads
+    started while it runs (fan-out units, tool calls), so time spent waiting on
+    the LLM or on HTTP shows up next to CPU time. Stacks are kept in the collapsed
+    format of flamegraph tools: "outer;inner;innermost" -> samples.
+    """
+
+    def __init__(self, interval_ms: int = PROFILE_INTERVAL_MS, max_stacks: int = PROFILE_MAX_STACKS):
+        self.interval = interval_ms / 1000
+        self.max_stacks = max_stacks
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.wall_s = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ignored = set()
+
+    def __enter__(self) -> "StackSampler":
+        caller = threading.get_ident()
+        self._ignored = {thread.ident for thread in threading.enumerate() if thread.ident != caller}
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.wall_s = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        for ident, frame in sys._current_frames().items():
+            if ident in self._ignored or ident == self._thread.ident:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack = ";".join(reversed(labels))
+            if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                stack = TRUNCATED
+            self.stacks[stack] += 1
+        self.samples += 1
+
+
+def save_profile(job_id: str, phase: str, sampler: StackSampler) -> bool:
+    """add a phase's stacks to the job's profile, each rooted at the phase name"""
+    stored = get_task_result(job_id, PROFILE_TASK)
+    profile = json.loads(stored) if stored else {
+        "format": "collapsed", "interval_ms": round(sampler.interval * 1000), "phases": {}, "stacks": {}
+    }
+    profile["phases"][phase] = {"samples": sampler.samples, "wall_s": round(sampler.wall_s, 3)}
+    stacks = Counter(profile["stacks"])
+    stacks.update({f"{phase};{stack}": count for stack, count in sampler.stacks.items()})
+    profile["stacks"] = dict(stacks)
+    logger.info(f"Job {job_id} phase {phase} profiled: {sampler.samples} samples, {len(sampler.stacks)} stacks")
+    return save_task_result(job_id, PROFILE_TASK, profile)
+
+
+def collapsed_stacks(profile: Dict) -> str:
+    """the profile as flamegraph.pl / speedscope input, heaviest stacks first"""
+    stacks = sorted(profile["stacks"].items(), key=lambda item: item[1], reverse=True)
+    return "".join(f"{stack} {count}\n" for stack, count in stacks)
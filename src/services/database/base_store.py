@@ -0,0 +1,125 @@
+import json
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .job_schemas import Event, Job, JobSummary, ResearchEntry, WebhookDelivery
+
+
+class JobStore(ABC):
+    """Storage backend interface for jobs, their events and task results.
+
+    Every backend must pass the shared conformance suite in
+    tests/test_store_conformance.py.
+    """
+
+    def initialize(self) -> None:
+        """Create tables/indexes if the backend needs them"""
+
+    @abstractmethod
+    def create_job(self, job_id: str) -> bool:
+        """Create a submitted job in QUEUED state, False if it already exists"""
+
+    @abstractmethod
+    def start_job(self, job_id: str) -> bool:
+        """
+        Move a job to RUNNING when a worker picks it up (creating it if needed),
+        False if it already reached a terminal status (e.g. was cancelled)
+        """
+
+    @abstractmethod
+    def append_event(self, job_id: str, event_data: str) -> None:
+        """Record an event, creating the job in STARTED state if needed"""
+
+    @abstractmethod
+    def append_events(self, job_id: str, events: List[Event]) -> None:
+        """Record a batch of already timestamped events, creating the job if needed"""
+
+    @abstractmethod
+    def update_job(self, job_id: str, status: str, result: Union[str, Dict[str, Any]], event_data: List[str],
+                   callback_url: Optional[str] = None) -> bool:
+        """
+        Update job status and result and append events atomically. With a callback_url
+        and a terminal status, a webhook delivery is queued in the same transaction.
+        Jobs in a terminal status are not updated any more (returns False).
+        """
+
+    @abstractmethod
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Job]:
+        """Load a job with its events, None if it does not exist"""
+
+    @abstractmethod
+    def get_jobs(self, job_ids: List[str], include_result: bool = False) -> Dict[str, Job]:
+        """Load many jobs with their events at once, missing ids are left out"""
+
+    @abstractmethod
+    def list_jobs(self, status: Optional[str] = None, since: Optional[str] = None,
+                  after: Optional[Tuple[str, str]] = None, limit: int = 100,
+                  until: Optional[str] = None) -> List[JobSummary]:
+        """
+        Jobs ordered by (updated_at, job_id), optionally of one status and updated in
+        [since, until); `after` is the (updated_at, job_id) of the last job of the previous page
+        """
+
+    @abstractmethod
+    def get_job_result(self, job_id: str) -> Optional[str]:
+        """Load only the job result as a JSON document"""
+
+    @abstractmethod
+    def save_task_result(self, job_id: str, task: str, data: Dict[str, Any]) -> bool:
+        """Persist the structured output of a single crew task"""
+
+    @abstractmethod
+    def get_task_result(self, job_id: str, task: str) -> Optional[str]:
+        """Load the JSON document of a single crew task"""
+
+    @abstractmethod
+    def get_job_version(self, job_id: str) -> Optional[Tuple[str, int]]:
+        """
+        (status, version) of a job without loading it, None if it does not exist.
+        The version grows with every change to the job or its events.
+        """
+
+    @abstractmethod
+    def claim_webhooks(self, limit: int, lease_seconds: int) -> List[WebhookDelivery]:
+        """Due webhook deliveries, leased to the caller so no other worker sends them meanwhile"""
+
+    @abstractmethod
+    def finish_webhook(self, delivery: WebhookDelivery, delivered: bool,
+                       error: Optional[str] = None, retry_at: Optional[float] = None) -> None:
+        """Drop a delivered webhook, reschedule a failed one at retry_at, or keep it as dead without"""
+
+    @abstractmethod
+    def get_research(self, domain: str) -> Optional[ResearchEntry]:
+        """Load the stored market research of a normalized customer domain"""
+
+    @abstractmethod
+    def save_research(self, domain: str, data: Dict[str, Any]) -> bool:
+        """Store (replace) the market research of a domain and count the run"""
+
+    @abstractmethod
+    def record_research_hit(self, domain: str) -> None:
+        """Count a job that reused the stored research of a domain"""
+
+    @abstractmethod
+    def get_research_stats(self) -> Dict[str, int]:
+        """Totals over all domains: domains, hits, runs"""
+
+    @abstractmethod
+    def get_tool_result(self, key: str) -> Optional[str]:
+        """Cached tool result shared by all workers, None if missing or older than TOOL_CACHE_TTL_SECONDS"""
+
+    @abstractmethod
+    def save_tool_result(self, key: str, result: str) -> bool:
+        """Cache a tool result for TOOL_CACHE_TTL_SECONDS"""
+
+    @staticmethod
+    def _serialize_result(result: Union[str, Dict[str, Any]]) -> Tuple[str, str]:
+        """A dict result is serialized once and stored as a JSON document"""
+        if isinstance(result, dict):
+            return json.dumps(result, ensure_ascii=False), "json"
+        return result, "text"
+
+    @staticmethod
+    def _to_json_document(result: str, result_type: Optional[str]) -> str:
+        """Stored results are either JSON documents or plain text"""
+        return result if result_type == "json" else json.dumps(result)
@@ -32,6 +32,8 @@ def get_db_connection(
             # Enable foreign keys and WAL mode
             conn.row_factory = sqlite3.Row
             conn.execute("PRAGMA foreign_keys = ON") # make sure foreign keys are enabled
+            # let retention give freed pages back; existing files are converted by initialize_database
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
             conn.execute("PRAGMA journal_mode = WAL") 
             conn.execute("PRAGMA busy_timeout = 5000")  # 5 seconds timeout
             
@@ -52,15 +54,41 @@ def get_db_connection(
             except sqlite3.Error as e:
                 logger.warning(f"Connection close failed: {e}")
 
-def initialize_database():
+def _ensure_columns(conn: sqlite3.Connection, table: str, columns: dict):
+    """add missing columns to an existing table (lightweight migration)"""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, ddl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+            logger.info(f"Added column {table}.{name}")
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection):
+    """
+    one-time migration: the auto_vacuum pragma only applies to a new database file,
+    a file created without it needs a full VACUUM before incremental_vacuum frees anything
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 0:
+        return
+    logger.info("Converting the database to incremental auto-vacuum, this rewrites the file once")
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+
+def initialize_database(db_path: str = DATABASE_PATH):
     """intialize database tables"""
-    with get_db_connection() as conn:
+    with get_db_connection(db_path) as conn:
         try:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS jobs (
                     job_id TEXT PRIMARY KEY,
                     status TEXT,
-                    result TEXT
+                    result TEXT,
+                    result_ref TEXT REFERENCES blobs(digest),
+                    result_type TEXT DEFAULT 'text',
+                    updated_at DATETIME,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    created_at DATETIME,
+                    started_at DATETIME,
+                    finished_at DATETIME
                 )
             ''')
             conn.execute('''
@@ -69,10 +97,95 @@ def initialize_database():
                     job_id TEXT,
                     timestamp DATETIME,
                     data TEXT,
+                    data_ref TEXT REFERENCES blobs(digest),
+                    FOREIGN KEY (job_id) REFERENCES jobs(job_id)
+                )
+            ''')
+            # large payloads are stored compressed and content-addressed
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    data BLOB NOT NULL
+                )
+            ''')
+            # structured per-task results, stored as validated JSON documents
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS task_results (
+                    job_id TEXT,
+                    task TEXT,
+                    data TEXT,
+                    data_ref TEXT REFERENCES blobs(digest),
+                    PRIMARY KEY (job_id, task),
                     FOREIGN KEY (job_id) REFERENCES jobs(job_id)
                 )
             ''')
+            # market research per normalized customer domain, reused across jobs
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS research (
+                    domain TEXT PRIMARY KEY,
+                    data TEXT,
+                    data_ref TEXT REFERENCES blobs(digest),
+                    created_at DATETIME,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    runs INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            # search results and pages shared by workers, filled ahead of jobs by the prefetch task
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS tool_cache (
+                    key TEXT PRIMARY KEY,
+                    codec TEXT,
+                    data BLOB,
+                    created_at DATETIME
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_cache_created_at ON tool_cache(created_at)")
+            # completion webhooks, written with the final job update and sent by the delivery task;
+            # dead deliveries (attempts used up) stay with next_attempt_at NULL
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS webhook_outbox (
+                    id TEXT PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL,
+                    last_error TEXT,
+                    created_at DATETIME
+                )
+            ''')
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_webhook_outbox_due ON webhook_outbox(next_attempt_at) "
+                "WHERE next_attempt_at IS NOT NULL"
+            )
+            # databases created before out-of-line payloads / structured results
+            _ensure_columns(conn, "jobs", {
+                "result_ref": "TEXT REFERENCES blobs(digest)",
+                "result_type": "TEXT DEFAULT 'text'",
+                "updated_at": "DATETIME",
+                "version": "INTEGER NOT NULL DEFAULT 0",
+                "created_at": "DATETIME",
+                "started_at": "DATETIME",
+                "finished_at": "DATETIME",
+            })
+            _ensure_columns(conn, "events", {"data_ref": "TEXT REFERENCES blobs(digest)"})
+            # retention scans and keyset pagination of job listings, (updated_at, job_id) is the page cursor
+            conn.execute("DROP INDEX IF EXISTS idx_jobs_status_updated")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_updated_job ON jobs(status, updated_at, job_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated_job ON jobs(updated_at, job_id)")
+            # blob reference lookups for retention, partial since most payloads are inline
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_result_ref ON jobs(result_ref) WHERE result_ref IS NOT NULL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_data_ref ON events(data_ref) WHERE data_ref IS NOT NULL")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_task_results_data_ref ON task_results(data_ref) WHERE data_ref IS NOT NULL"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_research_data_ref ON research(data_ref) WHERE data_ref IS NOT NULL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_job_id ON events(job_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_webhook_outbox_job_id ON webhook_outbox(job_id)")
             conn.commit()
+            _enable_incremental_vacuum(conn)
         except sqlite3.Error as error:
             logger.error(f"Error creating tables: {error}")
-            raise sqlite3.DatabaseError(f"Creating tables failed: {error}") from error
\ No newline at end of file
+            raise sqlite3.DatabaseError(f"Creating tables failed: {error}") from error
@@ -0,0 +1,156 @@
+import logging
+import time
+import redis
+
+from datetime import datetime
+from typing import List, Optional
+from uuid import uuid4
+from src.config.settings import EVENT_STREAM_REDIS_URL, EVENT_STREAM_MAXLEN, EVENT_STREAM_TTL
+from .base_store import JobStore
+from .job_schemas import Event
+
+logger = logging.getLogger(__name__)
+
+
+class EventStream:
+    """
+    Write-behind event log on Redis Streams.
+
+    Hot-path appends are a single XADD to a per-job stream instead of a
+    durable-store transaction. flush() moves new entries to the job store in
+    one batch per job and remembers the last persisted entry id, so the
+    stream itself keeps serving recent events to the status API.
+
+        {prefix}:{job_id}          stream  capped at EVENT_STREAM_MAXLEN entries
+        {prefix}:pending           set     jobs with entries not yet persisted
+        {prefix}:offset:{job_id}   string  last persisted entry id
+
+    Stream and offset keys expire EVENT_STREAM_TTL after their last write, so
+    streams that are never discarded (events appended after the final update)
+    don't pile up.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, url: str = EVENT_STREAM_REDIS_URL,
+                 prefix: str = "marketflow:events", maxlen: int = EVENT_STREAM_MAXLEN, ttl: int = EVENT_STREAM_TTL):
+        self.client = client or redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.maxlen = maxlen
+        self.ttl = ttl
+
+    def _stream_key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    def _offset_key(self, job_id: str) -> str:
+        return f"{self.prefix}:offset:{job_id}"
+
+    def _offset(self, job_id: str) -> Optional[bytes]:
+        return self.client.get(self._offset_key(job_id))
+
+    def append(self, job_id: str, event_data: str) -> None:
+        """record event (one round trip, no durable-store write)"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xadd(
+            self._stream_key(job_id),
+            {"timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "data": event_data},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        pipe.expire(self._stream_key(job_id), self.ttl)
+        pipe.sadd(f"{self.prefix}:pending", job_id)
+        pipe.execute()
+
+    def _read(self, job_id: str, after: Optional[bytes]) -> list:
+        start = b"(" + after if after else "-"
+        return self.client.xrange(self._stream_key(job_id), min=start)
+
+    @staticmethod
+    def _to_events(entries: list) -> List[Event]:
+        return [
+            Event(timestamp=fields[b"timestamp"].decode(), data=fields[b"data"].decode("utf-8"))
+            for _, fields in entries
+        ]
+
+    def pending_events(self, job_id: str) -> List[Event]:
+        """events of a job that are in the stream but not yet in the job store"""
+        return self._to_events(self._read(job_id, self._offset(job_id)))
+
+    def last_entry_id(self, job_id: str) -> Optional[str]:
+        """id of the newest stream entry of a job, changes with every append"""
+        entries = self.client.xrevrange(self._stream_key(job_id), count=1)
+        return entries[0][0].decode() if entries else None
+
+    def recent_events(self, job_id: str, count: int = 100) -> List[Event]:
+        """last `count` events of a job, oldest first"""
+        entries = self.client.xrevrange(self._stream_key(job_id), count=count)
+        return self._to_events(list(reversed(entries)))
+
+    def _acquire(self, key: str, token: str, timeout: int, wait: bool) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.client.set(key, token, nx=True, ex=timeout):
+            if not wait or time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _release(self, key: str, token: str) -> None:
+        if self.client.get(key) == token.encode():
+            self.client.delete(key)
+
+    def flush_job(self, store: JobStore, job_id: str, wait: bool = False, lock_timeout: int = 30) -> int:
+        """
+        persist new entries of one job in a single batch, returns the number persisted.
+        A per-job lock keeps concurrent flushers from persisting an entry twice.
+        """
+        lock_key, token = f"{self.prefix}:lock:{job_id}", uuid4().hex
+        if not self._acquire(lock_key, token, lock_timeout, wait):
+            if wait:
+                logger.warning(f"Events of job {job_id} not flushed, its lock was held for {lock_timeout}s")
+            return 0
+        try:
+            # clear the pending flag first, appends racing with this flush set it again
+            self.client.srem(f"{self.prefix}:pending", job_id)
+            entries = self._read(job_id, self._offset(job_id))
+            if not entries:
+                return 0
+            try:
+                store.append_events(job_id, self._to_events(entries))
+            except Exception:
+                self.client.sadd(f"{self.prefix}:pending", job_id)
+                raise
+            self.client.set(self._offset_key(job_id), entries[-1][0], ex=self.ttl)
+            return len(entries)
+        finally:
+            self._release(lock_key, token)
+
+    def flush(self, store: JobStore) -> int:
+        """persist every pending job, jobs being flushed elsewhere are skipped"""
+        persisted = 0
+        for job_id in self.client.smembers(f"{self.prefix}:pending"):
+            persisted += self.flush_job(store, job_id.decode())
+        if persisted:
+            logger.info(f"Persisted {persisted} streamed events")
+        return persisted
+
+    def discard(self, job_id: str) -> None:
+        """
+        drop the persisted entries of a finished job: the whole stream once all are
+        persisted, otherwise only up to the offset, the rest is left for the next flush
+        """
+        key, offset_key = self._stream_key(job_id), self._offset_key(job_id)
+        with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # an append or a flush between the check and the delete aborts and retries
+                    pipe.watch(key, offset_key)
+                    offset = pipe.get(offset_key)
+                    newest = pipe.xrevrange(key, count=1)
+                    pipe.multi()
+                    if newest and newest[0][0] == offset:
+                        pipe.delete(key, offset_key)
+                    elif offset:
+                        pipe.xtrim(key, minid=offset, approximate=False)
+                        pipe.xdel(key, offset)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Optional
 
 @dataclass
 class Event:
@@ -10,7 +10,35 @@ class Event:
 @dataclass 
 class Job:
     status: str
-    result: str
+    result: Optional[str]  # None when loaded without the result
     events: List[Event]
-    # created_at: datetime = datetime.now()
-    # updated_at: datetime = datetime.now()
\ No newline at end of file
+    result_type: str = "text"  # "json" for structured results
+    # lifecycle timestamps, yyyy-MM-dd HH:mm:ss
+    created_at: Optional[str] = None  # submitted
+    started_at: Optional[str] = None  # first picked up by a worker
+    finished_at: Optional[str] = None  # reached a terminal status
+
+@dataclass
+class JobSummary:
+    job_id: str
+    status: str
+    updated_at: str  # yyyy-MM-dd HH:mm:ss of the last status change
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+@dataclass
+class WebhookDelivery:
+    id: str
+    job_id: str
+    status: str  # terminal status the notification is about
+    url: str
+    attempts: int = 0  # failed deliveries so far
+
+@dataclass
+class ResearchEntry:
+    domain: str
+    data: Dict[str, Any]  # serialized market analyst crew output
+    created_at: str  # yyyy-MM-dd HH:mm:ss of the last research run
+    hits: int = 0  # jobs that reused it
+    runs: int = 0  # research runs stored for the domain
@@ -1,153 +1,236 @@
 import logging
-import sqlite3
 
-from datetime import datetime
-from typing import List
-from threading import Lock
-from .job_schemas import Event, Job
-from .connection import get_db_connection
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from src.config.settings import JOB_STORE_BACKEND, EVENT_LOG_BACKEND, EXPORT_CHUNK_SIZE, TRACING_ENABLED
+from .base_store import JobStore
+from .job_schemas import Job, JobSummary, ResearchEntry
 
 logger = logging.getLogger(__name__)
-_op_lock = Lock()
+
+@lru_cache(maxsize=None)
+def get_job_store() -> JobStore:
+    """Get the configured job store backend (singleton per process)"""
+    if JOB_STORE_BACKEND == "sqlite":
+        from .sqlite_store import SQLiteJobStore
+        store = SQLiteJobStore()
+    elif JOB_STORE_BACKEND == "redis":
+        from .redis_store import RedisJobStore
+        store = RedisJobStore()
+    else:
+        raise ValueError(f"Unknown job store backend: {JOB_STORE_BACKEND}")
+    if TRACING_ENABLED:
+        from src.services.tracing.tracer import TracedJobStore
+        return TracedJobStore(store, JOB_STORE_BACKEND)
+    return store
+
+@lru_cache(maxsize=None)
+def get_event_stream():
+    """Get the Redis Streams event log, None when events go straight to the job store"""
+    if EVENT_LOG_BACKEND == "store":
+        return None
+    if EVENT_LOG_BACKEND == "redis_stream":
+        from .event_stream import EventStream
+        return EventStream()
+    raise ValueError(f"Unknown event log backend: {EVENT_LOG_BACKEND}")
+
+
+def create_job_by_id(job_id: str) -> bool:
+    """Create a submitted job in QUEUED state, so it can be queried before a worker picks it up"""
+    return get_job_store().create_job(job_id)
+
+
+def start_job_by_id(job_id: str) -> bool:
+    """
+    Mark a job RUNNING when a worker picks it up.
+    Returns False if the job already reached a terminal status (e.g. was cancelled).
+    """
+    return get_job_store().start_job(job_id)
+
 
 def append_event_by_id(job_id: str, event_data: str):
     """record event"""
-    try:
-        with _op_lock, get_db_connection() as conn:
-            if not conn:
-                logger.error("Database connection failed")
-                return None
-            
-            cursor = conn.cursor()
-            # check if job exists
-            cursor.execute(
-                "SELECT job_id FROM jobs WHERE job_id = ?", (job_id,)
-            )
-            job_exists  = cursor.fetchone() is not None
-
-            # if job does not exist, create a new job
-            if not job_exists:
-                conn.execute(
-                    """INSERT INTO jobs (job_id, status, result)
-                    VALUES (?, 'STARTED', '')
-                    ON CONFLICT(job_id) DO NOTHING""",
-                    (job_id,)
-                )
-                logger.info(f"Job {job_id} started")
-            else:
-                logger.info(f"Recording event for job {job_id}: {event_data}")
-            
-            # create a new event record
-            # timestamp format: yyyy-MM-dd HH:mm:ss
-            conn.execute(
-                """INSERT INTO events (job_id, timestamp, data) VALUES (?, ?, ?)""",
-                (job_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), event_data)
-            )
-            conn.commit()
-            logger.info(f"Event recorded for job {job_id}")
-
-    except sqlite3.IntegrityError as e:
-        logger.warning(f"Integrity violation: {e}", exc_info=True)
-    except sqlite3.Error as e:
-        logger.error(f"Database error: {e}", exc_info=True)
-    except Exception as e:
-        logger.critical(f"Unexpected error: {e}", exc_info=True)
-        raise
-
-
-def update_job_by_id(job_id: str, status: str, result: str, event_data: List[str]) -> bool:
+    stream = get_event_stream()
+    if stream is not None:
+        return stream.append(job_id, event_data)
+    return get_job_store().append_event(job_id, event_data)
+
+
+def update_job_by_id(job_id: str, status: str, result: Union[str, Dict[str, Any]], event_data: List[str],
+                     callback_url: Optional[str] = None) -> bool:
     """
     Update job status and result, and append events in a single transaction.
+    A dict result is serialized once and stored as a JSON document. A terminal
+    status with a callback_url also queues the completion webhook.
     Returns True if successful, False otherwise.
     """
+    stream = get_event_stream()
+    if stream is None:
+        return get_job_store().update_job(job_id, status, result, event_data, callback_url=callback_url)
+
+    # streamed events should land before the final update, but the update is applied regardless:
+    # unflushed events stay in the stream for the periodic flush
+    try:
+        stream.flush_job(get_job_store(), job_id, wait=True)
+    except Exception:
+        logger.error(f"Flushing streamed events of job {job_id} failed", exc_info=True)
+    updated = get_job_store().update_job(job_id, status, result, event_data, callback_url=callback_url)
     try:
-        with _op_lock, get_db_connection() as conn:
-            if not conn:
-                logger.error("Database connection failed")
-                return None
-            
-            cursor = conn.cursor()
-            # Check if job exists (more efficient than SELECT *)
-            cursor.execute("SELECT 1 FROM jobs WHERE job_id =? LIMIT 1", (job_id,))
-
-            if not cursor.fetchone():
-                logger.warning(f"Job {job_id} not found")
-                return False
-            # Update job (using RETURNING in SQLite 3.35+ for verification)
-            cursor.execute(
-                "UPDATE jobs SET status =?, result =? WHERE job_id =?",
-                (status, result, job_id)
-            )
-            if cursor.rowcount == 0:  # Verify update occurred
-                logger.warning(f"No rows updated for job {job_id}")
-                return False
-            
-            # Batch insert events (more efficient than individual inserts)
-            if event_data:
-                try:
-                    cursor.executemany(
-                        "INSERT INTO events (job_id, timestamp, data) VALUES (?, ?, ?)",
-                        [(job_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), event) for event in event_data]
-                    )
-                except sqlite3.IntegrityError:
-                    logger.error(f"Invalid job_id {job_id} when inserting events")
-                    conn.rollback()
-                    return False
-            conn.commit()
-            logger.info(f"Updated job {job_id} with {len(event_data)} events")
-            return True
-
-    except sqlite3.Error as e:
-        logger.error(f"Database error updating job {job_id}: {str(e)}")
-        return False
-            
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return False
-
-
-def get_job_by_id(job_id: str) -> Job:
+        stream.discard(job_id)
+    except Exception:
+        logger.error(f"Discarding the event stream of job {job_id} failed", exc_info=True)
+    return updated
+
+
+def get_job_by_id(job_id: str, include_result: bool = True) -> Optional[Job]:
     """
     Retrieve job details by job_id.
-    Returns Job object if found, None otherwise.
+    Returns Job object if found, None otherwise. With include_result=False
+    the (possibly compressed) result is not loaded and Job.result is None.
     """
-    try:
-        with _op_lock, get_db_connection() as conn:
-            if not conn:
-                logger.error("Database connection failed")
-                return None
-
-            cursor = conn.cursor()
-            cursor.execute(
-                """SELECT job_id, status, result FROM jobs WHERE job_id =?""",
-                (job_id,)
-            )
-            job_data = cursor.fetchone()
-            if not job_data:
-                logger.warning(f"Job {job_id} not found")
-                return None
-            
-            # from events table to select data, timestamp
-            cursor.execute(
-                """SELECT data, timestamp FROM events WHERE job_id =?""",
-                (job_id,)
-            )
-            event_data = cursor.fetchall()
-
-            # convert to Job object
-            if not event_data:
-                logger.warning(f"No events found for job {job_id}")
-                return Job(status=job_data[1], events=[], result=job_data[2])
-            
-            # create job object and return
-            events = [Event(timestamp=row[1], data=row[0]) for row in event_data]
-            job = Job(status=job_data[1], events = events, result = job_data[2])
-            return job
-    
-    except sqlite3.Error as e:
-        logger.error(f"Database error retrieving job {job_id}: {str(e)}")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return None
+    job = get_job_store().get_job(job_id, include_result=include_result)
+    stream = get_event_stream()
+    if stream is None:
+        return job
+
+    # events not persisted yet are served straight from the stream
+    pending = stream.pending_events(job_id)
+    if job is None and pending:
+        return Job(status="STARTED", result="" if include_result else None, events=pending)
+    if job is not None:
+        job.events.extend(pending)
+    return job
+
+
+def get_jobs_by_ids(job_ids: List[str], include_result: bool = False) -> Dict[str, Job]:
+    """
+    Retrieve many jobs at once (a few queries for all of them instead of two per job).
+    Missing ids are left out of the returned dict.
+    """
+    jobs = get_job_store().get_jobs(job_ids, include_result=include_result)
+    stream = get_event_stream()
+    if stream is None:
+        return jobs
+
+    for job_id in dict.fromkeys(job_ids):
+        pending = stream.pending_events(job_id)
+        if job_id not in jobs and pending:
+            jobs[job_id] = Job(status="STARTED", result="" if include_result else None, events=pending)
+        elif job_id in jobs:
+            jobs[job_id].events.extend(pending)
+    return jobs
+
+
+def list_jobs(status: Optional[str] = None, since: Optional[str] = None,
+              after: Optional[Tuple[str, str]] = None, limit: int = 100,
+              until: Optional[str] = None) -> List[JobSummary]:
+    """
+    One page of jobs ordered by (updated_at, job_id). Pass the (updated_at, job_id)
+    of the last job of a page as `after` to get the next one.
+    """
+    return get_job_store().list_jobs(status=status, since=since, after=after, limit=limit, until=until)
+
 
+def iter_jobs(status: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+              after: Optional[Tuple[str, str]] = None, chunk_size: int = EXPORT_CHUNK_SIZE
+              ) -> Iterator[Tuple[JobSummary, Job]]:
+    """
+    Every matching job with its result and events, in (updated_at, job_id) order.
+    Jobs are read chunk_size at a time, each chunk with its own short read, so memory
+    stays bounded and writers are never held up for the length of the iteration.
+    """
+    store = get_job_store()
+    while True:
+        page = store.list_jobs(status=status, since=since, after=after, limit=chunk_size, until=until)
+        if not page:
+            return
+        jobs = store.get_jobs([summary.job_id for summary in page], include_result=True)
+        for summary in page:
+            # deleted (retention) since the page was read
+            if summary.job_id in jobs:
+                yield summary, jobs[summary.job_id]
+        after = (page[-1].updated_at, page[-1].job_id)
+
+
+def get_job_version(job_id: str) -> Optional[Tuple[str, str]]:
+    """
+    Retrieve (status, version) of a job, cheaper than loading it. The version
+    changes whenever get_job_by_id would return something different.
+    Returns None if the job does not exist.
+    """
+    stored = get_job_store().get_job_version(job_id)
+    stream = get_event_stream()
+    if stream is None:
+        return (stored[0], str(stored[1])) if stored else None
+
+    # events not persisted yet are part of the job too
+    last_entry = stream.last_entry_id(job_id)
+    if stored is None:
+        return ("STARTED", f"0-{last_entry}") if last_entry else None
+    return stored[0], f"{stored[1]}-{last_entry or 0}"
+
+
+def get_job_result(job_id: str) -> Optional[str]:
+    """
+    Retrieve (and decompress) only the result of a job, as a JSON document.
+    Returns None if the job does not exist.
+    """
+    return get_job_store().get_job_result(job_id)
+
+
+def save_task_result(job_id: str, task: str, data: Dict[str, Any]) -> bool:
+    """
+    Persist the structured output of a single crew task.
+    Returns True if successful, False otherwise.
+    """
+    return get_job_store().save_task_result(job_id, task, data)
+
+
+def get_task_result(job_id: str, task: str) -> Optional[str]:
+    """
+    Retrieve the stored JSON document of a single crew task.
+    Returns None if the task result does not exist.
+    """
+    return get_job_store().get_task_result(job_id, task)
+
+
+def get_research(domain: str) -> Optional[ResearchEntry]:
+    """
+    Retrieve the stored market research of a normalized customer domain.
+    Returns None if the domain was never researched.
+    """
+    return get_job_store().get_research(domain)
+
+
+def save_research(domain: str, data: Dict[str, Any]) -> bool:
+    """
+    Store the market research of a domain for later jobs to reuse.
+    Returns True if successful, False otherwise.
+    """
+    return get_job_store().save_research(domain, data)
+
+
+def record_research_hit(domain: str) -> None:
+    """count a job that reused the research of a domain"""
+    get_job_store().record_research_hit(domain)
+
+
+def get_research_stats() -> Dict[str, int]:
+    """research reuse totals over all domains"""
+    return get_job_store().get_research_stats()
+
+
+def get_tool_result(key: str) -> Optional[str]:
+    """
+    Retrieve a tool result cached by any worker.
+    Returns None if it is missing or expired.
+    """
+    return get_job_store().get_tool_result(key)
+
+
+def save_tool_result(key: str, result: str) -> bool:
+    """
+    Cache a tool result for every worker.
+    Returns True if successful, False otherwise.
+    """
+    return get_job_store().save_tool_result(key, result)
@@ -0,0 +1,60 @@
+import statistics
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from .job_store import list_jobs
+
+_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _seconds(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    if not start or not end:
+        return None
+    return (datetime.strptime(end, _FORMAT) - datetime.strptime(start, _FORMAT)).total_seconds()
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """count, mean and percentiles of durations in seconds"""
+    if not samples:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 1),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "max": ordered[-1],
+    }
+
+
+def lifecycle_stats(hours: int = 24, page_size: int = 1000) -> Dict[str, Any]:
+    """
+    Queue wait (created -> started) and service time (started -> finished) of the
+    jobs updated in the last `hours`, read page by page from the job listing.
+    """
+    since = (datetime.now() - timedelta(hours=hours)).strftime(_FORMAT)
+    waits, services, statuses = [], [], {}
+    after = None
+    while True:
+        page = list_jobs(since=since, after=after, limit=page_size)
+        for job in page:
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+            wait = _seconds(job.created_at, job.started_at)
+            if wait is not None:
+                waits.append(wait)
+            service = _seconds(job.started_at, job.finished_at)
+            if service is not None:
+                services.append(service)
+        if len(page) < page_size:
+            break
+        after = (page[-1].updated_at, page[-1].job_id)
+    return {
+        "hours": hours,
+        "jobs": statuses,
+        "queue_wait_s": summarize(waits),
+        "service_time_s": summarize(services),
+    }
@@ -0,0 +1,77 @@
+import hashlib
+import logging
+import sqlite3
+import zlib
+
+from typing import Optional, Tuple
+from src.config.settings import PAYLOAD_COMPRESSION_THRESHOLD, PAYLOAD_COMPRESSION_CODEC
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+def _resolve_codec(codec: str) -> str:
+    if codec == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed, falling back to zlib")
+        return "zlib"
+    return codec
+
+def compress_payload(data: bytes, codec: str = PAYLOAD_COMPRESSION_CODEC) -> Tuple[str, bytes]:
+    """Compress raw bytes, returns (codec, compressed bytes)"""
+    codec = _resolve_codec(codec)
+    if codec == "zstd":
+        return codec, zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == "zlib":
+        return codec, zlib.compress(data, 6)
+    raise ValueError(f"Unsupported compression codec: {codec}")
+
+def decompress_payload(codec: str, data: bytes) -> bytes:
+    """Inverse of compress_payload"""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd payloads")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unsupported compression codec: {codec}")
+
+def store_payload(
+    conn: sqlite3.Connection,
+    text: Optional[str],
+    threshold: int = PAYLOAD_COMPRESSION_THRESHOLD) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Store a text payload, returns (inline_text, blob_digest).
+    Payloads up to `threshold` bytes stay inline. Larger ones are compressed
+    into the content-addressed blobs table, identical payloads are stored once.
+    Runs inside the caller's transaction.
+    """
+    if text is None:
+        return None, None
+    raw = text.encode("utf-8")
+    if len(raw) <= threshold:
+        return text, None
+
+    digest = hashlib.sha256(raw).hexdigest()
+    codec, compressed = compress_payload(raw)
+    conn.execute(
+        """INSERT INTO blobs (digest, codec, size, data) VALUES (?, ?, ?, ?)
+        ON CONFLICT(digest) DO NOTHING""",
+        (digest, codec, len(raw), compressed)
+    )
+    logger.debug(f"Stored payload {digest[:12]} ({len(raw)} -> {len(compressed)} bytes)")
+    return "", digest
+
+def load_payload(conn: sqlite3.Connection, inline: Optional[str], digest: Optional[str]) -> Optional[str]:
+    """Resolve a stored payload back to text"""
+    if not digest:
+        return inline
+    row = conn.execute(
+        "SELECT codec, data FROM blobs WHERE digest = ?", (digest,)
+    ).fetchone()
+    if row is None:
+        logger.error(f"Payload blob {digest} is missing")
+        return inline
+    return decompress_payload(row[0], row[1]).decode("utf-8")
@@ -0,0 +1,561 @@
+import json
+import logging
+import time
+import redis
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import uuid4
+from src.config.settings import (
+    JOB_STORE_REDIS_URL, PAYLOAD_COMPRESSION_THRESHOLD, RETENTION_POLICY, RESEARCH_MAX_AGE_HOURS,
+    TERMINAL_STATUSES, TOOL_CACHE_TTL_SECONDS, WEBHOOK_DEAD_RETENTION_DAYS
+)
+from .base_store import JobStore
+from .job_schemas import Event, Job, JobSummary, ResearchEntry, WebhookDelivery
+from .payload_store import compress_payload, decompress_payload
+
+logger = logging.getLogger(__name__)
+
+
+class RedisJobStore(JobStore):
+    """
+    Job store on Redis, shareable by API replicas and workers on different hosts.
+
+    Layout per job:
+        {prefix}:job:{job_id}         hash   status, result, result_codec, result_type, updated_at, version,
+                                             created_at, started_at, finished_at
+        {prefix}:job:{job_id}:events  stream one entry per event (timestamp, data, codec)
+        {prefix}:job:{job_id}:tasks   hash   task name -> JSON document
+    Job listing indexes, members "{updated_at}|{job_id}" all scored 0 (ordered lexically):
+        {prefix}:jobs:updated         zset   every job
+        {prefix}:jobs:status:{status} zset   jobs of one status
+    Completion webhooks:
+        {prefix}:outbox               zset   delivery id -> next attempt time
+        {prefix}:outbox:{id}          hash   job_id, status, url, attempts, last_error
+        {prefix}:outbox:{id}:lease    string held by the worker sending it
+        {prefix}:research:{domain}    hash   data, codec, created_at, hits, runs
+        {prefix}:research:stats       hash   hits, runs totals
+        {prefix}:tool_cache:{key}     hash   data, codec
+    Payloads above PAYLOAD_COMPRESSION_THRESHOLD are stored compressed.
+    Terminal jobs expire after the RETENTION_POLICY max_age_days of their status,
+    research after RESEARCH_MAX_AGE_HOURS, cached tool results after TOOL_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, url: str = JOB_STORE_REDIS_URL,
+                 prefix: str = "marketflow", threshold: int = PAYLOAD_COMPRESSION_THRESHOLD):
+        # redis-py clients are thread-safe and pool their connections
+        self.client = client or redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.threshold = threshold
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def _pack(self, text: str) -> Dict[str, Union[str, bytes]]:
+        raw = text.encode("utf-8")
+        if len(raw) <= self.threshold:
+            return {"data": raw, "codec": ""}
+        codec, compressed = compress_payload(raw)
+        return {"data": compressed, "codec": codec}
+
+    @staticmethod
+    def _unpack(data: Optional[bytes], codec: Optional[bytes]) -> Optional[str]:
+        if data is None:
+            return None
+        if codec:
+            data = decompress_payload(codec.decode(), data)
+        return data.decode("utf-8")
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def _index_keys(self, status: str) -> Tuple[str, str]:
+        return f"{self.prefix}:jobs:updated", f"{self.prefix}:jobs:status:{status}"
+
+    def _index(self, job_id: str, status: str, updated_at: str) -> None:
+        """add a newly created job to the listing indexes"""
+        member = f"{updated_at}|{job_id}"
+        pipe = self.client.pipeline(transaction=False)
+        for index in self._index_keys(status):
+            pipe.zadd(index, {member: 0})
+        pipe.execute()
+
+    def _move(self, pipe, job_id: str, previous_status: Optional[bytes], previous_updated: Optional[bytes],
+              status: str, updated_at: str) -> None:
+        """queue the move of a job to its new place in the listing indexes"""
+        if previous_status is not None and previous_updated is not None:
+            stale = f"{previous_updated.decode()}|{job_id}"
+            for index in self._index_keys(previous_status.decode()):
+                pipe.zrem(index, stale)
+        for index in self._index_keys(status):
+            pipe.zadd(index, {f"{updated_at}|{job_id}": 0})
+
+    def create_job(self, job_id: str) -> bool:
+        """
+        Create a submitted job in QUEUED state.
+        Returns True if created, False if it exists or on error.
+        """
+        key = self._job_key(job_id)
+        now = self._now()
+        try:
+            if not self.client.hsetnx(key, "status", "QUEUED"):
+                return False
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hset(key, mapping={"result": "", "created_at": now, "updated_at": now, "version": 0})
+            for index in self._index_keys("QUEUED"):
+                pipe.zadd(index, {f"{now}|{job_id}": 0})
+            pipe.execute()
+            return True
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error creating job {job_id}: {str(e)}")
+            return False
+
+    def start_job(self, job_id: str) -> bool:
+        """
+        Mark a job RUNNING (WATCH/MULTI against a concurrent cancel), the first start sets started_at.
+        Returns False if the job already reached a terminal status.
+        """
+        key = self._job_key(job_id)
+        now = self._now()
+
+        def start(pipe) -> bool:
+            previous_status, previous_updated = pipe.hmget(key, ["status", "updated_at"])
+            if previous_status is not None and previous_status.decode() in TERMINAL_STATUSES:
+                return False
+            pipe.multi()
+            pipe.hset(key, mapping={"status": "RUNNING", "updated_at": now})
+            for field in ("result", "created_at", "started_at"):
+                pipe.hsetnx(key, field, "" if field == "result" else now)
+            pipe.hincrby(key, "version", 1)
+            self._move(pipe, job_id, previous_status, previous_updated, "RUNNING", now)
+            return True
+
+        try:
+            return self.client.transaction(start, key, value_from_callable=True)
+        except redis.RedisError as e:
+            logger.error(f"Redis error starting job {job_id}: {str(e)}")
+            return False
+
+    def append_event(self, job_id: str, event_data: str) -> None:
+        """record event"""
+        key = self._job_key(job_id)
+        now = self._now()
+        try:
+            # one round trip: create the job on first event, then append
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hsetnx(key, "status", "STARTED")
+            pipe.hsetnx(key, "result", "")
+            pipe.hsetnx(key, "updated_at", now)
+            pipe.hsetnx(key, "created_at", now)
+            pipe.xadd(f"{key}:events", {"timestamp": self._now(), **self._pack(event_data)})
+            # status caches compare versions instead of reloading the job
+            pipe.hincrby(key, "version", 1)
+            created = pipe.execute()[0]
+            if created:
+                self._index(job_id, "STARTED", now)
+                logger.info(f"Job {job_id} started")
+            logger.debug(f"Event recorded for job {job_id} ({len(event_data)} chars)")
+        except redis.RedisError as e:
+            logger.error(f"Redis error recording event for job {job_id}: {e}", exc_info=True)
+
+    def append_events(self, job_id: str, events: List[Event]) -> None:
+        """record a batch of events in one round trip"""
+        if not events:
+            return
+        key = self._job_key(job_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hsetnx(key, "status", "STARTED")
+        pipe.hsetnx(key, "result", "")
+        pipe.hsetnx(key, "updated_at", events[0].timestamp)
+        pipe.hsetnx(key, "created_at", events[0].timestamp)
+        for event in events:
+            pipe.xadd(f"{key}:events", {"timestamp": event.timestamp, **self._pack(event.data)})
+        pipe.hincrby(key, "version", 1)
+        if pipe.execute()[0]:
+            self._index(job_id, "STARTED", events[0].timestamp)
+        logger.info(f"Recorded {len(events)} events for job {job_id}")
+
+    def update_job(self, job_id: str, status: str, result: Union[str, Dict[str, Any]], event_data: List[str],
+                   callback_url: Optional[str] = None) -> bool:
+        """
+        Update job status and result, and append events in a single MULTI/EXEC,
+        together with the webhook delivery of a terminal status.
+        Returns True if successful, False otherwise.
+        """
+        key = self._job_key(job_id)
+        result, result_type = self._serialize_result(result)
+        packed = self._pack(result)
+        timestamp = self._now()
+
+        def update(pipe) -> bool:
+            previous_status, previous_updated = pipe.hmget(key, ["status", "updated_at"])
+            if previous_status is None or previous_status.decode() in TERMINAL_STATUSES:
+                # terminal states are final: a cancelled job is not completed by its worker
+                logger.warning(
+                    f"Job {job_id} not found" if previous_status is None else f"Job {job_id} already {previous_status.decode()}"
+                )
+                return False
+            pipe.multi()
+            pipe.hset(key, mapping={
+                "status": status,
+                "result": packed["data"],
+                "result_codec": packed["codec"],
+                "result_type": result_type,
+                "updated_at": timestamp,
+            })
+            if status in TERMINAL_STATUSES:
+                pipe.hset(key, "finished_at", timestamp)
+            self._move(pipe, job_id, previous_status, previous_updated, status, timestamp)
+            for event in event_data or []:
+                pipe.xadd(f"{key}:events", {"timestamp": timestamp, **self._pack(event)})
+            pipe.hincrby(key, "version", 1)
+            if callback_url and status in TERMINAL_STATUSES:
+                delivery_id = uuid4().hex
+                pipe.hset(f"{self.prefix}:outbox:{delivery_id}", mapping={
+                    "job_id": job_id, "status": status, "url": callback_url, "attempts": 0
+                })
+                pipe.zadd(f"{self.prefix}:outbox", {delivery_id: time.time()})
+
+            max_age_days = RETENTION_POLICY.get(status, {}).get("max_age_days")
+            if max_age_days is not None:
+                for suffix in ("", ":events", ":tasks"):
+                    pipe.expire(f"{key}{suffix}", max_age_days * 86400)
+            return True
+
+        try:
+            # WATCH/MULTI: the terminal check and the update are atomic
+            updated = self.client.transaction(update, key, value_from_callable=True)
+            if updated:
+                logger.info(f"Updated job {job_id} with {len(event_data or [])} events")
+            return updated
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error updating job {job_id}: {str(e)}")
+            return False
+
+    @staticmethod
+    def _job_fields(include_result: bool) -> List[str]:
+        fields = ["status", "result_type", "created_at", "started_at", "finished_at"]
+        return fields + (["result", "result_codec"] if include_result else [])
+
+    def _to_job(self, values: list, entries: list, include_result: bool) -> Job:
+        """Job from the HMGET of _job_fields and the XRANGE of its events"""
+        timestamps = [value.decode() if value is not None else None for value in values[2:5]]
+        return Job(
+            status=values[0].decode(),
+            result=self._unpack(values[5], values[6]) if include_result else None,
+            events=[
+                Event(timestamp=entry[b"timestamp"].decode(), data=self._unpack(entry[b"data"], entry.get(b"codec")))
+                for _, entry in entries
+            ],
+            result_type=(values[1] or b"text").decode(),
+            created_at=timestamps[0],
+            started_at=timestamps[1],
+            finished_at=timestamps[2]
+        )
+
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Job]:
+        """
+        Retrieve job details by job_id.
+        Returns Job object if found, None otherwise.
+        """
+        key = self._job_key(job_id)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hmget(key, self._job_fields(include_result))
+            pipe.xrange(f"{key}:events")
+            values, entries = pipe.execute()
+            if values[0] is None:
+                logger.warning(f"Job {job_id} not found")
+                return None
+            return self._to_job(values, entries, include_result)
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving job {job_id}: {str(e)}")
+            return None
+
+    def get_jobs(self, job_ids: List[str], include_result: bool = False) -> Dict[str, Job]:
+        """
+        Retrieve many jobs in one pipelined round trip (HMGET and XRANGE per job).
+        Missing ids are left out of the returned dict.
+        """
+        job_ids = list(dict.fromkeys(job_ids))
+        fields = self._job_fields(include_result)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for job_id in job_ids:
+                key = self._job_key(job_id)
+                pipe.hmget(key, fields)
+                pipe.xrange(f"{key}:events")
+            replies = pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving {len(job_ids)} jobs: {str(e)}")
+            return {}
+
+        jobs: Dict[str, Job] = {}
+        for job_id, values, entries in zip(job_ids, replies[::2], replies[1::2]):
+            if values[0] is not None:
+                jobs[job_id] = self._to_job(values, entries, include_result)
+        return jobs
+
+    def list_jobs(self, status: Optional[str] = None, since: Optional[str] = None,
+                  after: Optional[Tuple[str, str]] = None, limit: int = 100,
+                  until: Optional[str] = None) -> List[JobSummary]:
+        """
+        Keyset pagination with ZRANGEBYLEX over the listing indexes. Members left behind
+        by expired jobs or concurrent updates are skipped (and expired ones removed).
+        """
+        index = self._index_keys(status)[1] if status else self._index_keys("")[0]
+        lower = "-"
+        if since:
+            lower = f"[{since}"
+        if after and (not since or after[0] >= since):
+            lower = f"({after[0]}|{after[1]}"
+        upper = f"({until}" if until else "+"
+        jobs: List[JobSummary] = []
+        try:
+            while len(jobs) < limit:
+                members = self.client.zrangebylex(index, lower, upper, start=0, num=limit - len(jobs))
+                if not members:
+                    break
+                pipe = self.client.pipeline(transaction=False)
+                for member in members:
+                    pipe.hmget(
+                        self._job_key(member.decode().split("|", 1)[1]),
+                        ["status", "updated_at", "created_at", "started_at", "finished_at"]
+                    )
+                expired = []
+                for member, values in zip(members, pipe.execute()):
+                    updated, job_id = member.decode().split("|", 1)
+                    if values[0] is None:
+                        expired.append(member)
+                    elif values[1].decode() == updated and (not status or values[0].decode() == status):
+                        jobs.append(JobSummary(job_id, *(value.decode() if value else None for value in values)))
+                if expired:
+                    self.client.zrem(index, *expired)
+                lower = f"({members[-1].decode()}"
+            return jobs
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error listing jobs: {str(e)}")
+            return []
+
+    def get_job_version(self, job_id: str) -> Optional[Tuple[str, int]]:
+        """
+        Retrieve the status and version of a job, a single HMGET.
+        Returns None if the job does not exist.
+        """
+        try:
+            status, version = self.client.hmget(self._job_key(job_id), ["status", "version"])
+            return (status.decode(), int(version or 0)) if status is not None else None
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving version of job {job_id}: {str(e)}")
+            return None
+
+    def get_job_result(self, job_id: str) -> Optional[str]:
+        """
+        Retrieve only the result of a job, as a JSON document.
+        Returns None if the job does not exist.
+        """
+        try:
+            result, codec, result_type = self.client.hmget(
+                self._job_key(job_id), ["result", "result_codec", "result_type"]
+            )
+            if result is None:
+                logger.warning(f"Job {job_id} not found")
+                return None
+            return self._to_json_document(self._unpack(result, codec), (result_type or b"text").decode())
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving result of job {job_id}: {str(e)}")
+            return None
+
+    def save_task_result(self, job_id: str, task: str, data: Dict[str, Any]) -> bool:
+        """
+        Persist the structured output of a single crew task.
+        Returns True if successful, False otherwise.
+        """
+        try:
+            packed = self._pack(json.dumps(data, ensure_ascii=False))
+            self.client.hset(f"{self._job_key(job_id)}:tasks", mapping={
+                task: packed["data"], f"{task}:codec": packed["codec"]
+            })
+            logger.info(f"Stored result of task {task} for job {job_id}")
+            return True
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error storing task {task} of job {job_id}: {str(e)}")
+            return False
+
+    def get_task_result(self, job_id: str, task: str) -> Optional[str]:
+        """
+        Retrieve the stored JSON document of a single crew task.
+        Returns None if the task result does not exist.
+        """
+        try:
+            data, codec = self.client.hmget(f"{self._job_key(job_id)}:tasks", [task, f"{task}:codec"])
+            return self._unpack(data, codec)
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving task {task} of job {job_id}: {str(e)}")
+            return None
+
+    def get_research(self, domain: str) -> Optional[ResearchEntry]:
+        """
+        Retrieve the stored market research of a normalized customer domain.
+        Returns None if the domain was never researched (or it expired).
+        """
+        try:
+            data, codec, created_at, hits, runs = self.client.hmget(
+                f"{self.prefix}:research:{domain}", ["data", "codec", "created_at", "hits", "runs"]
+            )
+            if data is None:
+                return None
+            return ResearchEntry(
+                domain=domain,
+                data=json.loads(self._unpack(data, codec)),
+                created_at=created_at.decode(),
+                hits=int(hits or 0),
+                runs=int(runs or 0)
+            )
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving research of {domain}: {str(e)}")
+            return None
+
+    def save_research(self, domain: str, data: Dict[str, Any]) -> bool:
+        """
+        Store the market research of a domain, replacing the previous one.
+        Returns True if successful, False otherwise.
+        """
+        key = f"{self.prefix}:research:{domain}"
+        try:
+            packed = self._pack(json.dumps(data, ensure_ascii=False))
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hset(key, mapping={"data": packed["data"], "codec": packed["codec"], "created_at": self._now()})
+            pipe.hincrby(key, "runs", 1)
+            pipe.expire(key, RESEARCH_MAX_AGE_HOURS * 3600)
+            pipe.hincrby(f"{self.prefix}:research:stats", "runs", 1)
+            pipe.execute()
+            logger.info(f"Stored research of {domain}")
+            return True
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error storing research of {domain}: {str(e)}")
+            return False
+
+    def record_research_hit(self, domain: str) -> None:
+        """count a job that reused the research of a domain"""
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hincrby(f"{self.prefix}:research:{domain}", "hits", 1)
+            pipe.hincrby(f"{self.prefix}:research:stats", "hits", 1)
+            pipe.execute()
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error recording research hit of {domain}: {str(e)}")
+
+    def get_research_stats(self) -> Dict[str, int]:
+        """totals over all researched domains, expired ones included"""
+        try:
+            hits, runs = self.client.hmget(f"{self.prefix}:research:stats", ["hits", "runs"])
+            domains = sum(
+                1 for key in self.client.scan_iter(f"{self.prefix}:research:*", count=500)
+                if not key.endswith(b":stats")
+            )
+            return {"domains": domains, "hits": int(hits or 0), "runs": int(runs or 0)}
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving research stats: {str(e)}")
+            return {"domains": 0, "hits": 0, "runs": 0}
+
+    def get_tool_result(self, key: str) -> Optional[str]:
+        """
+        Retrieve a cached tool result (search results, page HTML).
+        Returns None if it is missing or expired.
+        """
+        try:
+            data, codec = self.client.hmget(f"{self.prefix}:tool_cache:{key}", ["data", "codec"])
+            return self._unpack(data, codec)
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error retrieving cached tool result {key}: {str(e)}")
+            return None
+
+    def save_tool_result(self, key: str, result: str) -> bool:
+        """
+        Cache a tool result for TOOL_CACHE_TTL_SECONDS.
+        Returns True if successful, False otherwise.
+        """
+        cache_key = f"{self.prefix}:tool_cache:{key}"
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hset(cache_key, mapping=self._pack(result))
+            pipe.expire(cache_key, TOOL_CACHE_TTL_SECONDS)
+            pipe.execute()
+            return True
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error caching tool result {key}: {str(e)}")
+            return False
+
+    def claim_webhooks(self, limit: int, lease_seconds: int) -> List[WebhookDelivery]:
+        """
+        Due webhook deliveries, each leased with SET NX so concurrent workers
+        never send the same one; an expired lease makes it claimable again.
+        """
+        outbox = f"{self.prefix}:outbox"
+        try:
+            due = self.client.zrangebyscore(outbox, "-inf", time.time(), start=0, num=limit)
+            if not due:
+                return []
+            pipe = self.client.pipeline(transaction=False)
+            for delivery_id in due:
+                pipe.set(f"{outbox}:{delivery_id.decode()}:lease", 1, nx=True, ex=lease_seconds)
+            leased = [delivery_id.decode() for delivery_id, owned in zip(due, pipe.execute()) if owned]
+
+            pipe = self.client.pipeline(transaction=False)
+            for delivery_id in leased:
+                pipe.hmget(f"{outbox}:{delivery_id}", ["job_id", "status", "url", "attempts"])
+            deliveries = []
+            for delivery_id, values in zip(leased, pipe.execute()):
+                if values[0] is None:
+                    self.client.zrem(outbox, delivery_id)
+                    continue
+                deliveries.append(WebhookDelivery(
+                    id=delivery_id, job_id=values[0].decode(), status=values[1].decode(),
+                    url=values[2].decode(), attempts=int(values[3] or 0)
+                ))
+            return deliveries
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error claiming webhooks: {str(e)}")
+            return []
+
+    def finish_webhook(self, delivery: WebhookDelivery, delivered: bool,
+                       error: Optional[str] = None, retry_at: Optional[float] = None) -> None:
+        """delivered webhooks are deleted, failed ones rescheduled (or dead without retry_at)"""
+        outbox = f"{self.prefix}:outbox"
+        key = f"{outbox}:{delivery.id}"
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            if delivered:
+                pipe.delete(key)
+                pipe.zrem(outbox, delivery.id)
+            else:
+                pipe.hincrby(key, "attempts", 1)
+                pipe.hset(key, "last_error", error or "")
+                if retry_at is not None:
+                    pipe.zadd(outbox, {delivery.id: retry_at})
+                else:
+                    # dead deliveries are kept for inspection, then expire
+                    pipe.zrem(outbox, delivery.id)
+                    pipe.expire(key, WEBHOOK_DEAD_RETENTION_DAYS * 86400)
+            pipe.delete(f"{key}:lease")
+            pipe.execute()
+
+        except redis.RedisError as e:
+            logger.error(f"Redis error finishing webhook {delivery.id} of job {delivery.job_id}: {str(e)}")
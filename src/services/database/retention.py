@@ -0,0 +1,172 @@
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.config.settings import DATABASE_PATH, RETENTION_POLICY, RETENTION_BATCH_SIZE, ARCHIVE_DIR
+from .connection import get_db_connection
+from .payload_store import load_payload
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RetentionReport:
+    deleted_jobs: int = 0
+    deleted_events: int = 0
+    deleted_blobs: int = 0
+    archive_path: Optional[str] = None
+    reclaimed_bytes: int = 0
+    max_lock_hold_ms: float = 0.0
+    duration_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def _disk_usage(db_path: str) -> int:
+    """size of the database file plus its WAL"""
+    return sum(
+        os.path.getsize(path) for path in (db_path, f"{db_path}-wal") if os.path.exists(path)
+    )
+
+def select_expired_jobs(conn: sqlite3.Connection, status: str, max_age_days: Optional[int] = None,
+                        max_jobs: Optional[int] = None, now: Optional[datetime] = None) -> List[str]:
+    """job ids of `status` that are older than max_age_days or beyond the newest max_jobs"""
+    expired = set()
+    if max_age_days is not None:
+        cutoff = ((now or datetime.now()) - timedelta(days=max_age_days)).strftime('%Y-%m-%d %H:%M:%S')
+        rows = conn.execute(
+            "SELECT job_id FROM jobs WHERE status = ? AND updated_at < ?", (status, cutoff)
+        )
+        expired.update(row[0] for row in rows)
+    if max_jobs is not None:
+        rows = conn.execute(
+            """SELECT job_id FROM jobs WHERE status = ?
+            ORDER BY updated_at DESC LIMIT -1 OFFSET ?""",
+            (status, max_jobs)
+        )
+        expired.update(row[0] for row in rows)
+    return sorted(expired)
+
+def _export_jobs(conn: sqlite3.Connection, job_ids: List[str]) -> List[dict]:
+    """load jobs with events and task results as plain documents for archiving"""
+    placeholders = ",".join("?" * len(job_ids))
+    documents = {}
+    for row in conn.execute(
+        f"""SELECT job_id, status, result, result_ref, result_type, updated_at
+        FROM jobs WHERE job_id IN ({placeholders})""", job_ids):
+        documents[row[0]] = {
+            "job_id": row[0],
+            "status": row[1],
+            "result": load_payload(conn, row[2], row[3]),
+            "result_type": row[4],
+            "updated_at": row[5],
+            "events": [],
+            "task_results": {},
+        }
+    for row in conn.execute(
+        f"""SELECT job_id, timestamp, data, data_ref FROM events
+        WHERE job_id IN ({placeholders}) ORDER BY id""", job_ids):
+        documents[row[0]]["events"].append(
+            {"timestamp": row[1], "data": load_payload(conn, row[2], row[3])}
+        )
+    for row in conn.execute(
+        f"SELECT job_id, task, data, data_ref FROM task_results WHERE job_id IN ({placeholders})", job_ids):
+        documents[row[0]]["task_results"][row[1]] = load_payload(conn, row[2], row[3])
+    return list(documents.values())
+
+def _delete_batch(conn: sqlite3.Connection, job_ids: List[str]) -> Dict[str, int]:
+    """delete one batch of jobs and their now unreferenced blobs in a single write transaction"""
+    placeholders = ",".join("?" * len(job_ids))
+    digests = [row[0] for row in conn.execute(
+        f"""SELECT result_ref FROM jobs WHERE job_id IN ({placeholders}) AND result_ref IS NOT NULL
+        UNION SELECT data_ref FROM events WHERE job_id IN ({placeholders}) AND data_ref IS NOT NULL
+        UNION SELECT data_ref FROM task_results WHERE job_id IN ({placeholders}) AND data_ref IS NOT NULL""",
+        job_ids * 3
+    )]
+    events = conn.execute(f"DELETE FROM events WHERE job_id IN ({placeholders})", job_ids).rowcount
+    conn.execute(f"DELETE FROM task_results WHERE job_id IN ({placeholders})", job_ids)
+    # pending or dead webhook deliveries of a purged job have nothing left to report
+    conn.execute(f"DELETE FROM webhook_outbox WHERE job_id IN ({placeholders})", job_ids)
+    jobs = conn.execute(f"DELETE FROM jobs WHERE job_id IN ({placeholders})", job_ids).rowcount
+    blobs = 0
+    for digest in digests:
+        # blobs are deduplicated, only drop those no other job still uses
+        blobs += conn.execute(
+            """DELETE FROM blobs WHERE digest = ?
+            AND NOT EXISTS (SELECT 1 FROM jobs WHERE result_ref = ?)
+            AND NOT EXISTS (SELECT 1 FROM events WHERE data_ref = ?)
+            AND NOT EXISTS (SELECT 1 FROM task_results WHERE data_ref = ?)
+            AND NOT EXISTS (SELECT 1 FROM research WHERE data_ref = ?)""",
+            (digest, digest, digest, digest, digest)
+        ).rowcount
+    return {"jobs": jobs, "events": events, "blobs": blobs}
+
+def purge_expired_jobs(
+    db_path: str = DATABASE_PATH,
+    policy: Dict[str, dict] = RETENTION_POLICY,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    archive_dir: Optional[str] = ARCHIVE_DIR) -> RetentionReport:
+    """
+    Apply the retention policy: archive expired jobs to gzip-compressed JSONL,
+    delete them in small batches (each batch is its own short write transaction),
+    then give free pages back with incremental vacuum and truncate the WAL.
+    """
+    report = RetentionReport()
+    started = time.perf_counter()
+    size_before = _disk_usage(db_path)
+
+    with get_db_connection(db_path) as conn:
+        expired = []
+        for status, rules in policy.items():
+            expired += select_expired_jobs(conn, status, rules.get("max_age_days"), rules.get("max_jobs"))
+        if not expired:
+            logger.info("Retention: nothing to purge")
+            return report
+
+        archive = None
+        if archive_dir:
+            Path(archive_dir).mkdir(parents=True, exist_ok=True)
+            report.archive_path = str(Path(archive_dir) / f"jobs-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+            archive = gzip.open(report.archive_path, "at", compresslevel=6, encoding="utf-8")
+        try:
+            for offset in range(0, len(expired), batch_size):
+                batch = expired[offset:offset + batch_size]
+                # archive from a read snapshot, WAL readers do not block writers
+                if archive:
+                    for document in _export_jobs(conn, batch):
+                        archive.write(json.dumps(document, ensure_ascii=False) + "\n")
+                    archive.flush()
+
+                lock_started = time.perf_counter()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    deleted = _delete_batch(conn, batch)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+                hold_ms = (time.perf_counter() - lock_started) * 1000
+                report.max_lock_hold_ms = max(report.max_lock_hold_ms, hold_ms)
+                report.deleted_jobs += deleted["jobs"]
+                report.deleted_events += deleted["events"]
+                report.deleted_blobs += deleted["blobs"]
+        finally:
+            if archive:
+                archive.close()
+
+        conn.executescript("PRAGMA incremental_vacuum")  # execute() would free a single page only
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    report.reclaimed_bytes = size_before - _disk_usage(db_path)
+    report.duration_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        f"Retention purged {report.deleted_jobs} jobs, {report.deleted_events} events, "
+        f"reclaimed {report.reclaimed_bytes} bytes, max lock hold {report.max_lock_hold_ms:.1f}ms"
+    )
+    return report
@@ -0,0 +1,584 @@
+import json
+import logging
+import sqlite3
+import time
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+from threading import Lock
+from uuid import uuid4
+from src.config.settings import DATABASE_PATH, PAYLOAD_COMPRESSION_THRESHOLD, TERMINAL_STATUSES, TOOL_CACHE_TTL_SECONDS
+from .base_store import JobStore
+from .job_schemas import Event, Job, JobSummary, ResearchEntry, WebhookDelivery
+from .connection import get_db_connection, initialize_database
+from .payload_store import store_payload, load_payload, compress_payload, decompress_payload
+
+logger = logging.getLogger(__name__)
+
+# ids per IN (...) query, below SQLITE_MAX_VARIABLE_NUMBER of older SQLite builds (999)
+_IN_CHUNK = 500
+
+
+class SQLiteJobStore(JobStore):
+    """Job store on a local SQLite file (WAL mode), single writer per file"""
+
+    def __init__(self, db_path: str = DATABASE_PATH):
+        self.db_path = db_path
+        self._op_lock = Lock()
+
+    def initialize(self) -> None:
+        initialize_database(self.db_path)
+
+    def create_job(self, job_id: str) -> bool:
+        """
+        Insert a submitted job in QUEUED state.
+        Returns True if created, False if it exists or on error.
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                cursor = conn.execute(
+                    """INSERT INTO jobs (job_id, status, result, created_at, updated_at)
+                    VALUES (?, 'QUEUED', '', ?, ?) ON CONFLICT(job_id) DO NOTHING""",
+                    (job_id, now, now)
+                )
+                return cursor.rowcount == 1
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error creating job {job_id}: {str(e)}")
+            return False
+
+    def start_job(self, job_id: str) -> bool:
+        """
+        Mark a job RUNNING, the first start sets started_at (phase retries keep it).
+        Returns False if the job already reached a terminal status.
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        terminal = ",".join("?" * len(TERMINAL_STATUSES))
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                cursor = conn.execute(
+                    f"""INSERT INTO jobs (job_id, status, result, created_at, started_at, updated_at)
+                    VALUES (?, 'RUNNING', '', ?, ?, ?)
+                    ON CONFLICT(job_id) DO UPDATE SET status = 'RUNNING', updated_at = excluded.updated_at,
+                    started_at = COALESCE(started_at, excluded.started_at), version = version + 1
+                    WHERE status NOT IN ({terminal})""",
+                    (job_id, now, now, now, *TERMINAL_STATUSES)
+                )
+                return cursor.rowcount == 1
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error starting job {job_id}: {str(e)}")
+            return False
+
+    def append_event(self, job_id: str, event_data: str) -> None:
+        """record event, a single INSERT for jobs created at submission"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                # large payloads are stored out of line
+                data, data_ref = store_payload(conn, event_data)
+                row = (job_id, timestamp, data, data_ref)
+                try:
+                    conn.execute("INSERT INTO events (job_id, timestamp, data, data_ref) VALUES (?, ?, ?, ?)", row)
+                except sqlite3.IntegrityError:
+                    # foreign key: a job not submitted through the API is created by its first event
+                    conn.execute(
+                        """INSERT INTO jobs (job_id, status, result, created_at, updated_at)
+                        VALUES (?, 'STARTED', '', ?, ?) ON CONFLICT(job_id) DO NOTHING""",
+                        (job_id, timestamp, timestamp)
+                    )
+                    conn.execute("INSERT INTO events (job_id, timestamp, data, data_ref) VALUES (?, ?, ?, ?)", row)
+                    logger.info(f"Job {job_id} started")
+                # per-event hot path: no payload, below INFO
+                logger.debug(f"Event recorded for job {job_id} ({len(event_data)} chars)")
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {e}", exc_info=True)
+        except Exception as e:
+            logger.critical(f"Unexpected error: {e}", exc_info=True)
+            raise
+
+    def append_events(self, job_id: str, events: List[Event]) -> None:
+        """record a batch of events in one transaction"""
+        if not events:
+            return
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    rows = [(job_id, event.timestamp, *store_payload(conn, event.data)) for event in events]
+                    try:
+                        conn.executemany("INSERT INTO events (job_id, timestamp, data, data_ref) VALUES (?, ?, ?, ?)", rows)
+                    except sqlite3.IntegrityError:
+                        conn.execute(
+                            """INSERT INTO jobs (job_id, status, result, created_at, updated_at)
+                            VALUES (?, 'STARTED', '', ?, ?) ON CONFLICT(job_id) DO NOTHING""",
+                            (job_id, events[0].timestamp, events[0].timestamp)
+                        )
+                        conn.executemany("INSERT INTO events (job_id, timestamp, data, data_ref) VALUES (?, ?, ?, ?)", rows)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+                logger.info(f"Recorded {len(events)} events for job {job_id}")
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error recording events for job {job_id}: {e}", exc_info=True)
+            raise
+
+
+    def update_job(self, job_id: str, status: str, result: Union[str, Dict[str, Any]], event_data: List[str],
+                   callback_url: Optional[str] = None) -> bool:
+        """
+        Update job status and result, and append events in a single transaction,
+        together with the webhook delivery of a terminal status.
+        Returns True if successful, False otherwise.
+        """
+        result, result_type = self._serialize_result(result)
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                if not conn:
+                    logger.error("Database connection failed")
+                    return None
+
+                cursor = conn.cursor()
+                # connections autocommit, the update, its events and the webhook commit together
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.execute("SELECT status FROM jobs WHERE job_id =?", (job_id,))
+                    current = cursor.fetchone()
+                    if not current or current[0] in TERMINAL_STATUSES:
+                        # terminal states are final: a cancelled job is not completed by its worker
+                        logger.warning(f"Job {job_id} not found" if not current else f"Job {job_id} already {current[0]}")
+                        cursor.execute("ROLLBACK")
+                        return False
+
+                    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    result, result_ref = store_payload(conn, result)
+                    cursor.execute(
+                        """UPDATE jobs SET status =?, result =?, result_ref =?, result_type =?, updated_at =?,
+                        finished_at = COALESCE(?, finished_at), version = version + 1 WHERE job_id =?""",
+                        (status, result, result_ref, result_type, now,
+                         now if status in TERMINAL_STATUSES else None, job_id)
+                    )
+                    # Batch insert events (more efficient than individual inserts)
+                    if event_data:
+                        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        cursor.executemany(
+                            "INSERT INTO events (job_id, timestamp, data, data_ref) VALUES (?, ?, ?, ?)",
+                            [(job_id, timestamp, *store_payload(conn, event)) for event in event_data]
+                        )
+                    if callback_url and status in TERMINAL_STATUSES:
+                        cursor.execute(
+                            """INSERT INTO webhook_outbox (id, job_id, status, url, next_attempt_at, created_at)
+                            VALUES (?, ?, ?, ?, ?, ?)""",
+                            (uuid4().hex, job_id, status, callback_url, time.time(),
+                             datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                        )
+                    cursor.execute("COMMIT")
+                except sqlite3.Error:
+                    cursor.execute("ROLLBACK")
+                    raise
+                logger.info(f"Updated job {job_id} with {len(event_data)} events")
+                return True
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error updating job {job_id}: {str(e)}")
+            return False
+
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+            return False
+
+
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Job]:
+        """
+        Retrieve job details by job_id.
+        Returns Job object if found, None otherwise. With include_result=False
+        the (possibly compressed) result is not loaded and Job.result is None.
+        """
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                if not conn:
+                    logger.error("Database connection failed")
+                    return None
+
+                cursor = conn.cursor()
+                cursor.execute(
+                    """SELECT job_id, status, result, result_ref, result_type, created_at, started_at, finished_at
+                    FROM jobs WHERE job_id =?""",
+                    (job_id,)
+                )
+                job_data = cursor.fetchone()
+                if not job_data:
+                    logger.warning(f"Job {job_id} not found")
+                    return None
+                result = load_payload(conn, job_data[2], job_data[3]) if include_result else None
+
+                # from events table to select data, timestamp (out-of-line payloads joined in)
+                cursor.execute(
+                    """SELECT e.data, e.timestamp, b.codec, b.data
+                    FROM events e LEFT JOIN blobs b ON b.digest = e.data_ref
+                    WHERE e.job_id =?""",
+                    (job_id,)
+                )
+                event_data = cursor.fetchall()
+
+                # convert to Job object
+                if not event_data:
+                    logger.warning(f"No events found for job {job_id}")
+                    return Job(status=job_data[1], events=[], result=result, result_type=job_data[4],
+                               created_at=job_data[5], started_at=job_data[6], finished_at=job_data[7])
+
+                # create job object and return
+                events = [
+                    Event(
+                        timestamp=row[1],
+                        data=decompress_payload(row[2], row[3]).decode("utf-8") if row[2] else row[0]
+                    )
+                    for row in event_data
+                ]
+                job = Job(status=job_data[1], events = events, result = result, result_type=job_data[4],
+                          created_at=job_data[5], started_at=job_data[6], finished_at=job_data[7])
+                return job
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving job {job_id}: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+            return None
+
+
+    def get_jobs(self, job_ids: List[str], include_result: bool = False) -> Dict[str, Job]:
+        """
+        Retrieve many jobs with one IN (...) query on jobs and one on events
+        (per chunk of ids). Missing ids are left out of the returned dict.
+        Payloads are decompressed after the lock is released.
+        """
+        job_ids = list(dict.fromkeys(job_ids))
+        job_rows, event_rows = [], []
+        result_column = "j.result, b.codec, b.data" if include_result else "NULL, NULL, NULL"
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                for start in range(0, len(job_ids), _IN_CHUNK):
+                    chunk = job_ids[start:start + _IN_CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    job_rows += conn.execute(
+                        f"""SELECT j.job_id, j.status, j.result_type, {result_column},
+                        j.created_at, j.started_at, j.finished_at
+                        FROM jobs j LEFT JOIN blobs b ON b.digest = j.result_ref
+                        WHERE j.job_id IN ({marks})""",
+                        chunk
+                    ).fetchall()
+                    event_rows += conn.execute(
+                        f"""SELECT e.job_id, e.data, e.timestamp, b.codec, b.data
+                        FROM events e LEFT JOIN blobs b ON b.digest = e.data_ref
+                        WHERE e.job_id IN ({marks}) ORDER BY e.job_id, e.id""",
+                        chunk
+                    ).fetchall()
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving {len(job_ids)} jobs: {str(e)}")
+            return {}
+
+        jobs: Dict[str, Job] = {}
+        for row in job_rows:
+            result = None
+            if include_result:
+                result = decompress_payload(row[4], row[5]).decode("utf-8") if row[4] else row[3]
+            jobs[row[0]] = Job(status=row[1], events=[], result=result, result_type=row[2],
+                               created_at=row[6], started_at=row[7], finished_at=row[8])
+        for row in event_rows:
+            if row[0] in jobs:
+                data = decompress_payload(row[3], row[4]).decode("utf-8") if row[3] else row[1]
+                jobs[row[0]].events.append(Event(timestamp=row[2], data=data))
+        return jobs
+
+
+    def list_jobs(self, status: Optional[str] = None, since: Optional[str] = None,
+                  after: Optional[Tuple[str, str]] = None, limit: int = 100,
+                  until: Optional[str] = None) -> List[JobSummary]:
+        """
+        Keyset pagination over (updated_at, job_id), served by idx_jobs_status_updated_job
+        when filtering by status and idx_jobs_updated_job otherwise.
+        """
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since:
+            clauses.append("updated_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("updated_at < ?")
+            params.append(until)
+        if after:
+            clauses.append("(updated_at, job_id) > (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                rows = conn.execute(
+                    f"""SELECT job_id, status, updated_at, created_at, started_at, finished_at
+                    FROM jobs {where} ORDER BY updated_at, job_id LIMIT ?""",
+                    (*params, limit)
+                ).fetchall()
+                return [JobSummary(*row) for row in rows]
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error listing jobs: {str(e)}")
+            return []
+
+
+    def get_job_version(self, job_id: str) -> Optional[Tuple[str, int]]:
+        """
+        Retrieve the status and version of a job: the update counter plus the id of
+        its newest event (appends don't touch the job row), two index lookups.
+        Returns None if the job does not exist.
+        """
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                row = conn.execute(
+                    """SELECT status, version + COALESCE((SELECT MAX(id) FROM events WHERE job_id = ?), 0)
+                    FROM jobs WHERE job_id = ?""",
+                    (job_id, job_id)
+                ).fetchone()
+                return (row[0], row[1]) if row else None
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving version of job {job_id}: {str(e)}")
+            return None
+
+
+    def get_job_result(self, job_id: str) -> Optional[str]:
+        """
+        Retrieve (and decompress) only the result of a job, as a JSON document.
+        Returns None if the job does not exist.
+        """
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT result, result_ref, result_type FROM jobs WHERE job_id =?", (job_id,)
+                ).fetchone()
+                if not row:
+                    logger.warning(f"Job {job_id} not found")
+                    return None
+                return self._to_json_document(load_payload(conn, row[0], row[1]), row[2])
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving result of job {job_id}: {str(e)}")
+            return None
+
+
+    def save_task_result(self, job_id: str, task: str, data: Dict[str, Any]) -> bool:
+        """
+        Persist the structured output of a single crew task.
+        Returns True if successful, False otherwise.
+        """
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                document, data_ref = store_payload(conn, json.dumps(data, ensure_ascii=False))
+                conn.execute(
+                    """INSERT INTO task_results (job_id, task, data, data_ref) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(job_id, task) DO UPDATE SET data = excluded.data, data_ref = excluded.data_ref""",
+                    (job_id, task, document, data_ref)
+                )
+                conn.commit()
+                logger.info(f"Stored result of task {task} for job {job_id}")
+                return True
+
+        except sqlite3.IntegrityError as e:
+            logger.warning(f"Integrity violation storing task {task} of job {job_id}: {e}")
+            return False
+        except sqlite3.Error as e:
+            logger.error(f"Database error storing task {task} of job {job_id}: {str(e)}")
+            return False
+
+
+    def get_task_result(self, job_id: str, task: str) -> Optional[str]:
+        """
+        Retrieve the stored JSON document of a single crew task.
+        Returns None if the task result does not exist.
+        """
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT data, data_ref FROM task_results WHERE job_id =? AND task =?",
+                    (job_id, task)
+                ).fetchone()
+                if not row:
+                    return None
+                return load_payload(conn, row[0], row[1])
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving task {task} of job {job_id}: {str(e)}")
+            return None
+
+
+    def get_research(self, domain: str) -> Optional[ResearchEntry]:
+        """
+        Retrieve the stored market research of a normalized customer domain.
+        Returns None if the domain was never researched.
+        """
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT data, data_ref, created_at, hits, runs FROM research WHERE domain = ?",
+                    (domain,)
+                ).fetchone()
+                if not row:
+                    return None
+                return ResearchEntry(
+                    domain=domain,
+                    data=json.loads(load_payload(conn, row[0], row[1])),
+                    created_at=row[2],
+                    hits=row[3],
+                    runs=row[4]
+                )
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving research of {domain}: {str(e)}")
+            return None
+
+
+    def save_research(self, domain: str, data: Dict[str, Any]) -> bool:
+        """
+        Store the market research of a domain, replacing the previous one.
+        Returns True if successful, False otherwise.
+        """
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                document, data_ref = store_payload(conn, json.dumps(data, ensure_ascii=False))
+                conn.execute(
+                    """INSERT INTO research (domain, data, data_ref, created_at, runs) VALUES (?, ?, ?, ?, 1)
+                    ON CONFLICT(domain) DO UPDATE SET data = excluded.data, data_ref = excluded.data_ref,
+                    created_at = excluded.created_at, runs = runs + 1""",
+                    (domain, document, data_ref, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                conn.commit()
+                logger.info(f"Stored research of {domain}")
+                return True
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error storing research of {domain}: {str(e)}")
+            return False
+
+
+    def record_research_hit(self, domain: str) -> None:
+        """count a job that reused the research of a domain"""
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                conn.execute("UPDATE research SET hits = hits + 1 WHERE domain = ?", (domain,))
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error recording research hit of {domain}: {str(e)}")
+
+
+    def get_research_stats(self) -> Dict[str, int]:
+        """totals over all researched domains"""
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(runs), 0) FROM research"
+                ).fetchone()
+                return {"domains": row[0], "hits": row[1], "runs": row[2]}
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving research stats: {str(e)}")
+            return {"domains": 0, "hits": 0, "runs": 0}
+
+
+    def get_tool_result(self, key: str) -> Optional[str]:
+        """
+        Retrieve a cached tool result (search results, page HTML).
+        Returns None if it is missing or expired.
+        """
+        cutoff = (datetime.now() - timedelta(seconds=TOOL_CACHE_TTL_SECONDS)).strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT codec, data FROM tool_cache WHERE key = ? AND created_at >= ?", (key, cutoff)
+                ).fetchone()
+                if not row:
+                    return None
+                return (decompress_payload(row[0], row[1]) if row[0] else bytes(row[1])).decode("utf-8")
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error retrieving cached tool result {key}: {str(e)}")
+            return None
+
+
+    def save_tool_result(self, key: str, result: str) -> bool:
+        """
+        Cache a tool result, expired entries are dropped on the way.
+        Returns True if successful, False otherwise.
+        """
+        now = datetime.now()
+        raw = result.encode("utf-8")
+        codec, data = compress_payload(raw) if len(raw) > PAYLOAD_COMPRESSION_THRESHOLD else ("", raw)
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                conn.execute(
+                    "DELETE FROM tool_cache WHERE created_at < ?",
+                    ((now - timedelta(seconds=TOOL_CACHE_TTL_SECONDS)).strftime('%Y-%m-%d %H:%M:%S'),)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO tool_cache (key, codec, data, created_at) VALUES (?, ?, ?, ?)",
+                    (key, codec, data, now.strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                conn.commit()
+                return True
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error caching tool result {key}: {str(e)}")
+            return False
+
+
+    def claim_webhooks(self, limit: int, lease_seconds: int) -> List[WebhookDelivery]:
+        """
+        Due webhook deliveries; their next attempt is pushed back by lease_seconds
+        in the same transaction, so a crashed sender's deliveries come back later.
+        """
+        now = time.time()
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(
+                    """SELECT id, job_id, status, url, attempts FROM webhook_outbox
+                    WHERE next_attempt_at IS NOT NULL AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at LIMIT ?""",
+                    (now, limit)
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE webhook_outbox SET next_attempt_at = ? WHERE id = ?",
+                    [(now + lease_seconds, row[0]) for row in rows]
+                )
+                conn.execute("COMMIT")
+                return [WebhookDelivery(id=row[0], job_id=row[1], status=row[2], url=row[3], attempts=row[4])
+                        for row in rows]
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error claiming webhooks: {str(e)}")
+            return []
+
+
+    def finish_webhook(self, delivery: WebhookDelivery, delivered: bool,
+                       error: Optional[str] = None, retry_at: Optional[float] = None) -> None:
+        """delivered webhooks are deleted, failed ones rescheduled (or dead without retry_at)"""
+        try:
+            with self._op_lock, get_db_connection(self.db_path) as conn:
+                if delivered:
+                    conn.execute("DELETE FROM webhook_outbox WHERE id = ?", (delivery.id,))
+                else:
+                    conn.execute(
+                        """UPDATE webhook_outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+                        WHERE id = ?""",
+                        (retry_at, error, delivery.id)
+                    )
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error finishing webhook {delivery.id} of job {delivery.job_id}: {str(e)}")
@@ -0,0 +1,279 @@
+import json
+import logging
+import re
+import threading
+
+from typing import Any, ClassVar, Dict, List, Optional, Type
+from pydantic import BaseModel, ValidationError
+from crewai.utilities.converter import Converter
+
+logger = logging.getLogger(__name__)
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_LIST_SPLIT = re.compile(r"\s*[\n;,]\s*")
+_BULLET = re.compile(r"^(?:[-*•]|\d+[.)])\s*")
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _outermost_object(text: str) -> Optional[str]:
+    """first balanced {...} of the text, string-aware, closed if the output was cut off"""
+    start = text.find("{")
+    if start < 0:
+        return None
+    closers, quote, escaped = [], None, False
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+            if not closers:
+                return text[start:index + 1]
+    # truncated generation: close the open string, arrays and objects
+    return text[start:].rstrip().rstrip(",") + (quote or "") + "".join(reversed(closers))
+
+
+def _normalize(text: str) -> str:
+    """
+    Rewrite JSON-ish text (python dict repr, JS object literal) as JSON:
+    single-quoted strings, bare keys, python literals and trailing commas.
+    """
+    out, index, length = [], 0, len(text)
+    while index < length:
+        char = text[index]
+        if char in "\"'":
+            # copy the string, re-quoted with double quotes
+            index += 1
+            chars = []
+            while index < length and text[index] != char:
+                if text[index] == "\\" and index + 1 < length:
+                    escaped = text[index + 1]
+                    chars.append(escaped if escaped == "'" else "\\" + escaped)
+                    index += 2
+                    continue
+                chars.append('\\"' if text[index] == '"' else text[index])
+                index += 1
+            out.append('"' + "".join(chars).replace("\n", "\\n") + '"')
+            index += 1
+        elif (char.isalpha() or char == "_") and not (out and out[-1][-1:].isdigit()):
+            end = index
+            while end < length and (text[end].isalnum() or text[end] == "_"):
+                end += 1
+            word = text[index:end]
+            out.append(_LITERALS.get(word) or json.dumps(word))
+            index = end
+        elif char == ",":
+            # drop trailing commas before a closing bracket
+            end = index + 1
+            while end < length and text[end].isspace():
+                end += 1
+            if end < length and text[end] in "}]":
+                index = end
+                continue
+            out.append(char)
+            index += 1
+        else:
+            out.append(char)
+            index += 1
+    return "".join(out)
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """tolerant parse of an LLM answer into a dict, None if nothing object-like is found"""
+    candidate = _outermost_object(_strip_fences(text.translate(_SMART_QUOTES)))
+    if candidate is None:
+        return None
+    for attempt in (candidate, _normalize(candidate)):
+        try:
+            data = json.loads(attempt, strict=False)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def _parse_json_array(text: str) -> Optional[List[Any]]:
+    """top-level JSON array answer, for models wrapping a single list field"""
+    text = _strip_fences(text.translate(_SMART_QUOTES)).strip()
+    if not text.startswith("["):
+        return None
+    for attempt in (text, _normalize(text)):
+        try:
+            data = json.loads(attempt, strict=False)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, list):
+            return data
+    return None
+
+
+def _list_field(model: Type[BaseModel]) -> Optional[str]:
+    """name of the only field of a model that holds a list of models"""
+    fields = list(model.model_fields.items())
+    if len(fields) != 1:
+        return None
+    name, field = fields[0]
+    args = getattr(field.annotation, "__args__", ())
+    if getattr(field.annotation, "__origin__", None) is list and args and isinstance(args[0], type) \
+            and issubclass(args[0], BaseModel):
+        return name
+    return None
+
+
+def _field_key(key: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", key.strip().lower()).strip("_")
+
+
+def _coerce(data: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """rename keys to model fields and coerce values to the field types"""
+    fields = model.model_fields
+    data = {_field_key(key) if _field_key(key) in fields else key: value for key, value in data.items()}
+    for name, field in fields.items():
+        if name not in data:
+            continue
+        value, annotation = data[name], field.annotation
+        if getattr(annotation, "__origin__", None) is list:
+            if isinstance(value, str):
+                items = (_BULLET.sub("", item) for item in _LIST_SPLIT.split(value.strip()))
+                data[name] = [item for item in items if item]
+            elif value is None:
+                data[name] = []
+        elif annotation is str:
+            if isinstance(value, list):
+                data[name] = ", ".join(str(item) for item in value)
+            elif isinstance(value, (int, float)):
+                data[name] = str(value)
+            elif value is None and not field.is_required():
+                data.pop(name)
+            if isinstance(data.get(name), str):
+                data[name] = data[name].strip()
+    return data
+
+
+def _truncate(value: str, max_length: int) -> str:
+    if len(value) <= max_length:
+        return value
+    cut = value[:max_length]
+    return cut.rsplit(" ", 1)[0] if " " in cut else cut
+
+
+def repair_output(text: str, model: Type[BaseModel]) -> Optional[BaseModel]:
+    """
+    Local repair of an almost valid structured answer, guided by the model schema:
+    fence stripping, tolerant parsing, key/type coercion, unwrapping of a single
+    wrapper object and truncation of over-long strings. None if it can't be repaired.
+    """
+    list_field = _list_field(model)
+    items = _parse_json_array(text) if list_field else None
+    if items is not None:
+        return _validate_or_none(model, {list_field: items})
+
+    data = parse_json_object(text)
+    if data is None:
+        return None
+    candidates = [data]
+    # {"MarketStrategy": {...}} or {"properties": {...}}
+    if len(data) == 1 and isinstance(next(iter(data.values())), dict):
+        candidates.append(next(iter(data.values())))
+    # a single item answered for a list model
+    if list_field and list_field not in data:
+        candidates.append({list_field: [data]})
+
+    for candidate in candidates:
+        candidate = _coerce(candidate, model)
+        try:
+            return model.model_validate(candidate)
+        except ValidationError as e:
+            errors = e.errors()
+        if not all(error["type"] == "string_too_long" for error in errors):
+            continue
+        for error in errors:
+            name = error["loc"][0]
+            candidate[name] = _truncate(candidate[name], error["ctx"]["max_length"])
+        try:
+            return model.model_validate(candidate)
+        except ValidationError:
+            continue
+    return None
+
+
+def _validate_or_none(model: Type[BaseModel], data: Dict[str, Any]) -> Optional[BaseModel]:
+    try:
+        return model.model_validate(data)
+    except ValidationError:
+        return None
+
+
+class RepairStats:
+    """thread-safe counters of structured outputs repaired locally vs re-asked from the LLM"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"repaired": 0, "retried": 0, "retry_failed": 0}
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class RepairingConverter(Converter):
+    """
+    Converter used by crewAI once its own parsing of an output_json/output_pydantic
+    answer failed. Tries the local repair first and only falls back to the LLM
+    re-ask (Converter.to_json/to_pydantic) when the answer can't be repaired.
+    """
+    stats: ClassVar[RepairStats] = RepairStats()
+
+    def to_pydantic(self, current_attempt=1) -> BaseModel:
+        if current_attempt > 1:
+            # Converter retries by calling itself again, the answer was already repaired and counted
+            return super().to_pydantic(current_attempt)
+        repaired = repair_output(self.text, self.model)
+        if repaired is not None:
+            self.stats.record("repaired")
+            return repaired
+        self.stats.record("retried")
+        try:
+            return super().to_pydantic(current_attempt)
+        except Exception:
+            self.stats.record("retry_failed")
+            raise
+
+    def to_json(self, current_attempt=1):
+        if current_attempt > 1:
+            return super().to_json(current_attempt)
+        repaired = repair_output(self.text, self.model)
+        if repaired is not None:
+            self.stats.record("repaired")
+            return json.dumps(repaired.model_dump(), ensure_ascii=False)
+        self.stats.record("retried")
+        logger.info(f"Local repair failed for {self.model.__name__}, asking the LLM to reformat")
+        result = super().to_json(current_attempt)
+        if not isinstance(result, str):
+            self.stats.record("retry_failed")
+        return result
+
+
+def converter_with_stats(stats: RepairStats) -> Type[RepairingConverter]:
+    """RepairingConverter that records into `stats`, e.g. one instance per job"""
+    return type("JobRepairingConverter", (RepairingConverter,), {"stats": stats})
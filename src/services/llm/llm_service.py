@@ -1,10 +1,12 @@
 import json
+import threading
 
 from crewai import LLM
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import TypeAdapter
 from functools import lru_cache
 
+from src.config.settings import LLM_PROFILES
 from .llm_config import LLMConfig
 
 @lru_cache(maxsize=None)
@@ -18,11 +20,12 @@ class LLMService:
     """
     def __init__(self):
         self._adapter = TypeAdapter(LLMConfig)
+        self._clients: Dict[str, LLM] = {}
+        self._lock = threading.Lock()
 
-    @lru_cache(maxsize=4)
     def get_client(self, config: Optional[dict] = None) -> LLM:
         """
-        Get LLM Client (thread-safe)
+        Get LLM Client (thread-safe), one client is kept per distinct configuration
         Args.
             config: optional configuration dictionary, takes precedence over environment variables
             
@@ -33,8 +36,23 @@ class LLMService:
             >>> # Custom configuration
             >>> llm = LLMService().get_client({“model”: “llama3”})
         """
-        final_config = self._resolve_config(config)
-        return self._create_client(final_config)
+        key = json.dumps(config, sort_keys=True) if config else ""
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create_client(self._resolve_config(config))
+            return self._clients[key]
+
+    def get_profile_client(self, profile: str) -> LLM:
+        """
+        Get the client of a model profile from LLM_PROFILES: the profile's
+        overrides applied on top of the default configuration.
+        """
+        overrides = LLM_PROFILES.get(profile)
+        if overrides is None:
+            raise ValueError(f"Unknown LLM profile: {profile}")
+        if not overrides:
+            return self.get_client()
+        return self.get_client({**get_llm_config().model_dump(), **overrides})
 
     def _resolve_config(self, config: Optional[dict]) -> LLMConfig:
         if config:
@@ -51,3 +69,8 @@ class LLMService:
             timeout=config.timeout,
         )
 
+
+@lru_cache(maxsize=None)
+def get_llm_service() -> LLMService:
+    """Process-wide service, so LLM clients are reused across jobs"""
+    return LLMService()
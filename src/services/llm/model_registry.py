@@ -0,0 +1,47 @@
+import logging
+import threading
+
+from typing import Dict, Optional, Tuple
+from crewai import Agent, LLM
+from src.config.settings import LLM_PROFILES
+from .llm_service import LLMService, get_llm_service
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Resolves the `llm_profile` of agents and tasks in the crew YAML to LLM
+    clients. Clients come from the process-wide LLMService, so each profile
+    is created once and shared by every job of the worker.
+    """
+
+    def __init__(self, service: Optional[LLMService] = None, default: str = "default"):
+        self.service = service or get_llm_service()
+        self.default = default
+        self._agents: Dict[Tuple[str, str], Agent] = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile: Optional[str] = None) -> LLM:
+        """client of a profile, unknown profiles fall back to the default one"""
+        profile = profile or self.default
+        if profile not in LLM_PROFILES:
+            logger.warning(f"Unknown LLM profile {profile}, using {self.default}")
+            profile = self.default
+        return self.service.get_profile_client(profile)
+
+    def for_task(self, agent: Agent, profile: Optional[str]) -> Agent:
+        """
+        agent that runs a task: the agent itself, or a copy bound to the task's
+        profile when the task declares one (crewAI tasks have no llm of their own)
+        """
+        if not profile or self.get(profile) is agent.llm:
+            return agent
+        key = (str(agent.id), profile)
+        with self._lock:
+            if key not in self._agents:
+                bound = agent.copy()
+                bound.llm = self.get(profile)
+                bound.crew = agent.crew  # copy() turns the crew into a plain dict
+                self._agents[key] = bound
+            return self._agents[key]
@@ -47,6 +47,14 @@ class CampaignDevelopment(BaseDescriptionModel):
         }
     )
 
+class CampaignPortfolio(BaseModel):
+    """Campaign concepts produced by campaign development, one content unit each"""
+    campaigns: List[CampaignDevelopment] = Field(
+        ...,
+        min_length=1,
+        description="List of campaign proposals"
+    )
+
 class ContentProduction(BaseDescriptionModel):
     """Marketing copy content model"""
     title: str = Field(
@@ -64,4 +72,11 @@ class ContentProduction(BaseDescriptionModel):
         json_schema_extra={
             "example": "We are excited to announce our new product line..."
         }
-    )
\ No newline at end of file
+    )
+
+# output_json model of each crew task, used to validate persisted task results
+TASK_OUTPUT_MODELS = {
+    "marketing_strategy_task": MarketStrategy,
+    "campaign_development_task": CampaignPortfolio,
+    "content_production_task": ContentProduction,
+}
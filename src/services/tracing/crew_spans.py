@@ -0,0 +1,102 @@
+"""
+Spans for crew tasks, LLM calls and tool calls, from crewAI's event bus.
+
+Handlers run in the thread that emits the event, so a thread-local stack of
+open spans nests them: an LLM call under the task its agent works on, a tool
+call under the task. An end event closes the innermost span of its kind
+together with anything left open above it (a failed call whose end was never
+emitted).
+"""
+import logging
+import threading
+
+from opentelemetry import context, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from crewai.events import (
+    crewai_event_bus, LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent, TaskCompletedEvent,
+    TaskFailedEvent, TaskStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent
+)
+from .tracer import get_tracer
+
+logger = logging.getLogger(__name__)
+
+_open = threading.local()
+_installed = False
+
+
+def _stack() -> list:
+    if not hasattr(_open, "spans"):
+        _open.spans = []
+    return _open.spans
+
+
+def _start(kind: str, name: str, attributes: dict, span_kind: SpanKind = SpanKind.INTERNAL) -> None:
+    span = get_tracer().start_span(name, kind=span_kind, attributes={k: v for k, v in attributes.items() if v})
+    _stack().append((kind, span, context.attach(trace.set_span_in_context(span))))
+
+
+def _end(kind: str, error=None) -> None:
+    stack = _stack()
+    if not any(open_kind == kind for open_kind, _, _ in stack):
+        return
+    while stack:
+        open_kind, span, token = stack.pop()
+        if error is not None:
+            span.set_status(Status(StatusCode.ERROR, str(error)))
+        context.detach(token)
+        span.end()
+        if open_kind == kind:
+            return
+
+
+def _task_name(task) -> str:
+    return getattr(task, "name", None) or "task"
+
+
+def install_crew_spans() -> None:
+    """register the span handlers once per process"""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def task_started(source, event):
+        agent = getattr(event.task, "agent", None)
+        _start("task", f"crew_task {_task_name(event.task)}", {"crewai.agent": getattr(agent, "role", None)})
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def task_completed(source, event):
+        _end("task")
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def task_failed(source, event):
+        _end("task", event.error)
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def llm_started(source, event):
+        _start("llm", f"llm {event.model}", {"llm.model": event.model, "crewai.agent": event.agent_role},
+               SpanKind.CLIENT)
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def llm_completed(source, event):
+        _end("llm")
+
+    @crewai_event_bus.on(LLMCallFailedEvent)
+    def llm_failed(source, event):
+        _end("llm", event.error)
+
+    @crewai_event_bus.on(ToolUsageStartedEvent)
+    def tool_started(source, event):
+        _start("tool", f"tool {event.tool_name}", {"tool.name": event.tool_name, "crewai.agent": event.agent_role})
+
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def tool_finished(source, event):
+        stack = _stack()
+        if event.from_cache and stack and stack[-1][0] == "tool":
+            stack[-1][1].set_attribute("tool.from_cache", True)
+        _end("tool")
+
+    @crewai_event_bus.on(ToolUsageErrorEvent)
+    def tool_failed(source, event):
+        _end("tool", event.error)
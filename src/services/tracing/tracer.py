@@ -0,0 +1,155 @@
+"""
+OpenTelemetry tracing of a job across processes. The API request span is the
+root; its context travels to the workers in the Celery message headers
+(W3C traceparent), so every task of the job, and every task those publish
+(the next phase of the chain), joins the same trace:
+
+    POST /api/marketflow
+      run research_phase
+        phase analyze_market_crew
+          crew_task research_task
+            llm ..., tool ..., db ...
+      run content_phase (published by research_phase)
+        ...
+
+Whether a job is traced is decided once, at submission (TRACING_SAMPLE_RATIO);
+workers follow the sampled flag of the context they receive. With
+TRACING_ENABLED off nothing is installed and spans are no-ops.
+"""
+import logging
+import threading
+
+from typing import Dict, List, Optional, Tuple
+from fastapi import Request
+from opentelemetry import context, propagate, trace
+from opentelemetry.propagators.textmap import Getter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from src.config.settings import (
+    TRACING_ENABLED, TRACING_EXPORTER, TRACING_FILE, TRACING_OTLP_ENDPOINT, TRACING_SAMPLE_RATIO, TRACING_SERVICE_NAME
+)
+
+logger = logging.getLogger(__name__)
+
+_provider: Optional[TracerProvider] = None
+_provider_lock = threading.Lock()
+_task_spans: Dict[str, Tuple[trace.Span, object]] = {}  # celery task id -> (span, context token)
+
+
+def _exporter() -> SpanExporter:
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=TRACING_OTLP_ENDPOINT)
+    if TRACING_EXPORTER == "file":
+        # one JSON span per line, appended by every process
+        return ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", encoding="utf8"), formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    raise ValueError(f"Unknown tracing exporter: {TRACING_EXPORTER}")
+
+
+def get_tracer() -> trace.Tracer:
+    """tracer of this process, created on first use so each forked worker gets its own export thread"""
+    global _provider
+    if not TRACING_ENABLED:
+        return trace.NoOpTracer()
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                provider = TracerProvider(
+                    resource=Resource.create({"service.name": TRACING_SERVICE_NAME}),
+                    sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+                )
+                provider.add_span_processor(BatchSpanProcessor(_exporter()))
+                _provider = provider
+    return _provider.get_tracer("marketflow")
+
+
+class TracedJobStore:
+    """a job store whose method calls are DB spans"""
+
+    def __init__(self, store, system: str):
+        self._store = store
+        self._system = system
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._store, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def traced(*args, **kwargs):
+            with get_tracer().start_as_current_span(
+                f"db {name}", kind=SpanKind.CLIENT, attributes={"db.system": self._system, "db.operation": name}
+            ):
+                return attribute(*args, **kwargs)
+        return traced
+
+
+async def trace_request(request: Request, call_next):
+    """API middleware: the request span is the root of a job's trace, or continues the caller's (traceparent header)"""
+    with get_tracer().start_as_current_span(
+        f"{request.method} {request.url.path}", context=propagate.extract(request.headers), kind=SpanKind.SERVER,
+        attributes={"http.method": request.method, "http.target": request.url.path}
+    ) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            span.update_name(f"{request.method} {route.path}")
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+        return response
+
+
+# Celery signal handlers, connected in celery_app when tracing is enabled
+
+class _RequestGetter(Getter):
+    """custom message headers are attributes of task.request, eager calls keep them in request.headers"""
+
+    def get(self, carrier, key: str) -> Optional[List[str]]:
+        value = getattr(carrier, key, None)
+        if value is None and isinstance(getattr(carrier, "headers", None), dict):
+            value = carrier.headers.get(key)
+        return [value] if isinstance(value, str) else None
+
+    def keys(self, carrier) -> List[str]:
+        return []
+
+
+_request_getter = _RequestGetter()
+
+
+def inject_task_headers(headers=None, **kwargs) -> None:
+    """before_task_publish: the publisher's trace context goes along with the message"""
+    if headers is not None:
+        propagate.inject(headers)
+
+
+def start_task_span(task_id=None, task=None, args=None, **kwargs) -> None:
+    """task_prerun: the task runs in a span of the trace that published it"""
+    parent = propagate.extract(task.request, getter=_request_getter)
+    span = get_tracer().start_span(
+        f"run {task.name.rsplit('.', 1)[-1]}", context=parent, kind=SpanKind.CONSUMER,
+        attributes={"celery.task_name": task.name, "celery.task_id": task_id, "celery.retries": task.request.retries}
+    )
+    if args:
+        span.set_attribute("job.id", str(args[0]))
+    _task_spans[task_id] = (span, context.attach(trace.set_span_in_context(span)))
+
+
+def end_task_span(task_id=None, state=None, retval=None, **kwargs) -> None:
+    """task_postrun"""
+    started = _task_spans.pop(task_id, None)
+    if started is None:
+        return
+    span, token = started
+    span.set_attribute("celery.state", str(state))
+    if state == "FAILURE":
+        if isinstance(retval, BaseException):
+            span.record_exception(retval)
+        span.set_status(Status(StatusCode.ERROR, str(retval)))
+    context.detach(token)
+    span.end()
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import math
+import random
+import socket
+import time
+import httpx
+
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from src.config.settings import (
+    WEBHOOK_SECRET, WEBHOOK_ALLOW_PRIVATE_HOSTS, WEBHOOK_CONCURRENCY, WEBHOOK_TIMEOUT_SECONDS, WEBHOOK_BATCH_SIZE,
+    WEBHOOK_MAX_ATTEMPTS, WEBHOOK_RETRY_BASE_SECONDS, WEBHOOK_RETRY_MAX_SECONDS
+)
+from src.services.database.base_store import JobStore
+from src.services.database.job_schemas import WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+# a claimed batch must be sent before its lease runs out, even if every request times out
+LEASE_SECONDS = math.ceil(WEBHOOK_BATCH_SIZE / WEBHOOK_CONCURRENCY) * WEBHOOK_TIMEOUT_SECONDS + 60
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_client: Optional[httpx.AsyncClient] = None
+_unconfigured_reported = False
+
+
+def sign(body: bytes, timestamp: int, secret: str = WEBHOOK_SECRET) -> str:
+    """X-MarketFlow-Signature value: HMAC-SHA256 of "{timestamp}.{body}" """
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def check_callback_url(url: str) -> Optional[str]:
+    """
+    why a job's callback_url is refused, None if it is accepted: webhooks need a
+    secret to be signed with, and results are only posted to http(s) hosts whose
+    every address is public (no loopback, private, link-local or reserved ranges)
+    """
+    if not WEBHOOK_SECRET:
+        return "webhooks are not enabled on this server"
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return "only http and https URLs are accepted"
+    if WEBHOOK_ALLOW_PRIVATE_HOSTS:
+        return None
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, None, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, UnicodeError):
+        return f"host {parts.hostname} does not resolve"
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            return f"host {parts.hostname} is not a public address"
+    return None
+
+
+def retry_delay(attempts: int) -> float:
+    """exponential backoff after `attempts` failures, jittered so receivers coming back aren't stampeded"""
+    delay = min(WEBHOOK_RETRY_MAX_SECONDS, WEBHOOK_RETRY_BASE_SECONDS * 2 ** attempts)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def webhook_body(store: JobStore, delivery: WebhookDelivery) -> bytes:
+    """the final status and result, the stored result document is embedded as is"""
+    result = store.get_job_result(delivery.job_id) or "null"
+    fields = f'"job_id":{json.dumps(delivery.job_id)},"status":{json.dumps(delivery.status)}'
+    return ("{" + fields + ',"result":' + result + "}").encode("utf-8")
+
+
+async def _send(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, store: JobStore,
+                delivery: WebhookDelivery) -> str:
+    """one delivery attempt, returns delivered, retry or dead"""
+    body = await asyncio.to_thread(webhook_body, store, delivery)
+    timestamp = int(time.time())
+    headers = {
+        "Content-Type": "application/json",
+        "X-MarketFlow-Event": f"job.{delivery.status.lower()}",
+        "X-MarketFlow-Delivery": delivery.id,  # receivers dedupe on it, delivery is at least once
+        "X-MarketFlow-Timestamp": str(timestamp),
+        "X-MarketFlow-Signature": sign(body, timestamp, WEBHOOK_SECRET),
+    }
+
+    async with semaphore:
+        try:
+            response = await client.post(delivery.url, content=body, headers=headers)
+            error = None if response.is_success else f"HTTP {response.status_code}"
+            # the receiver rejected the request itself, sending it again won't help
+            permanent = 400 <= response.status_code < 500 and response.status_code not in (408, 429)
+        except httpx.HTTPError as e:
+            error, permanent = f"{type(e).__name__}: {e}", False
+
+    if error is None:
+        await asyncio.to_thread(store.finish_webhook, delivery, True)
+        logger.info(f"Webhook of job {delivery.job_id} delivered to {delivery.url}")
+        return "delivered"
+
+    attempts = delivery.attempts + 1
+    if permanent or attempts >= WEBHOOK_MAX_ATTEMPTS:
+        await asyncio.to_thread(store.finish_webhook, delivery, False, error)
+        logger.error(f"Webhook of job {delivery.job_id} to {delivery.url} failed for good after {attempts} attempts: {error}")
+        return "dead"
+    retry_at = time.time() + retry_delay(delivery.attempts)
+    await asyncio.to_thread(store.finish_webhook, delivery, False, error, retry_at)
+    logger.warning(f"Webhook of job {delivery.job_id} to {delivery.url} failed ({error}), attempt {attempts}")
+    return "retry"
+
+
+async def deliver_due(store: JobStore, client: httpx.AsyncClient) -> Dict[str, int]:
+    """send every due webhook, at most WEBHOOK_CONCURRENCY requests in flight"""
+    global _unconfigured_reported
+    counts = {"delivered": 0, "retry": 0, "dead": 0}
+    if not WEBHOOK_SECRET:
+        # never unsigned: queued deliveries wait until a secret is configured
+        if not _unconfigured_reported:
+            logger.error("WEBHOOK_SECRET is not set, webhooks are not delivered")
+            _unconfigured_reported = True
+        return counts
+    semaphore = asyncio.Semaphore(WEBHOOK_CONCURRENCY)
+    while True:
+        batch = await asyncio.to_thread(store.claim_webhooks, WEBHOOK_BATCH_SIZE, LEASE_SECONDS)
+        for outcome in await asyncio.gather(*(_send(client, semaphore, store, delivery) for delivery in batch)):
+            counts[outcome] += 1
+        if len(batch) < WEBHOOK_BATCH_SIZE:
+            return counts
+
+
+def new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=WEBHOOK_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=WEBHOOK_CONCURRENCY, max_keepalive_connections=WEBHOOK_CONCURRENCY),
+        follow_redirects=False,
+    )
+
+
+def run_delivery(store: JobStore) -> Dict[str, int]:
+    """
+    Blocking entry point for the periodic task. The event loop and the client's
+    connection pool live as long as the worker process, so keep-alive connections
+    to frequent receivers are reused across runs.
+    """
+    global _loop, _client
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        _client = new_client()
+    return _loop.run_until_complete(deliver_due(store, _client))
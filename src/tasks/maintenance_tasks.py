@@ -0,0 +1,32 @@
+import logging
+
+from src.config.settings import JOB_STORE_BACKEND
+from src.services.celery.celery_app import app
+from src.services.database.retention import purge_expired_jobs
+from src.services.database.job_store import get_event_stream, get_job_store
+from src.services.webhooks.delivery import run_delivery
+
+logger = logging.getLogger(__name__)
+
+@app.task(name='src.tasks.maintenance_tasks.purge_expired_jobs')
+def purge_expired_jobs_task():
+    """periodic retention run, scheduled by celery beat"""
+    if JOB_STORE_BACKEND != "sqlite":
+        # other backends expire terminal jobs themselves
+        logger.info(f"Retention skipped for {JOB_STORE_BACKEND} job store")
+        return None
+    report = purge_expired_jobs()
+    return report.to_dict()
+
+@app.task(name='src.tasks.maintenance_tasks.flush_event_streams')
+def flush_event_streams_task():
+    """batch-persist streamed job events into the job store"""
+    stream = get_event_stream()
+    if stream is None:
+        return 0
+    return stream.flush(get_job_store())
+
+@app.task(name='src.tasks.maintenance_tasks.deliver_webhooks')
+def deliver_webhooks_task():
+    """send due completion webhooks from the outbox"""
+    return run_delivery(get_job_store())
@@ -1,28 +1,166 @@
+import json
 import logging
+import time
 
-from src.config.logger import setup_logging
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+from celery.exceptions import SoftTimeLimitExceeded
+from crewai import CrewOutput
+from src.config.settings import PHASE_MAX_RETRIES, PHASE_RETRY_DELAY, TERMINAL_STATUSES, TRACING_ENABLED
+from src.core.crews.outputs import serialize_crew_output
 from src.core.flows.workflow import Workflow
-from src.services.llm.llm_service import LLMService
+from src.services.llm.model_registry import ModelRegistry
+from src.services.celery.admission import get_admission_controller
 from src.services.celery.celery_app import app
-from src.services.database.job_store import append_event_by_id, update_job_by_id
+from src.services.celery.profiling import StackSampler, save_profile
+from src.services.tracing.tracer import get_tracer
+from src.services.database.job_store import (
+    append_event_by_id, get_job_version, get_task_result, save_task_result, start_job_by_id, update_job_by_id
+)
 
 logger = logging.getLogger(__name__)
 
+if TRACING_ENABLED:
+    from src.services.tracing.crew_spans import install_crew_spans
+    install_crew_spans()
+
+# flow phases in order, each runs as its own Celery task (see celery_app task_routes)
+PHASES = ("analyze_market_crew", "create_content_crew")
+
+
+class PhaseError(Exception):
+    """a crew reported failure instead of raising"""
+
+
+def run_phase(job_id: str, input_data: Dict[str, Any], phase: str) -> Dict[str, Any]:
+    """
+    Run one Workflow phase and persist its output as the job's `phase` task result.
+    A phase whose output is already stored (redelivered or retried chain) is not run again.
+    """
+    stored = get_task_result(job_id, phase)
+    if stored is not None:
+        logger.info(f"Job {job_id} phase {phase} already done, reusing its output")
+        return json.loads(stored)
+
+    append_event_by_id(job_id, f"Phase {phase} started")
+    # jobs submitted with "profile": true run under the stack sampler, others pay nothing
+    sampler = StackSampler() if input_data.get("profile") else None
+    try:
+        with get_tracer().start_as_current_span(f"phase {phase}", attributes={"job.id": job_id}), \
+                sampler or nullcontext():
+            results = getattr(Workflow(job_id, ModelRegistry(), input_data), phase)()
+    finally:
+        if sampler is not None:
+            save_profile(job_id, phase, sampler)
+    if isinstance(results, CrewOutput):
+        results = serialize_crew_output(results)
+    if not isinstance(results, dict):
+        # crews report failures as "Error: ..." strings
+        raise PhaseError(str(results).removeprefix("Error: "))
+    save_task_result(job_id, phase, results)
+    append_event_by_id(job_id, f"Phase {phase} complete")
+    return results
+
+
+def fail_job(job_id: str, error: Exception, callback_url: Optional[str] = None) -> None:
+    if isinstance(error, SoftTimeLimitExceeded):
+        status, message = "TIMEOUT", "phase time limit exceeded"
+    else:
+        status, message = "ERROR", str(error) or "ERROR"
+    logger.error(f"Job {job_id} failed: {message}")
+    append_event_by_id(job_id, f"An error occurred: {message}")
+    update_job_by_id(job_id, status, "Error: {}".format(message), ["Flow Start Error"], callback_url=callback_url)
+
+
+def _finished(job_id: str, input_data: Dict[str, Any]) -> bool:
+    """
+    a job in a terminal status (cancelled, completed, failed) has nothing left to run;
+    only a cancelled one still holds its quota slot, the others released it when they ended
+    """
+    current = get_job_version(job_id)
+    if current is None or current[0] not in TERMINAL_STATUSES:
+        return False
+    logger.info(f"Job {job_id} is {current[0]}, skipping")
+    if current[0] == "CANCELLED":
+        get_admission_controller().release_client(job_id, input_data.get("client_id"))
+    return True
+
+
+def _start(job_id: str, input_data: Dict[str, Any]) -> bool:
+    """mark the job RUNNING, False when it must not run"""
+    if start_job_by_id(job_id):
+        return True
+    if not _finished(job_id, input_data):
+        logger.warning(f"Job {job_id} could not be marked RUNNING, skipping")
+    return False
+
+
+def _retry_or_fail(task, job_id: str, phase: str, error: Exception, input_data: Dict[str, Any]) -> None:
+    """phase-level retry; once retries are used up the job fails and the chain stops"""
+    # a phase that ran out of time would again, the job is marked TIMEOUT right away
+    if task.request.retries < task.max_retries and not isinstance(error, SoftTimeLimitExceeded):
+        append_event_by_id(job_id, f"Phase {phase} failed ({error}), retry {task.request.retries + 1}/{task.max_retries}")
+        raise task.retry(exc=error, countdown=PHASE_RETRY_DELAY)
+    fail_job(job_id, error, input_data.get("callback_url"))
+    get_admission_controller().release_client(job_id, input_data.get("client_id"))
+    raise error
+
+
+@app.task(bind=True, name='src.tasks.market_tasks.research_phase', max_retries=PHASE_MAX_RETRIES)
+def research_phase(self, job_id, input_data):
+    """market analysis, tool-bound: runs on the I/O oriented market_flow workers"""
+    if not _start(job_id, input_data):
+        return
+    if self.request.retries == 0:
+        append_event_by_id(job_id, "Flow Started")
+    admission = get_admission_controller()
+    admission.job_started(job_id)
+    started = time.perf_counter()
+    try:
+        run_phase(job_id, input_data, "analyze_market_crew")
+    except Exception as e:
+        logger.error(f"Error in research phase of job {job_id}", exc_info=True)
+        _retry_or_fail(self, job_id, "analyze_market_crew", e, input_data)
+    finally:
+        # the market_flow slot is free again, admission estimates from this duration
+        admission.job_finished(job_id, None, time.perf_counter() - started)
+
+
+@app.task(bind=True, name='src.tasks.market_tasks.content_phase', max_retries=PHASE_MAX_RETRIES)
+def content_phase(self, job_id, input_data):
+    """strategy, campaigns and copy, LLM-bound: runs on the content_generation workers"""
+    if _finished(job_id, input_data):
+        return
+    try:
+        results = run_phase(job_id, input_data, "create_content_crew")
+    except Exception as e:
+        logger.error(f"Error in content phase of job {job_id}", exc_info=True)
+        _retry_or_fail(self, job_id, "create_content_crew", e, input_data)
+        return
+    update_job_by_id(job_id, "COMPLETE", results, ["Flow complete"], callback_url=input_data.get("callback_url"))
+    get_admission_controller().release_client(job_id, input_data.get("client_id"))
+
+
 @app.task(name='src.tasks.market_tasks.kickoff_flow')
 def kickoff_flow(job_id, input_data):
+    """whole flow in one worker slot, for jobs submitted before the phase split"""
     logger.info(f"MarketFlow job {job_id} is starting")
 
-    results = None
-    llm_service = LLMService()
-    llm = llm_service.get_client()
-    
+    if not _start(job_id, input_data):
+        return
+    admission = get_admission_controller()
+    admission.job_started(job_id)
+    started = time.perf_counter()
+
     try:
         append_event_by_id(job_id, "Flow Started")
-        results = Workflow(job_id, llm, input_data).kickoff()
-        logger.info(f"Job {job_id} completed with results: {str(results)[:100]}...") 
-        update_job_by_id(job_id, "COMPLETE", str(results), ["Flow complete"])
+        for phase in PHASES:
+            results = run_phase(job_id, input_data, phase)
+        logger.info(f"Job {job_id} completed with results: {str(results)[:100]}...")
+        update_job_by_id(job_id, "COMPLETE", results, ["Flow complete"], callback_url=input_data.get("callback_url"))
     except Exception as e:
         logger.error(f"Error in kickoff_flow for job {job_id}", exc_info=True)
-        append_event_by_id(job_id, f"An error occurred: {e}")
-        update_job_by_id(job_id, "ERROR", "Error: {}".format(str(e)), ["Flow Start Error"])
+        fail_job(job_id, e, input_data.get("callback_url"))
         raise
+    finally:
+        admission.job_finished(job_id, input_data.get("client_id"), time.perf_counter() - started)
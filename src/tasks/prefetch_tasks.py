@@ -0,0 +1,20 @@
+import logging
+
+from src.core.crews.market_analyst.market_analyst import MarketAnalystCrew
+from src.core.flows.research_cache import normalize_domain, research_freshness
+from src.core.tools.prefetch import prefetch_research
+from src.services.celery.celery_app import app
+from src.services.database.job_store import get_research
+
+logger = logging.getLogger(__name__)
+
+@app.task(name='src.tasks.prefetch_tasks.prefetch_research')
+def prefetch_research_task(job_id, input_data):
+    """warm the shared tool cache while the job waits on the market_flow queue"""
+    domain = normalize_domain(input_data["customer_domain"])
+    freshness = research_freshness(get_research(domain), config_version=MarketAnalystCrew.current_config().version)
+    if not input_data.get("refresh_research") and freshness == "fresh":
+        # the job will reuse the stored research without any tool call
+        logger.info(f"Prefetch skipped for job {job_id}, research of {domain} is fresh")
+        return None
+    return prefetch_research(input_data["customer_domain"])
@@ -0,0 +1,15 @@
+"""
+Tests never touch the working copy's marketflow.db: DATABASE_PATH is bound as a
+default argument when the src modules are imported, so it is pointed at a
+throwaway file before any test module imports them.
+"""
+import os
+import shutil
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="marketflow-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(_db_dir, "marketflow.db")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_db_dir, ignore_errors=True)
@@ -0,0 +1,182 @@
+import heapq
+import random
+import statistics
+import threading
+import time
+import unittest
+
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api import routes
+from src.services.celery import admission
+from src.services.celery.admission import AdmissionController, estimate_wait
+from src.services.database.connection import initialize_database
+
+try:
+    import fakeredis
+except ImportError:  # fakeredis is a test-only dependency
+    fakeredis = None
+
+
+def simulate(arrival_rate: float, service_time: float, workers: int, max_wait: float, arrivals: int,
+             admission: bool = True, seed: int = 7) -> dict:
+    """
+    Discrete-event FIFO queue with `workers` servers and exponential job durations.
+    Every arrival is admitted or refused on estimate_wait from the queue state and
+    the mean of the last 50 durations, as the controller does.
+    """
+    rng = random.Random(seed)
+    now, busy, queue, finishes, durations = 0.0, 0, [], [], []
+    predicted, actual, refused = [], [], 0
+
+    def start(arrived: float, at: float) -> None:
+        nonlocal busy
+        busy += 1
+        actual.append(at - arrived)
+        duration = rng.expovariate(1 / service_time)
+        heapq.heappush(finishes, (at + duration, duration))
+
+    for _ in range(arrivals):
+        now += rng.expovariate(arrival_rate)
+        while finishes and finishes[0][0] <= now:
+            finished_at, duration = heapq.heappop(finishes)
+            durations = (durations + [duration])[-50:]
+            busy -= 1
+            if queue:
+                start(queue.pop(0), finished_at)
+        estimate = statistics.fmean(durations) if durations else service_time
+        wait = estimate_wait(len(queue), busy, workers, estimate)
+        if admission and wait > max_wait:
+            refused += 1
+            continue
+        predicted.append(wait)
+        if busy < workers:
+            start(now, now)
+        else:
+            queue.append(now)
+    return {"predicted": predicted[:len(actual)], "actual": actual, "refused": refused, "elapsed": now}
+
+
+class TestAdmissionModel(unittest.TestCase):
+    def test_estimate_wait(self):
+        """Free workers mean no wait, each job ahead adds service_time / workers"""
+        self.assertEqual(estimate_wait(0, 1, 2, 100), 0)
+        self.assertEqual(estimate_wait(0, 2, 2, 100), 50)
+        self.assertEqual(estimate_wait(3, 2, 2, 100), 200)
+
+    def test_simulated_overload(self):
+        """Under 1.5x overload the estimate tracks real waits and admission bounds them"""
+        params = dict(arrival_rate=1.5 * 2 / 100, service_time=100, workers=2, max_wait=600, arrivals=6000)
+        admitted = simulate(**params)
+        # predictions are unbiased over admitted jobs that started
+        self.assertAlmostEqual(
+            statistics.fmean(admitted["actual"]) / statistics.fmean(admitted["predicted"]), 1.0, delta=0.1
+        )
+        # waits stay near the limit and throughput stays at capacity (2 jobs per 100s)
+        self.assertLess(statistics.quantiles(admitted["actual"], n=20)[-1], 1.5 * 600)
+        throughput = len(admitted["actual"]) / admitted["elapsed"]
+        self.assertAlmostEqual(throughput, 2 / 100, delta=0.002)
+        self.assertGreater(admitted["refused"], 0.25 * 6000)
+
+        unbounded = simulate(**params, admission=False)
+        self.assertGreater(max(unbounded["actual"]), 20 * 600)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class TestAdmissionController(unittest.TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.controller = AdmissionController(client=self.redis, workers=2, max_wait=300, client_quota=2)
+
+    def fill_queue(self, depth: int) -> None:
+        for index in range(depth):
+            self.redis.lpush("market_flow", f"message-{index}")
+
+    def test_refuses_beyond_capacity(self):
+        """A job that would wait past max_wait is refused with the time to retry"""
+        for index in range(3):
+            self.controller.job_finished(f"old-{index}", None, 100)
+        self.controller.job_started("a")
+        self.controller.job_started("b")
+        self.fill_queue(5)
+        capacity = self.controller.snapshot()
+        self.assertEqual((capacity.queue_depth, capacity.in_flight, capacity.estimated_wait_s), (5, 2, 300))
+        self.assertTrue(self.controller.admit("job-1", "tenant").admitted)
+
+        self.fill_queue(1)
+        decision = self.controller.admit("job-2", "tenant")
+        self.assertEqual((decision.admitted, decision.reason), (False, "capacity"))
+        self.assertEqual((decision.estimated_wait_s, decision.retry_after_s), (350, 50))
+
+    def test_client_quota(self):
+        """One client can't hold more than its quota, finished jobs free it"""
+        self.assertTrue(self.controller.admit("job-1", "tenant").admitted)
+        self.assertTrue(self.controller.admit("job-2", "tenant").admitted)
+        decision = self.controller.admit("job-3", "tenant")
+        self.assertEqual((decision.admitted, decision.reason), (False, "client_quota"))
+        self.assertTrue(self.controller.admit("job-3", "other-tenant").admitted)
+
+        self.controller.job_started("job-1")
+        self.controller.job_finished("job-1", "tenant", 42)
+        self.assertTrue(self.controller.admit("job-4", "tenant").admitted)
+        self.assertEqual(self.controller.service_time(), 42)
+
+    def test_long_running_jobs_keep_their_quota(self):
+        """A job retrying its phases still counts, only entries older than any job can live are dropped"""
+        key = "marketflow:admission:client:tenant"
+        self.redis.zadd(key, {"retrying": time.time() - 300 - 3 * admission.TASK_TIME_LIMIT})
+        self.redis.zadd(key, {"lost": time.time() - self.controller.quota_window - 1})
+        self.assertTrue(self.controller.admit("job-1", "tenant").admitted)
+        self.assertEqual(self.controller.admit("job-2", "tenant").reason, "client_quota")
+        self.assertEqual(sorted(self.redis.zrange(key, 0, -1)), [b"job-1", b"retrying"])
+
+    def test_concurrent_admissions_respect_quota(self):
+        """Submissions racing for the client's last slots can't overshoot the quota"""
+        controller = AdmissionController(client=self.redis, workers=2, max_wait=300, client_quota=3)
+        barrier = threading.Barrier(12)
+        decisions = []
+
+        def submit(index: int) -> None:
+            barrier.wait()
+            decisions.append(controller.admit(f"job-{index}", "tenant"))
+
+        def slow_clock() -> float:
+            # every thread gets to read the quota before any of them writes
+            time.sleep(0.01)
+            return time.time()
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(12)]
+        with patch.object(admission, "time", SimpleNamespace(time=slow_clock)):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sum(decision.admitted for decision in decisions), 3)
+        self.assertEqual({decision.reason for decision in decisions if not decision.admitted}, {"client_quota"})
+        self.assertEqual(self.redis.zcard("marketflow:admission:client:tenant"), 3)
+
+    def test_routes(self):
+        """Refused submissions get a 429 with Retry-After, capacity is exposed"""
+        initialize_database()
+        app = FastAPI()
+        app.include_router(routes.flow_router, prefix="/api")
+        client = TestClient(app)
+        body = {"customer_domain": "stridewell.example", "project_description": "Metro 3 launch"}
+        with patch.object(routes, "get_admission_controller", return_value=self.controller), \
+                patch.object(routes, "_send_prefetch"), patch.object(routes, "_send_flow") as send_flow:
+            for _ in range(2):
+                self.assertEqual(client.post("/api/marketflow", json=body, headers={"X-Client-ID": "t"}).status_code, 200)
+            response = client.post("/api/marketflow", json=body, headers={"X-Client-ID": "t"})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers["Retry-After"], "180")
+            self.assertEqual(response.json()["detail"]["reason"], "client_quota")
+            self.assertEqual(send_flow.call_args.args[1]["client_id"], "t")
+
+            capacity = client.get("/api/capacity").json()
+            self.assertEqual((capacity["workers"], capacity["accepting"]), (2, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
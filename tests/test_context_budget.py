@@ -0,0 +1,54 @@
+import json
+import unittest
+
+from crewai import Task, TaskOutput
+from src.core.crews.context_budget import (
+    estimate_tokens, condense_text, project_structured, apply_context_budget, task_metrics
+)
+
+REPORT = "\n".join(
+    [f"Acme sells running shoes to urban runners, sentence {i}." for i in range(40)]
+    + ["Cookie banner. Accept all. Navigation home about contact."] * 10
+)
+
+
+class TestContextBudget(unittest.TestCase):
+    def test_short_text_unchanged(self):
+        """Text within budget is passed through"""
+        self.assertEqual(condense_text("short context", 100), "short context")
+
+    def test_condense_text_fits_budget(self):
+        """Extractive condensation respects the budget and keeps relevant sentences"""
+        condensed = condense_text(REPORT, 100)
+        self.assertLessEqual(estimate_tokens(condensed), 100)
+        self.assertIn("running shoes", condensed)
+        self.assertNotIn("Cookie banner", condensed)
+
+    def test_project_structured(self):
+        """Structured outputs are projected to compact JSON within budget"""
+        data = {"name": "Plan", "description": "word " * 500, "tactics": ["SEO"], "kpis": []}
+        document = project_structured(data, 60)
+        self.assertLessEqual(estimate_tokens(document), 60)
+        projected = json.loads(document)
+        self.assertEqual(projected["name"], "Plan")
+        self.assertNotIn("kpis", projected)
+
+    def test_apply_context_budget(self):
+        """Downstream tasks see a condensed copy, the original output is untouched"""
+        task = Task(name="project_research_task", description="Research", expected_output="Report")
+        output = TaskOutput(name=task.name, description="Research", raw=REPORT, agent="strategist")
+        task.output = output
+
+        tokens = apply_context_budget(task, output, max_tokens=100)
+        self.assertLessEqual(tokens, 100)
+        self.assertIsNot(task.output, output)
+        self.assertEqual(output.raw, REPORT)
+        self.assertEqual(task_metrics(task)["output_tokens"], tokens)
+
+    def test_disabled_budget(self):
+        """A zero budget disables condensation"""
+        task = Task(description="Research", expected_output="Report")
+        output = TaskOutput(description="Research", raw=REPORT, agent="strategist")
+        task.output = output
+        apply_context_budget(task, output, max_tokens=0)
+        self.assertIs(task.output, output)
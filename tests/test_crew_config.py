@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest.mock import patch
+from src.core.crews import config_registry
+from src.core.crews.config_registry import CREW_CONFIG_TASK, CrewConfigError, CrewConfigRegistry, stamp_job
+from src.core.crews.content_creator.content_creator import ContentCreatorCrew
+from src.core.crews.market_analyst.market_analyst import MarketAnalystCrew
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.database.job_store import get_job_by_id, get_task_result
+from src.services.llm.model_registry import ModelRegistry
+
+CONFIG_DIR = Path(__file__).resolve().parents[1] / "src/core/crews/market_analyst/config"
+INPUTS = {"customer_domain": "stridewell.example", "project_description": "Metro 3 launch", "prior_research": ""}
+
+
+class TestCrewConfigRegistry(unittest.TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+        for name in ("agents.yaml", "tasks.yaml"):
+            shutil.copy(CONFIG_DIR / name, self.dir / name)
+        self.registry = CrewConfigRegistry(reload_seconds=0)
+        self.registry.register("analyst", self.dir / "agents.yaml", self.dir / "tasks.yaml", INPUTS)
+
+    def edit(self, name: str, old: str, new: str):
+        path = self.dir / name
+        path.write_text(path.read_text().replace(old, new))
+        # a new mtime even within the file system's timestamp granularity
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_compiled_once(self):
+        """Templates are parsed and their placeholders found once, crews get their own copy of the entries"""
+        config = self.registry.get("analyst")
+        self.assertRegex(config.version, r"^[0-9a-f]{12}$")
+        self.assertEqual(config.placeholders["task.research_task.description"],
+                         ("customer_domain", "project_description", "prior_research"))
+        with patch.object(config_registry.yaml, "safe_load") as safe_load:
+            self.assertIs(self.registry.get("analyst"), config)
+        safe_load.assert_not_called()
+
+        tasks = config.tasks_config()
+        tasks["research_task"]["agent"] = object()
+        self.assertEqual(config.tasks["research_task"]["agent"], "lead_market_analyst")
+
+    def test_hot_reload(self):
+        """An edited file is swapped in as a new version, layout and comments don't make one"""
+        first = self.registry.get("analyst")
+        self.edit("agents.yaml", "lead market analyst", "senior market analyst")
+        second = self.registry.get("analyst")
+        self.assertNotEqual(second.version, first.version)
+        self.assertEqual(second.agents["lead_market_analyst"]["role"].strip(), "senior market analyst")
+        self.assertEqual(first.agents["lead_market_analyst"]["role"].strip(), "lead market analyst")
+
+        self.edit("agents.yaml", "lead_market_analyst:", "# reviewed\nlead_market_analyst:")
+        self.assertEqual(self.registry.get("analyst").version, second.version)
+
+    def test_invalid_edit_keeps_current_version(self):
+        current = self.registry.get("analyst")
+        self.edit("tasks.yaml", "{project_description}", "{project_budget}")
+        with self.assertLogs(config_registry.logger, "ERROR") as logs:
+            self.assertIs(self.registry.get("analyst"), current)
+        self.assertIn("{project_budget}", logs.output[0])
+        self.assertIs(self.registry.get("analyst"), current)
+
+    def test_invalid_config_is_rejected(self):
+        self.edit("tasks.yaml", "agent: lead_market_analyst", "agent: lead_analyst")
+        with self.assertRaisesRegex(CrewConfigError, "unknown agent lead_analyst"):
+            self.registry.get("analyst")
+
+    def test_crews_use_registry(self):
+        """Crews are created from the registry's version without reading their YAML"""
+        MarketAnalystCrew.current_config(), ContentCreatorCrew.current_config()
+        with patch("crewai.project.crew_base.yaml.safe_load") as crew_base_load, \
+                patch.object(config_registry.yaml, "safe_load") as registry_load:
+            crew = MarketAnalystCrew("config-job", ModelRegistry(), INPUTS)
+            content_crew = ContentCreatorCrew("config-job", ModelRegistry(), INPUTS)
+        crew_base_load.assert_not_called()
+        registry_load.assert_not_called()
+        self.assertIs(crew.crew_config, MarketAnalystCrew.current_config())
+        self.assertEqual(crew.agents_config["lead_market_analyst"]["llm_profile"], "fast")
+        self.assertIn("creative_director", content_crew.agents_config)
+
+
+class TestJobStamp(unittest.TestCase):
+    def setUp(self):
+        initialize_database()
+        with get_db_connection() as conn:
+            for table in ("events", "task_results", "jobs"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+
+    def test_versions_of_each_crew(self):
+        stamp_job("stamped_job", "MarketAnalystCrew", "e47bfef09f5e")
+        stamp_job("stamped_job", "ContentCreatorCrew", "cac567972b40")
+        self.assertEqual(json.loads(get_task_result("stamped_job", CREW_CONFIG_TASK)),
+                         {"MarketAnalystCrew": "e47bfef09f5e", "ContentCreatorCrew": "cac567972b40"})
+        self.assertEqual(get_job_by_id("stamped_job").events[-1].data,
+                         "Crew config: ContentCreatorCrew version cac567972b40")
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import pytest
+import redis
+
+from src.services.database.sqlite_store import SQLiteJobStore
+from src.services.database.event_stream import EventStream
+
+fakeredis = pytest.importorskip("fakeredis")
+
+@pytest.fixture
+def store():
+    """Fixture providing a durable SQLite job store"""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    backend = SQLiteJobStore(path)
+    backend.initialize()
+    yield backend
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+@pytest.fixture
+def stream():
+    return EventStream(client=fakeredis.FakeRedis(), maxlen=100)
+
+def test_append_is_pending_until_flushed(store, stream):
+    """Test streamed events are readable before they are persisted"""
+    stream.append("job_1", "Flow Started")
+    stream.append("job_1", "research done")
+    assert store.get_job("job_1") is None
+    assert [event.data for event in stream.pending_events("job_1")] == ["Flow Started", "research done"]
+
+    assert stream.flush(store) == 2
+    assert [event.data for event in store.get_job("job_1").events] == ["Flow Started", "research done"]
+    assert stream.pending_events("job_1") == []
+    assert [event.data for event in stream.recent_events("job_1", count=1)] == ["research done"]
+
+def test_flush_is_incremental(store, stream):
+    """Test entries are persisted exactly once across flushes"""
+    stream.append("job_2", "first")
+    stream.flush(store)
+    stream.append("job_2", "second")
+    assert stream.flush(store) == 1
+    assert stream.flush(store) == 0
+    assert [event.data for event in store.get_job("job_2").events] == ["first", "second"]
+
+def test_failed_flush_stays_pending(store, stream, monkeypatch):
+    """Test a failing durable write keeps the job pending"""
+    stream.append("job_3", "event")
+    def broken(job_id, events):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(store, "append_events", broken)
+    with pytest.raises(RuntimeError):
+        stream.flush_job(store, "job_3")
+    monkeypatch.undo()
+    assert stream.flush(store) == 1
+
+def test_job_store_routes_events_through_stream(store, stream, monkeypatch):
+    """Test the job_store facade appends to the stream and flushes on completion"""
+    from src.services.database import job_store
+    monkeypatch.setattr(job_store, "get_event_stream", lambda: stream)
+    monkeypatch.setattr(job_store, "get_job_store", lambda: store)
+
+    job_store.append_event_by_id("job_4", "Flow Started")
+    job = job_store.get_job_by_id("job_4")
+    assert job.status == "STARTED"
+    assert [event.data for event in job.events] == ["Flow Started"]
+
+    assert job_store.update_job_by_id("job_4", "COMPLETE", "done", ["Flow complete"])
+    assert [event.data for event in job_store.get_job_by_id("job_4").events] == ["Flow Started", "Flow complete"]
+    assert stream.recent_events("job_4") == []
+
+def test_discard_keeps_unpersisted_entries(store, stream):
+    """Test discard drops persisted entries only, the rest waits for the next flush"""
+    stream.append("job_5", "first")
+    stream.flush(store)
+    stream.append("job_5", "late")
+    stream.discard("job_5")
+    assert [event.data for event in stream.recent_events("job_5")] == ["late"]
+    assert stream.flush(store) == 1
+    assert [event.data for event in store.get_job("job_5").events] == ["first", "late"]
+
+    stream.discard("job_5")
+    assert stream.client.keys("marketflow:events:*job_5") == []
+
+def test_discard_retries_after_concurrent_flush(store, stream, monkeypatch):
+    """Test a flush moving the offset while discard checks it makes discard start over"""
+    stream.append("job_8", "first")
+    stream.flush(store)
+    stream.append("job_8", "late")
+    xrevrange = redis.client.Pipeline.xrevrange
+
+    def flush_first(pipe, *args, **kwargs):
+        monkeypatch.setattr(redis.client.Pipeline, "xrevrange", xrevrange)
+        stream.flush_job(store, "job_8")
+        return xrevrange(pipe, *args, **kwargs)
+    monkeypatch.setattr(redis.client.Pipeline, "xrevrange", flush_first)
+
+    stream.discard("job_8")
+    assert stream.client.keys("marketflow:events:*job_8") == []
+    assert [event.data for event in store.get_job("job_8").events] == ["first", "late"]
+
+def test_stream_keys_expire(store, stream):
+    """Test streams that are never discarded expire"""
+    stream.append("job_6", "event")
+    stream.flush(store)
+    assert 0 < stream.client.ttl("marketflow:events:job_6") <= stream.ttl
+    assert 0 < stream.client.ttl("marketflow:events:offset:job_6") <= stream.ttl
+
+def test_final_update_survives_flush_failure(store, stream, monkeypatch):
+    """Test a failing flush is logged, the final status is still stored and no event is lost"""
+    from src.services.database import job_store
+    monkeypatch.setattr(job_store, "get_event_stream", lambda: stream)
+    monkeypatch.setattr(job_store, "get_job_store", lambda: store)
+    store.create_job("job_7")
+    stream.append("job_7", "Flow Started")
+
+    def broken(job_id, events):
+        raise RuntimeError("database is locked")
+    with monkeypatch.context() as patched:
+        patched.setattr(store, "append_events", broken)
+        assert job_store.update_job_by_id("job_7", "COMPLETE", "done", ["Flow complete"])
+    assert store.get_job("job_7").status == "COMPLETE"
+    assert [event.data for event in stream.pending_events("job_7")] == ["Flow Started"]
+    assert stream.flush(store) == 1
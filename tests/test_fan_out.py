@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+import unittest
+
+from unittest.mock import patch
+from crewai import CrewOutput, TaskOutput
+from crewai.tasks.output_format import OutputFormat
+from src.core.crews.fan_out import fan_out
+from src.core.crews.content_creator.content_creator import ContentCreatorCrew
+from src.services.llm.model_registry import ModelRegistry
+
+CAMPAIGNS = [
+    {"name": f"Campaign {index}", "description": "", "audience": "Commuters", "channel": "Events"}
+    for index in range(5)
+]
+
+
+class TestFanOut(unittest.TestCase):
+    def test_results_keep_unit_order(self):
+        """Merged results follow the order of the units, not completion order"""
+        results = fan_out([0.03, 0.0, 0.01], lambda index, delay: time.sleep(delay) or {"unit": index}, max_workers=3)
+        self.assertEqual([result.data for result in results], [{"unit": 0}, {"unit": 1}, {"unit": 2}])
+
+    def test_concurrency_limit(self):
+        """No more than max_workers units run at once"""
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def run_unit(index, unit):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return {}
+
+        fan_out(list(range(8)), run_unit, max_workers=2)
+        self.assertEqual(peak[0], 2)
+
+    def test_failed_unit_retried_alone(self):
+        """A failing unit is retried without re-running the others"""
+        calls = []
+
+        def run_unit(index, unit):
+            calls.append(index)
+            if index == 1 and calls.count(1) == 1:
+                raise TimeoutError("LLM timeout")
+            return {"unit": index}
+
+        results = fan_out([0, 1, 2], run_unit, max_workers=1, attempts=2)
+        self.assertEqual(sorted(calls), [0, 1, 1, 2])
+        self.assertEqual(results[1].data, {"unit": 1})
+        self.assertEqual(results[1].attempts, 2)
+
+    def test_unit_failure_reported(self):
+        """Units failing every attempt are reported, the others still succeed"""
+        def run_unit(index, unit):
+            if index == 0:
+                raise ValueError("invalid content")
+            return {"unit": index}
+
+        results = fan_out([0, 1], run_unit, attempts=2)
+        self.assertIsNone(results[0].data)
+        self.assertIn("invalid content", results[0].error)
+        self.assertEqual(results[1].data, {"unit": 1})
+
+
+@patch("src.core.crews.content_creator.content_creator.save_task_result")
+@patch("src.core.crews.content_creator.content_creator.append_event_by_id")
+class TestContentFanOut(unittest.TestCase):
+    def setUp(self):
+        self.crew = ContentCreatorCrew("fan-out-job", ModelRegistry(), {
+            "customer_domain": "stridewell.example", "project_description": "Metro 3 launch"
+        })
+
+    def crew_output(self, json_dict, raw="campaigns"):
+        task_output = TaskOutput(
+            description="campaigns", name="campaign_development_task", raw=raw, json_dict=json_dict,
+            agent="creative director", output_format=OutputFormat.JSON
+        )
+        return CrewOutput(raw=raw, tasks_output=[task_output])
+
+    def test_contents_merged_per_campaign(self, mock_event, mock_save):
+        """Every campaign gets its own content unit, merged into a list"""
+        def produce(index, campaign):
+            if index == 2:
+                raise ValueError("no valid ContentProduction")
+            return {"name": campaign["name"], "title": "t", "body": "b" * 50, "description": ""}
+
+        with patch.object(self.crew, "produce_content", side_effect=produce) as mock_produce:
+            with self.assertRaisesRegex(ValueError, "no content for campaign 3 of 5"):
+                self.crew.produce_contents(self.crew_output({"campaigns": CAMPAIGNS}))
+        self.assertEqual(mock_produce.call_count, 5 + 1)  # one retry of the failed campaign
+        self.assertNotIn("content_production_task", [call.args[1] for call in mock_save.call_args_list])
+
+        with patch.object(self.crew, "produce_content", side_effect=lambda index, campaign: {"name": campaign["name"]}):
+            production = self.crew.produce_contents(self.crew_output({"campaigns": CAMPAIGNS}))
+        self.assertEqual([content["name"] for content in production["contents"]],
+                         [campaign["name"] for campaign in CAMPAIGNS])
+        mock_save.assert_called_with("fan-out-job", "content_production_task", production)
+
+    def test_unstructured_campaigns_single_unit(self, mock_event, mock_save):
+        """A campaign answer that couldn't be structured is produced as one unit"""
+        with patch.object(self.crew, "produce_content", return_value={"title": "t"}) as mock_produce:
+            self.crew.produce_contents(self.crew_output(None, raw="Five ideas in prose"))
+        mock_produce.assert_called_once_with(0, {"description": "Five ideas in prose"})
+
+    @patch("src.core.crews.content_creator.content_creator.get_task_result")
+    def test_stored_unit_not_regenerated(self, mock_get, mock_event, mock_save):
+        """Copy stored by an earlier attempt is reused for the same campaign only, wherever it is listed"""
+        stored = {}
+        mock_get.side_effect = lambda job_id, unit: stored.get(unit)
+        mock_save.side_effect = lambda job_id, unit, data: stored.__setitem__(unit, json.dumps(data))
+        copy = {"name": "Campaign 0", "description": "", "title": "for campaign 0", "body": "b" * 50}
+        with patch.object(self.crew, "content_production_task") as mock_task:
+            mock_task.return_value.execute_sync.return_value = TaskOutput(
+                description="copy", name="content_production_task", raw="copy", agent="creative director",
+                json_dict=copy, output_format=OutputFormat.JSON
+            )
+            self.crew.produce_content(0, CAMPAIGNS[0])
+            self.assertEqual(self.crew.produce_content(3, CAMPAIGNS[0]), copy)
+            self.assertEqual(mock_task.call_count, 1)
+
+            # a retried phase developed another campaign at the same position
+            self.crew.produce_content(0, CAMPAIGNS[1])
+            self.assertEqual(mock_task.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
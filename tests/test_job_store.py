@@ -1,3 +1,4 @@
+import json
 import unittest
 from unittest.mock import MagicMock, patch
 import sqlite3
@@ -9,7 +10,9 @@ from datetime import datetime
 from typing import List
 from src.services.database.job_schemas import Job, Event
 from src.services.database.connection import get_db_connection, initialize_database
-from src.services.database.job_store import append_event_by_id, update_job_by_id, get_job_by_id
+from src.services.database.job_store import (
+    append_event_by_id, update_job_by_id, get_job_by_id, get_job_result, save_task_result, get_task_result
+)
 
 
 class TestJobFunctions(unittest.TestCase):
@@ -46,6 +49,7 @@ class TestJobFunctions(unittest.TestCase):
         with get_db_connection() as conn:
             # Must delete in correct order due to foreign key constraints
             conn.execute("DELETE FROM events")  # Child table first
+            conn.execute("DELETE FROM task_results")
             conn.execute("DELETE FROM jobs")   # Parent table last
             conn.commit()
 
@@ -133,3 +137,44 @@ class TestJobFunctions(unittest.TestCase):
         # print(job.events[0].data)
         self.assertEqual(job.events[0].data, "initial_event")
 
+    def test_large_result_roundtrip(self):
+        """large results are stored compressed and loaded lazily"""
+        append_event_by_id("test_job_5", "initial_event")
+        large_result = "campaign copy " * 2000
+        large_event = "scraped page " * 2000
+        update_job_by_id("test_job_5", "COMPLETE", large_result, [large_event])
+
+        with get_db_connection() as conn:
+            row = conn.execute(
+                "SELECT result, result_ref FROM jobs WHERE job_id = ?", ("test_job_5",)
+            ).fetchone()
+            self.assertEqual(row[0], "")
+            self.assertIsNotNone(row[1])
+
+        job = get_job_by_id("test_job_5")
+        self.assertEqual(job.result, large_result)
+        self.assertEqual(job.events[-1].data, large_event)
+
+        job = get_job_by_id("test_job_5", include_result=False)
+        self.assertIsNone(job.result)
+        self.assertEqual(get_job_result("test_job_5"), json.dumps(large_result))
+
+    def test_structured_result(self):
+        """dict results are stored once as JSON documents"""
+        append_event_by_id("test_job_6", "initial_event")
+        result = {"output": {"name": "Launch", "title": "Hello"}, "tasks": {}}
+        update_job_by_id("test_job_6", "COMPLETE", result, [])
+
+        job = get_job_by_id("test_job_6")
+        self.assertEqual(job.result_type, "json")
+        self.assertEqual(json.loads(job.result), result)
+        self.assertEqual(json.loads(get_job_result("test_job_6")), result)
+
+    def test_task_result(self):
+        """per-task results are upserted and retrieved by task name"""
+        append_event_by_id("test_job_7", "initial_event")
+        self.assertTrue(save_task_result("test_job_7", "marketing_strategy_task", {"name": "v1"}))
+        self.assertTrue(save_task_result("test_job_7", "marketing_strategy_task", {"name": "v2"}))
+
+        self.assertEqual(json.loads(get_task_result("test_job_7", "marketing_strategy_task")), {"name": "v2"})
+        self.assertIsNone(get_task_result("test_job_7", "unknown_task"))
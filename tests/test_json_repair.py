@@ -0,0 +1,96 @@
+import json
+import os
+import unittest
+
+from unittest.mock import MagicMock, patch
+from src.services.llm import models
+from src.services.llm.json_repair import (
+    parse_json_object, repair_output, RepairStats, RepairingConverter, converter_with_stats
+)
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "llm_outputs", "malformed.jsonl")
+
+
+def load_corpus():
+    with open(CORPUS, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestJsonRepair(unittest.TestCase):
+    def test_corpus(self):
+        """Every repairable answer in the corpus is repaired locally, the rest is left to the LLM"""
+        for case in load_corpus():
+            with self.subTest(case=case["case"]):
+                model = getattr(models, case["model"])
+                repaired = repair_output(case["text"], model)
+                if case["repairable"]:
+                    self.assertIsInstance(repaired, model)
+                else:
+                    self.assertIsNone(repaired)
+
+    def test_title_truncated_to_max_length(self):
+        """Over-long titles are cut at a word boundary within max_length"""
+        case = next(case for case in load_corpus() if case["case"] == "title_too_long")
+        repaired = repair_output(case["text"], models.ContentProduction)
+        self.assertLessEqual(len(repaired.title), 100)
+        self.assertTrue(repaired.title.startswith("Meet the Metro 3"))
+        self.assertFalse(repaired.title.endswith(" "))
+
+    def test_values_preserved(self):
+        """Repair does not alter content it doesn't have to"""
+        data = parse_json_object("{'name': 'It\\'s \"on\"', 'kpis': ['CAC', 'ROAS'], 'score': 1e3}")
+        self.assertEqual(data, {"name": 'It\'s "on"', "kpis": ["CAC", "ROAS"], "score": 1000.0})
+
+    def test_list_split(self):
+        """List fields given as bullet text become lists"""
+        case = next(case for case in load_corpus() if case["case"] == "list_as_string")
+        repaired = repair_output(case["text"], models.MarketStrategy)
+        self.assertEqual(repaired.tactics, ["Run clubs", "Influencer seeding", "Email drip"])
+        self.assertEqual(repaired.kpis, ["CAC", "ROAS"])
+
+    def test_converter_repairs_without_llm_call(self):
+        """The converter returns the repaired JSON and never re-asks the LLM"""
+        stats = RepairStats()
+        converter = converter_with_stats(stats)(
+            text="{'name': 'Run', 'audience': 'Commuters', 'channel': 'Events'}",
+            llm=None, model=models.CampaignDevelopment, instructions=""
+        )
+        with patch("crewai.utilities.converter.Converter.to_json") as reask:
+            result = json.loads(converter.to_json())
+        reask.assert_not_called()
+        self.assertEqual(result["audience"], "Commuters")
+        self.assertEqual(stats.snapshot(), {"repaired": 1, "retried": 0, "retry_failed": 0})
+        # per-job stats don't leak into the shared default
+        self.assertEqual(RepairingConverter.stats.snapshot()["repaired"], 0)
+
+    def test_converter_falls_back_to_retry(self):
+        """Unrepairable answers go to the LLM re-ask and are counted"""
+        stats = RepairStats()
+        converter = converter_with_stats(stats)(
+            text="no structured answer", llm=None, model=models.CampaignDevelopment, instructions=""
+        )
+        with patch("crewai.utilities.converter.Converter.to_json", return_value='{"name": "x"}') as reask:
+            converter.to_json()
+        reask.assert_called_once()
+        self.assertEqual(stats.snapshot(), {"repaired": 0, "retried": 1, "retry_failed": 0})
+
+    def test_llm_retries_counted_once(self):
+        """Converter's own retries don't repeat the repair nor inflate the counts"""
+        llm = MagicMock()
+        llm.supports_function_calling.return_value = False
+        llm.call.side_effect = RuntimeError("rate limited")
+        stats = RepairStats()
+        converter = converter_with_stats(stats)(
+            text="no structured answer", llm=llm, model=models.CampaignDevelopment, instructions="", max_attempts=3
+        )
+        with patch("src.services.llm.json_repair.repair_output", return_value=None) as repair:
+            converter.to_json()
+            with self.assertRaises(Exception):
+                converter.to_pydantic()
+        self.assertEqual(repair.call_count, 2)
+        self.assertEqual(llm.call.call_count, 6)
+        self.assertEqual(stats.snapshot(), {"repaired": 0, "retried": 2, "retry_failed": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+import unittest
+
+from unittest.mock import patch
+from src.config import logger as log_config
+from src.config.logger import JsonFormatter, SamplingFilter, TruncatingFilter, setup_logging, stop_logging
+
+
+def make_record(message: str, level: int = logging.INFO, lineno: int = 10) -> logging.LogRecord:
+    return logging.LogRecord("src.test", level, "/src/test.py", lineno, message, None, None)
+
+
+class TestLogging(unittest.TestCase):
+    def test_truncation(self):
+        """Long messages are cut before they are queued"""
+        record = make_record("x" * 50)
+        TruncatingFilter(max_chars=10).filter(record)
+        self.assertEqual(record.getMessage(), "x" * 10 + "... [40 chars truncated]")
+
+    def test_sampling_per_call_site(self):
+        """High-rate INFO lines are sampled, warnings never are"""
+        sampler = SamplingFilter(burst=3)
+        passed = [sampler.filter(make_record("event")) for _ in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+        self.assertTrue(sampler.filter(make_record("other line", lineno=11)))
+        self.assertTrue(sampler.filter(make_record("boom", level=logging.WARNING)))
+
+        with patch.object(log_config.time, "monotonic", return_value=log_config.time.monotonic() + 2):
+            record = make_record("event")
+            self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.suppressed, 7)
+
+    def test_json_format(self):
+        """Records are rendered as one JSON object per line"""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("src.test", logging.ERROR, "/src/test.py", 3, "failed %s", ("job",), True)
+            record.exc_info = sys.exc_info()
+        document = json.loads(JsonFormatter().format(record))
+        self.assertEqual((document["level"], document["message"], document["location"]), ("ERROR", "failed job", "test.py:3"))
+        self.assertIn("ValueError: boom", document["exception"])
+
+    def test_dropped_records_reported(self):
+        """Records dropped on a full queue are counted in a warning from the writer thread"""
+        log_queue = queue.Queue(1)
+        written = logging.handlers.BufferingHandler(capacity=100)
+        listener = log_config._Listener(log_queue, written, report_seconds=0.05)
+        handler = log_config._QueueHandler(log_queue)
+        for index in range(3):
+            handler.handle(make_record(f"event {index}"))
+        listener.start()
+        time.sleep(0.2)
+        listener.stop()
+        messages = [record.getMessage() for record in written.buffer]
+        self.assertEqual(messages[0], "event 0")
+        self.assertEqual(len(messages), 2)
+        self.assertRegex(messages[1], r"^2 log records dropped in the last \d+s, the log queue was full$")
+
+    def test_pipeline_writes_json_file(self):
+        """Records go through the queue listener to the JSON log file"""
+        root_handlers = logging.getLogger().handlers[:]
+        src_handlers = logging.getLogger("src").handlers[:]
+        with tempfile.TemporaryDirectory() as log_dir, patch.object(log_config, "LOG_DIR", log_dir):
+            try:
+                setup_logging()
+                logging.getLogger("src.test").info("payload %s", "y" * 5000)
+                logging.getLogger("src.test").debug("not logged at INFO")
+            finally:
+                stop_logging()
+                logging.getLogger().handlers = root_handlers
+                logging.getLogger("src").handlers = src_handlers
+            with open(os.path.join(log_dir, "marketflow.log"), encoding="utf8") as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0]["message"].endswith("chars truncated]"))
+
+
+if __name__ == "__main__":
+    unittest.main()
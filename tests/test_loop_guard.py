@@ -0,0 +1,76 @@
+import unittest
+
+from typing import Any
+from crewai.tools import BaseTool
+from src.core.tools.loop_guard import ToolGuard, ToolUsageStats, GuardedTool
+
+
+class CountingSearchTool(BaseTool):
+    name: str = "Search the internet"
+    description: str = "Search the internet for a query."
+    calls: int = 0
+
+    def _run(self, search_query: str) -> Any:
+        self.calls += 1
+        return f"results for {search_query}"
+
+
+class TestLoopGuard(unittest.TestCase):
+    def setUp(self):
+        self.stats = ToolUsageStats()
+        self.tool = CountingSearchTool()
+
+    def test_wrapped_tool_keeps_interface(self):
+        """Agents see the same tool name, description and arguments"""
+        guarded = ToolGuard(self.stats).wrap([self.tool])[0]
+        self.assertIsInstance(guarded, GuardedTool)
+        self.assertEqual(guarded.name, self.tool.name)
+        self.assertEqual(guarded.description, self.tool.description)
+        self.assertIn("search_query", guarded.args_schema.model_fields)
+
+    def test_repeated_call_answered_from_first_result(self):
+        """Identical calls (up to case and whitespace) don't run the tool again"""
+        guarded = ToolGuard(self.stats, repeat_limit=3).wrap([self.tool])[0]
+        first = guarded.run(search_query="Stridewell competitors")
+        second = guarded.run(search_query="  stridewell   COMPETITORS")
+        self.assertEqual(self.tool.calls, 1)
+        self.assertTrue(second.startswith(first))
+        self.assertIn("Cached", second)
+
+    def test_repeat_limit_forces_final_answer(self):
+        """After the repeat limit the agent is told to give its final answer"""
+        guarded = ToolGuard(self.stats, repeat_limit=2).wrap([self.tool])[0]
+        for _ in range(3):
+            result = guarded.run(search_query="Stridewell")
+        self.assertIn("give your Final Answer now", result)
+        self.assertEqual(self.tool.calls, 1)
+
+    def test_call_budget(self):
+        """Calls over the per-agent budget are refused without running the tool"""
+        guarded = ToolGuard(self.stats, max_calls=2).wrap([self.tool])[0]
+        guarded.run(search_query="a")
+        guarded.run(search_query="b")
+        result = guarded.run(search_query="c")
+        self.assertEqual(self.tool.calls, 2)
+        self.assertIn("budget of 2 calls is used up", result)
+
+    def test_stats_count_wasted_iterations(self):
+        """Repeats and refused calls are counted as wasted iterations for the job"""
+        guarded = ToolGuard(self.stats, max_calls=2).wrap([self.tool])[0]
+        for query in ("a", "a", "b", "a", "c"):
+            guarded.run(search_query=query)
+        self.assertEqual(self.stats.snapshot(), {
+            "tool_calls": 2, "repeated_calls": 2, "over_budget_calls": 1, "wasted_iterations": 3
+        })
+
+    def test_guard_shared_by_agent_tools(self):
+        """The budget is per agent, across all of its tools"""
+        other = CountingSearchTool(name="Other search")
+        first, second = ToolGuard(self.stats, max_calls=1).wrap([self.tool, other])
+        first.run(search_query="a")
+        self.assertIn("used up", second.run(search_query="a"))
+        self.assertEqual(other.calls, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
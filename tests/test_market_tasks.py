@@ -0,0 +1,125 @@
+import json
+import unittest
+
+from unittest.mock import MagicMock, patch
+from celery.exceptions import SoftTimeLimitExceeded
+from src.api import routes
+from src.core.crews.market_analyst.market_analyst import MarketAnalystCrew
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.database.job_store import (
+    append_event_by_id, create_job_by_id, get_job_by_id, get_task_result, update_job_by_id
+)
+from src.services.llm.model_registry import ModelRegistry
+from src.tasks import market_tasks
+
+
+class TestFlowPhases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        initialize_database()
+
+    def setUp(self):
+        with get_db_connection() as conn:
+            for table in ("events", "task_results", "jobs"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+        self.workflow = MagicMock()
+        self.workflow.return_value.analyze_market_crew.return_value = {"output": {"raw": "report"}, "tasks": {}}
+        self.workflow.return_value.create_content_crew.return_value = {"output": {"contents": []}, "tasks": {}}
+        patches = [
+            patch.object(market_tasks, "Workflow", self.workflow),
+            patch.object(market_tasks, "ModelRegistry"),
+            patch.object(market_tasks, "get_admission_controller"),
+            patch.object(market_tasks, "PHASE_RETRY_DELAY", 0),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.input_data = {"customer_domain": "stridewell.example", "project_description": "Metro 3 launch"}
+
+    def test_phases_persist_outputs(self):
+        """Each phase stores its output, the last one completes the job"""
+        market_tasks.research_phase.apply(args=["phase_job", self.input_data])
+        self.assertEqual(json.loads(get_task_result("phase_job", "analyze_market_crew"))["output"], {"raw": "report"})
+        self.assertEqual(get_job_by_id("phase_job").status, "RUNNING")
+
+        market_tasks.content_phase.apply(args=["phase_job", self.input_data])
+        job = get_job_by_id("phase_job")
+        self.assertEqual(job.status, "COMPLETE")
+        self.assertEqual(json.loads(job.result)["output"], {"contents": []})
+
+    def test_completed_phase_is_not_rerun(self):
+        """A redelivered phase reuses its stored output"""
+        market_tasks.research_phase.apply(args=["phase_job", self.input_data])
+        market_tasks.research_phase.apply(args=["phase_job", self.input_data])
+        self.assertEqual(self.workflow.return_value.analyze_market_crew.call_count, 1)
+
+    def test_failed_phase_is_retried_then_fails_the_job(self):
+        """Crew error strings are retried per phase, then the job is marked ERROR"""
+        append_event_by_id("phase_job", "Flow Started")
+        self.workflow.return_value.create_content_crew.return_value = "Error: LLM unavailable"
+        result = market_tasks.content_phase.apply(args=["phase_job", self.input_data])
+        self.assertTrue(result.failed())
+        self.assertEqual(
+            self.workflow.return_value.create_content_crew.call_count, market_tasks.content_phase.max_retries + 1
+        )
+        job = get_job_by_id("phase_job")
+        self.assertEqual((job.status, job.result), ("ERROR", "Error: LLM unavailable"))
+
+    def test_phase_timeout_is_not_retried(self):
+        """The soft time limit firing inside a crew marks the job TIMEOUT without retrying the phase"""
+        crew = MarketAnalystCrew("phase_job", ModelRegistry(), {**self.input_data, "prior_research": ""})
+        timed_out = MagicMock()
+        timed_out.return_value.kickoff.side_effect = SoftTimeLimitExceeded()
+        self.workflow.return_value.analyze_market_crew.side_effect = crew.kickoff
+        with patch.object(crew, "crew", timed_out):
+            result = market_tasks.research_phase.apply(args=["phase_job", self.input_data])
+        self.assertIsInstance(result.result, SoftTimeLimitExceeded)
+        self.assertEqual(timed_out.return_value.kickoff.call_count, 1)
+        job = get_job_by_id("phase_job")
+        self.assertEqual((job.status, job.result), ("TIMEOUT", "Error: phase time limit exceeded"))
+
+    def test_cancelled_job_is_skipped(self):
+        """Phases of a cancelled job don't run and don't overwrite its status"""
+        create_job_by_id("phase_job")
+        update_job_by_id("phase_job", "CANCELLED", "", ["Job cancelled"])
+        market_tasks.research_phase.apply(args=["phase_job", self.input_data])
+        market_tasks.content_phase.apply(args=["phase_job", self.input_data])
+        self.workflow.return_value.analyze_market_crew.assert_not_called()
+        self.workflow.return_value.create_content_crew.assert_not_called()
+        self.assertEqual(get_job_by_id("phase_job").status, "CANCELLED")
+
+    def test_finished_job_is_skipped(self):
+        """A redelivered chain of a finished job runs nothing and leaves the quota alone"""
+        self.input_data["client_id"] = "tenant"
+        for status in ("COMPLETE", "ERROR", "TIMEOUT"):
+            job_id = f"{status.lower()}_job"
+            create_job_by_id(job_id)
+            update_job_by_id(job_id, status, "", ["Job done"])
+            market_tasks.research_phase.apply(args=[job_id, self.input_data])
+            market_tasks.content_phase.apply(args=[job_id, self.input_data])
+            market_tasks.kickoff_flow.apply(args=[job_id, self.input_data])
+            self.assertEqual(get_job_by_id(job_id).status, status)
+        self.workflow.return_value.analyze_market_crew.assert_not_called()
+        self.workflow.return_value.create_content_crew.assert_not_called()
+        market_tasks.get_admission_controller.return_value.release_client.assert_not_called()
+
+        create_job_by_id("cancelled_job")
+        update_job_by_id("cancelled_job", "CANCELLED", "", ["Job cancelled"])
+        market_tasks.research_phase.apply(args=["cancelled_job", self.input_data])
+        market_tasks.get_admission_controller.return_value.release_client.assert_called_once_with(
+            "cancelled_job", "tenant"
+        )
+
+    def test_chain_dispatch(self):
+        """Submission chains the phases on their own queues"""
+        with patch.object(routes, "chain") as chain:
+            routes._send_flow("phase_job", self.input_data)
+        research, content = chain.call_args.args
+        self.assertEqual((research.task, research.options["queue"]), ("src.tasks.market_tasks.research_phase", "market_flow"))
+        self.assertEqual((content.task, content.options["queue"]), ("src.tasks.market_tasks.content_phase", "content_generation"))
+        chain.return_value.apply_async.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
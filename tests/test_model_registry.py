@@ -0,0 +1,56 @@
+import unittest
+
+from unittest.mock import patch
+from crewai import Agent
+from src.services.llm.llm_service import LLMService
+from src.services.llm.model_registry import ModelRegistry
+
+PROFILES = {
+    "default": {},
+    "fast": {"model": "qwen2.5:0.5b", "temperature": 0.2},
+    "quality": {"model": "qwen2.5:7b"},
+}
+
+
+@patch.dict("src.config.settings.LLM_PROFILES", PROFILES, clear=True)
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ModelRegistry(LLMService())
+
+    def test_profiles_resolve_to_models(self):
+        """Profiles override the default LLM config"""
+        self.assertEqual(self.registry.get("fast").model, "ollama/qwen2.5:0.5b")
+        self.assertEqual(self.registry.get("fast").temperature, 0.2)
+        self.assertEqual(self.registry.get("quality").model, "ollama/qwen2.5:7b")
+
+    def test_clients_reused(self):
+        """One client per profile, the default profile is the default client"""
+        self.assertIs(self.registry.get("fast"), self.registry.get("fast"))
+        self.assertIs(self.registry.get(), self.registry.service.get_client())
+        self.assertIsNot(self.registry.get("fast"), self.registry.get("quality"))
+
+    def test_dict_config_is_cached(self):
+        """get_client accepts a configuration dict and caches its client"""
+        config = {"provider": "ollama", "model": "llama3", "base_url": "http://localhost:11434"}
+        service = LLMService()
+        self.assertIs(service.get_client(config), service.get_client(dict(config)))
+
+    def test_unknown_profile_falls_back(self):
+        """Typos in the YAML don't fail the job"""
+        self.assertIs(self.registry.get("fastest"), self.registry.get())
+
+    def test_task_profile_binds_agent_copy(self):
+        """A task profile runs the task on a copy of its agent with that model"""
+        agent = Agent(role="analyst", goal="analyze", backstory="analyst", llm=self.registry.get("fast"))
+        self.assertIs(self.registry.for_task(agent, None), agent)
+        self.assertIs(self.registry.for_task(agent, "fast"), agent)
+        bound = self.registry.for_task(agent, "quality")
+        self.assertIsNot(bound, agent)
+        self.assertEqual(bound.role, agent.role)
+        self.assertIs(bound.llm, self.registry.get("quality"))
+        self.assertIs(agent.llm, self.registry.get("fast"))
+        self.assertIs(self.registry.for_task(agent, "quality"), bound)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from crewai import CrewOutput, TaskOutput
+from crewai.tasks.output_format import OutputFormat
+from src.core.crews.outputs import serialize_task_output, serialize_crew_output
+
+
+def make_task_output(name, raw, json_dict=None):
+    return TaskOutput(
+        description="test task",
+        name=name,
+        raw=raw,
+        json_dict=json_dict,
+        agent="tester",
+        output_format=OutputFormat.JSON if json_dict else OutputFormat.RAW
+    )
+
+
+class TestTaskOutputSerialization(unittest.TestCase):
+    def test_raw_task_output(self):
+        """Unstructured task outputs are kept as raw text"""
+        output = make_task_output("research_task", "Market report")
+        self.assertEqual(serialize_task_output(output), {"raw": "Market report"})
+
+    def test_structured_task_output(self):
+        """output_json tasks are validated and dumped with model defaults"""
+        output = make_task_output("marketing_strategy_task", "{}", {"name": "Q3", "tactics": ["SEO"]})
+        data = serialize_task_output(output)
+        self.assertEqual(data["name"], "Q3")
+        self.assertEqual(data["tactics"], ["SEO"])
+        self.assertEqual(data["channels"], [])
+
+    def test_invalid_task_output(self):
+        """Invalid structured outputs keep raw text and validation errors"""
+        output = make_task_output("content_production_task", "bad", {"name": "x", "title": "t" * 101, "body": "short"})
+        data = serialize_task_output(output)
+        self.assertEqual(data["raw"], "bad")
+        self.assertEqual(len(data["validation_errors"]), 2)
+
+    def test_crew_output(self):
+        """Crew results expose the final output and every task by name"""
+        tasks = [
+            make_task_output("project_research_task", "research"),
+            make_task_output("campaign_development_task", "{}", {"campaigns": [{"name": "c", "audience": "a", "channel": "email"}]}),
+        ]
+        data = serialize_crew_output(CrewOutput(raw="{}", tasks_output=tasks))
+        self.assertEqual(set(data["tasks"]), {"project_research_task", "campaign_development_task"})
+        self.assertEqual(data["output"]["campaigns"][0]["channel"], "email")
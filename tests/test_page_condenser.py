@@ -0,0 +1,98 @@
+import os
+import unittest
+
+from unittest.mock import patch
+from src.core.crews.context_budget import estimate_tokens
+from src.core.tools.page_condenser import extract_blocks, dedup_blocks, select_passages, condense_page
+from src.core.tools.condensed_scrape import CondensedScrapeWebsiteTool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+QUERY = "Stridewell running shoes urban runners competitors market"
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestPageCondenser(unittest.TestCase):
+    def test_boilerplate_removed(self):
+        """Scripts, navigation, cookie banners, sidebars and footers never reach the agent"""
+        text = "\n".join(extract_blocks(load_fixture("blog.html")))
+        self.assertIn("free community runs", text)
+        for boilerplate in ("dataLayer", "Store locator", "We use cookies", "Share on Facebook",
+                            "Popular products", "Subscribe to our newsletter", "All rights reserved"):
+            self.assertNotIn(boilerplate, text)
+
+    def test_page_state_classes_keep_content(self):
+        """Classes that merely contain a boilerplate word (WordPress body classes) don't drop the page"""
+        html = """<html><body class="home has-header-image has-sidebar">
+            <div id="page" class="site shared-layout"><header class="site-header">Stridewell</header>
+            <main class="subheader-offset"><article class="post">
+            <p>Stridewell opened three urban running stores in Portland, Denver and Austin this spring.</p>
+            </article></main><div class="widget-area sidebar">Popular products and deals this week</div>
+            </div></body></html>"""
+        self.assertEqual(list(extract_blocks(html)),
+                         ["Stridewell opened three urban running stores in Portland, Denver and Austin this spring."])
+
+    def test_div_only_text_kept(self):
+        """Text set straight in <div>s is emitted once, from the innermost div"""
+        html = """<body><div class="content"><div class="row">
+            <div class="col">Metro 3 weighs 228 grams and ships with a recycled knit upper in four colours.</div>
+            <div class="col">Short label</div></div>
+            <div class="cookie-notice">We use cookies to improve your experience on this website.</div></div></body>"""
+        self.assertEqual(list(extract_blocks(html)),
+                         ["Metro 3 weighs 228 grams and ships with a recycled knit upper in four colours."])
+
+    def test_table_rows_kept(self):
+        """Short table rows carry data and are not dropped as noise"""
+        self.assertIn("Fleetfoot Pace $165 251 g", list(extract_blocks(load_fixture("competitors.html"))))
+
+    def test_dedup_across_pages(self):
+        """A block seen on an earlier page is dropped from later pages"""
+        shared = "<p>Every order ships carbon neutral from our warehouse in Oregon within two days.</p>"
+        first = f"<main><p>Metro 3 is our lightest city trainer to date, at 228 grams.</p>{shared}</main>"
+        second = f"<main><p>The Trail X adds a rock plate and deeper lugs for park trails.</p>{shared}</main>"
+        seen = set()
+        self.assertEqual(len(list(dedup_blocks(extract_blocks(first), seen))), 2)
+        blocks = list(dedup_blocks(extract_blocks(second), seen))
+        self.assertEqual(blocks, ["The Trail X adds a rock plate and deeper lugs for park trails."])
+
+    def test_select_passages_relevance_and_order(self):
+        """Top-k passages are the relevant ones and keep document order"""
+        passages = [
+            "Our stores open at nine.",
+            "Stridewell running shoes for urban runners.",
+            "Gift cards never expire.",
+            "Competitors in the urban running market charge more.",
+        ]
+        selected = select_passages(passages, QUERY, top_k=2, max_tokens=1000)
+        self.assertEqual(selected, [passages[1], passages[3]])
+
+    def test_token_cap(self):
+        """Condensed page respects the token cap"""
+        html = load_fixture("home.html")
+        condensed = condense_page(html, QUERY, top_k=10, max_tokens=80)
+        self.assertTrue(condensed)
+        self.assertLessEqual(estimate_tokens(condensed), 80)
+
+    def test_condensed_smaller_than_raw(self):
+        """Condensed output is a fraction of the raw page text"""
+        html = load_fixture("competitors.html")
+        condensed = condense_page(html, QUERY, top_k=8, max_tokens=1200)
+        self.assertIn("Fleetfoot", condensed)
+        self.assertLess(len(condensed), len(html) / 2)
+
+    @patch("src.core.tools.condensed_scrape.fetch_page")
+    def test_tool_shares_seen_blocks_between_pages(self, mock_fetch):
+        """The tool condenses fetched pages and dedups across calls"""
+        mock_fetch.return_value = load_fixture("home.html")
+        tool = CondensedScrapeWebsiteTool(query=QUERY)
+        first = tool._run(website_url="https://stridewell.example/")
+        self.assertIn("recycled foam midsole", first)
+        second = tool._run(website_url="https://stridewell.example/")
+        self.assertEqual(second, "No relevant content found on this page.")
+
+
+if __name__ == '__main__':
+    unittest.main()
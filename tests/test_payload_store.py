@@ -0,0 +1,61 @@
+import os
+import tempfile
+import pytest
+
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.database import payload_store
+from src.services.database.payload_store import (
+    compress_payload, decompress_payload, store_payload, load_payload
+)
+
+@pytest.fixture
+def db_path():
+    """Fixture providing an initialized temporary database"""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    initialize_database(path)
+    yield path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_codec_roundtrip(codec):
+    """Test compress/decompress roundtrip for each codec"""
+    if codec == "zstd" and payload_store.zstandard is None:
+        pytest.skip("zstandard not installed")
+    data = ("market report " * 500).encode()
+    used, compressed = compress_payload(data, codec)
+    assert used == codec
+    assert len(compressed) < len(data)
+    assert decompress_payload(used, compressed) == data
+
+def test_unknown_codec():
+    """Test unsupported codec is rejected"""
+    with pytest.raises(ValueError):
+        compress_payload(b"data", "lz4")
+
+def test_small_payload_stays_inline(db_path):
+    """Test payloads below threshold are not moved to blobs"""
+    with get_db_connection(db_path) as conn:
+        inline, digest = store_payload(conn, "short event", threshold=64)
+        assert inline == "short event"
+        assert digest is None
+        assert load_payload(conn, inline, digest) == "short event"
+
+def test_large_payload_is_deduplicated(db_path):
+    """Test large payloads are compressed once per content"""
+    text = "competitor analysis " * 1000
+    with get_db_connection(db_path) as conn:
+        first = store_payload(conn, text, threshold=64)
+        second = store_payload(conn, text, threshold=64)
+        conn.commit()
+        assert first == second
+        assert first[0] == ""
+        count, size, stored = conn.execute(
+            "SELECT COUNT(*), MAX(size), MAX(LENGTH(data)) FROM blobs"
+        ).fetchone()
+        assert count == 1
+        assert size == len(text)
+        assert stored < size
+        assert load_payload(conn, *first) == text
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+import unittest
+
+from functools import partial
+from http.server import ThreadingHTTPServer
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from src.api.routes import flow_router
+from src.config.settings import LLM_PROFILES
+from src.services.celery.profiling import PROFILE_TASK, StackSampler
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.database.job_store import get_task_result
+from src.tasks import market_tasks
+from tests.test_worker_memory import FakeLLM
+
+
+def wait_for_llm():
+    time.sleep(0.2)
+
+
+class TestStackSampler(unittest.TestCase):
+    def test_samples_caller_and_its_threads(self):
+        """Stacks of the profiled thread and the threads it starts, not of threads running before"""
+        stop = threading.Event()
+        idle = threading.Thread(target=stop.wait, daemon=True)
+        idle.start()
+        with StackSampler(interval_ms=5) as sampler:
+            worker = threading.Thread(target=wait_for_llm)
+            worker.start()
+            wait_for_llm()
+            worker.join()
+        stop.set()
+
+        self.assertGreater(sampler.samples, 10)
+        self.assertAlmostEqual(sampler.wall_s, 0.2, delta=0.1)
+        waiting = [stack for stack in sampler.stacks if "wait_for_llm (tests/test_profiling.py:" in stack]
+        self.assertTrue(any("Thread._bootstrap" not in stack for stack in waiting))  # the profiled thread
+        self.assertTrue(any("Thread._bootstrap" in stack for stack in waiting))  # the thread it started
+        self.assertFalse(any("Event.wait" in stack for stack in sampler.stacks))
+
+    def test_distinct_stacks_are_capped(self):
+        sampler = StackSampler(max_stacks=1)
+        sampler._thread = threading.Thread()
+        sampler.stacks["a;b"] = 1
+        sampler.sample()
+        self.assertEqual(set(sampler.stacks), {"a;b", "[truncated]"})
+
+
+class TestJobProfile(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        initialize_database()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLM)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        app = FastAPI()
+        app.include_router(flow_router, prefix="/api")
+        cls.client = TestClient(app)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        with get_db_connection() as conn:
+            for table in ("events", "task_results", "jobs"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+        endpoint = {"provider": "openai", "base_url": f"http://127.0.0.1:{self.server.server_port}/v1",
+                    "api_key": "fake", "model": "profile-test"}
+        patches = [
+            patch.dict(LLM_PROFILES, {name: endpoint for name in ("default", "fast", "quality")}, clear=True),
+            patch.object(market_tasks, "get_admission_controller"),
+            # the fake LLM answers within milliseconds, sample often enough to catch its calls
+            patch.object(market_tasks, "StackSampler", partial(StackSampler, interval_ms=1)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_job(self, job_id: str, profile: bool):
+        market_tasks.kickoff_flow.apply(args=[job_id, {
+            "customer_domain": f"{job_id}.example", "project_description": "Metro 3 launch", "profile": profile
+        }])
+
+    def test_profile_download(self):
+        """Both phases are sampled, the download is collapsed stacks rooted at the phase"""
+        self.run_job("profiled_job", True)
+        profile = json.loads(get_task_result("profiled_job", PROFILE_TASK))
+        self.assertEqual(set(profile["phases"]), {"analyze_market_crew", "create_content_crew"})
+
+        response = self.client.get("/api/marketflow/profiled_job/profile")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="profiled_job.collapsed"', response.headers["content-disposition"])
+        lines = response.text.splitlines()
+        counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertTrue(all(line.split(";")[0] in profile["phases"] for line in lines))
+        # the crews' LLM calls are in the profile
+        self.assertTrue(any("litellm/" in line for line in lines))
+
+    def test_no_profile_by_default(self):
+        self.run_job("plain_job", False)
+        self.assertIsNone(get_task_result("plain_job", PROFILE_TASK))
+        self.assertEqual(self.client.get("/api/marketflow/plain_job/profile").status_code, 404)
@@ -0,0 +1,55 @@
+import unittest
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from src.core.flows import research_cache
+from src.core.flows.research_cache import normalize_domain, prior_research_prompt, research_freshness
+from src.services.database.job_schemas import ResearchEntry
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def entry_aged(hours: float) -> ResearchEntry:
+    created_at = (NOW - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+    return ResearchEntry("stridewell.example", {"output": {"raw": "Stridewell sells running shoes."}}, created_at)
+
+
+class TestResearchCache(unittest.TestCase):
+    def test_normalize_domain(self):
+        """Spellings of the same customer domain share one research key"""
+        for domain in ("stridewell.example", "https://www.Stridewell.example/shop?ref=1",
+                       "WWW.STRIDEWELL.EXAMPLE.", "http://stridewell.example:8080", " stridewell.example/ "):
+            self.assertEqual(normalize_domain(domain), "stridewell.example")
+        self.assertEqual(normalize_domain("shop.stridewell.example"), "shop.stridewell.example")
+
+    @patch.object(research_cache, "RESEARCH_MAX_AGE_HOURS", 168)
+    @patch.object(research_cache, "RESEARCH_FRESH_HOURS", 24)
+    def test_freshness_windows(self):
+        """Research is reused, refreshed or redone by age"""
+        self.assertEqual(research_freshness(None, now=NOW), "miss")
+        self.assertEqual(research_freshness(entry_aged(1), now=NOW), "fresh")
+        self.assertEqual(research_freshness(entry_aged(48), now=NOW), "stale")
+        self.assertEqual(research_freshness(entry_aged(200), now=NOW), "miss")
+
+    @patch.object(research_cache, "RESEARCH_FRESH_HOURS", 24)
+    def test_config_version(self):
+        """Research made with other prompts is refreshed rather than reused as is"""
+        entry = entry_aged(1)
+        entry.data["config_version"] = "e47bfef09f5e"
+        self.assertEqual(research_freshness(entry, now=NOW, config_version="e47bfef09f5e"), "fresh")
+        self.assertEqual(research_freshness(entry, now=NOW, config_version="0a1b2c3d4e5f"), "stale")
+        self.assertEqual(research_freshness(entry_aged(1), now=NOW, config_version="e47bfef09f5e"), "stale")
+
+    def test_refresh_override(self):
+        """refresh_research ignores even fresh research"""
+        self.assertEqual(research_freshness(entry_aged(1), refresh=True, now=NOW), "miss")
+
+    def test_prior_research_prompt(self):
+        """Stale research is handed to the research task within the token budget"""
+        prompt = prior_research_prompt(entry_aged(48), max_tokens=50)
+        self.assertIn("Stridewell sells running shoes.", prompt)
+        self.assertIn(entry_aged(48).created_at, prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
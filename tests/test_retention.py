@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import pytest
+
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.database.payload_store import store_payload
+from src.services.database.retention import purge_expired_jobs, select_expired_jobs
+
+@pytest.fixture
+def db_path():
+    """Fixture providing an initialized temporary database"""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.unlink(path)  # let sqlite create the file so auto_vacuum applies
+    initialize_database(path)
+    yield path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+def insert_job(conn, job_id, status, updated_at, payload="event"):
+    conn.execute(
+        "INSERT INTO jobs (job_id, status, result, updated_at) VALUES (?, ?, '', ?)",
+        (job_id, status, updated_at)
+    )
+    data, data_ref = store_payload(conn, payload, threshold=64)
+    conn.execute(
+        "INSERT INTO events (job_id, timestamp, data, data_ref) VALUES (?, ?, ?, ?)",
+        (job_id, updated_at, data, data_ref)
+    )
+
+def test_select_expired_by_age_and_count(db_path):
+    """Test age- and count-based selection per status"""
+    with get_db_connection(db_path) as conn:
+        insert_job(conn, "old", "COMPLETE", "2000-01-01 00:00:00")
+        for i in range(3):
+            insert_job(conn, f"new_{i}", "COMPLETE", f"2099-01-0{i + 1} 00:00:00")
+        insert_job(conn, "running", "STARTED", "2000-01-01 00:00:00")
+
+        assert select_expired_jobs(conn, "COMPLETE", max_age_days=30) == ["old"]
+        assert select_expired_jobs(conn, "COMPLETE", max_jobs=2) == ["new_0", "old"]
+        assert select_expired_jobs(conn, "STARTED") == []
+
+def test_purge_archives_and_deletes(db_path, tmp_path):
+    """Test expired jobs are archived, deleted in batches and blobs released"""
+    shared = "scraped page " * 100
+    with get_db_connection(db_path) as conn:
+        for i in range(5):
+            insert_job(conn, f"old_{i}", "COMPLETE", "2000-01-01 00:00:00", payload=shared)
+        insert_job(conn, "kept", "COMPLETE", "2099-01-01 00:00:00", payload="x" * 500)
+        for job_id in ("old_0", "kept"):
+            conn.execute(
+                "INSERT INTO webhook_outbox (id, job_id, status, url) VALUES (?, ?, 'COMPLETE', 'https://hooks.example')",
+                (f"delivery_{job_id}", job_id)
+            )
+
+    report = purge_expired_jobs(
+        db_path, policy={"COMPLETE": {"max_age_days": 30}}, batch_size=2, archive_dir=str(tmp_path)
+    )
+    assert report.deleted_jobs == 5
+    assert report.deleted_events == 5
+    assert report.deleted_blobs == 1
+    assert report.max_lock_hold_ms > 0
+
+    with gzip.open(report.archive_path, "rt", encoding="utf-8") as archive:
+        documents = [json.loads(line) for line in archive]
+    assert sorted(document["job_id"] for document in documents) == [f"old_{i}" for i in range(5)]
+    assert documents[0]["events"][0]["data"] == shared
+
+    with get_db_connection(db_path) as conn:
+        assert [row[0] for row in conn.execute("SELECT job_id FROM jobs")] == ["kept"]
+        assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+        assert [row[0] for row in conn.execute("SELECT job_id FROM webhook_outbox")] == ["kept"]
+
+def test_existing_database_converted_to_incremental_vacuum(tmp_path):
+    """A file created without auto_vacuum is vacuumed once, then the purge gives pages back"""
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, status TEXT, result TEXT)")
+    legacy.execute("CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, timestamp DATETIME, data TEXT)")
+    legacy.close()
+
+    initialize_database(path)
+    with get_db_connection(path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+        for i in range(50):
+            insert_job(conn, f"old_{i}", "COMPLETE", "2000-01-01 00:00:00", payload=f"{i} " + "x" * 20000)
+    report = purge_expired_jobs(path, policy={"COMPLETE": {"max_age_days": 30}}, archive_dir=None)
+    assert report.deleted_jobs == 50
+    assert report.reclaimed_bytes > 0
+
+def test_purge_nothing(db_path, tmp_path):
+    """Test a run without expired jobs leaves no archive"""
+    report = purge_expired_jobs(db_path, archive_dir=str(tmp_path))
+    assert report.deleted_jobs == 0
+    assert report.archive_path is None
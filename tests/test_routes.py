@@ -0,0 +1,164 @@
+import gzip
+import json
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from src.api import routes
+from src.api.routes import flow_router
+from src.api.status_cache import status_cache
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.database.job_store import append_event_by_id, update_job_by_id, save_research, save_task_result
+
+
+class TestMarketFlowRoutes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        initialize_database()
+        app = FastAPI()
+        app.include_router(flow_router, prefix="/api")
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        with get_db_connection() as conn:
+            conn.execute("DELETE FROM events")
+            conn.execute("DELETE FROM task_results")
+            conn.execute("DELETE FROM jobs")
+            conn.execute("DELETE FROM research")
+            conn.commit()
+        status_cache.clear()
+        append_event_by_id("route_job", "Flow Started")
+
+    def test_status_with_structured_result(self):
+        """Stored JSON results are embedded in the status response"""
+        update_job_by_id("route_job", "COMPLETE", {"output": {"name": "x"}, "tasks": {}}, ["Flow complete"])
+        response = self.client.get("/api/marketflow/route_job")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "COMPLETE")
+        self.assertEqual(body["result"], {"output": {"name": "x"}, "tasks": {}})
+        self.assertEqual([event["data"] for event in body["events"]], ["Flow Started", "Flow complete"])
+
+    def test_status_with_text_result(self):
+        """Plain text results are returned as JSON strings"""
+        update_job_by_id("route_job", "ERROR", "Error: boom", [])
+        body = self.client.get("/api/marketflow/route_job").json()
+        self.assertEqual(body["result"], "Error: boom")
+        body = self.client.get("/api/marketflow/route_job?include_result=false").json()
+        self.assertIsNone(body["result"])
+
+    def test_status_etag(self):
+        """Unchanged jobs answer 304 to their ETag, any write changes it"""
+        response = self.client.get("/api/marketflow/route_job")
+        etag = response.headers["etag"]
+        self.assertEqual(response.headers["cache-control"], "no-cache")
+        response = self.client.get("/api/marketflow/route_job", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        append_event_by_id("route_job", "Phase started")
+        response = self.client.get("/api/marketflow/route_job", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["events"]), 2)
+        self.assertNotEqual(response.headers["etag"], etag)
+
+        update_job_by_id("route_job", "COMPLETE", {"output": {}, "tasks": {}}, ["Flow complete"])
+        response = self.client.get("/api/marketflow/route_job")
+        self.assertEqual(response.json()["status"], "COMPLETE")
+        self.assertTrue(response.headers["cache-control"].startswith("max-age="))
+
+    def test_status_batch(self):
+        """Many jobs resolve in one request, unknown ids are reported as missing"""
+        append_event_by_id("route_job_2", "Flow Started")
+        update_job_by_id("route_job_2", "COMPLETE", {"output": {}, "tasks": {}}, ["Flow complete"])
+        response = self.client.post(
+            "/api/marketflow/status:batch",
+            json={"job_ids": ["route_job", "route_job_2", "missing"], "include_result": True}
+        )
+        body = response.json()
+        self.assertEqual(body["missing"], ["missing"])
+        jobs = {job["job_id"]: job for job in body["jobs"]}
+        self.assertEqual(jobs["route_job_2"]["status"], "COMPLETE")
+        self.assertEqual(jobs["route_job_2"]["result"], {"output": {}, "tasks": {}})
+        self.assertEqual([event["data"] for event in jobs["route_job"]["events"]], ["Flow Started"])
+        self.assertEqual(self.client.post("/api/marketflow/status:batch", json={"job_ids": []}).status_code, 422)
+
+    def test_list_jobs(self):
+        """Job listing pages with an opaque cursor"""
+        append_event_by_id("route_job_2", "Flow Started")
+        first = self.client.get("/api/marketflow?limit=1").json()
+        self.assertEqual(len(first["jobs"]), 1)
+        second = self.client.get(f"/api/marketflow?limit=1&cursor={first['next_cursor']}").json()
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(
+            sorted(job["job_id"] for job in first["jobs"] + second["jobs"]), ["route_job", "route_job_2"]
+        )
+        body = self.client.get("/api/marketflow?status=COMPLETE").json()
+        self.assertEqual(body, {"jobs": [], "next_cursor": None})
+        self.assertEqual(self.client.get("/api/marketflow?cursor=!!").status_code, 400)
+
+    def test_export(self):
+        """Completed jobs export as NDJSON, resumable from any line's cursor"""
+        for job_id in ("export_1", "export_2"):
+            append_event_by_id(job_id, "Flow Started")
+            update_job_by_id(job_id, "COMPLETE", {"output": {"id": job_id}, "tasks": {}}, ["Flow complete"])
+        response = self.client.get("/api/marketflow/export")
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(sorted(line["job_id"] for line in lines), ["export_1", "export_2"])
+        self.assertEqual(lines[0]["result"]["output"]["id"], lines[0]["job_id"])
+        self.assertEqual([event["data"] for event in lines[0]["events"]], ["Flow Started", "Flow complete"])
+
+        rest = self.client.get(f"/api/marketflow/export?cursor={lines[0]['cursor']}").text.splitlines()
+        self.assertEqual([json.loads(line)["job_id"] for line in rest], [lines[1]["job_id"]])
+
+        response = self.client.get("/api/marketflow/export?status=&gzip=true")
+        exported = gzip.decompress(response.content).decode().splitlines()
+        self.assertEqual(len(exported), 3)
+        self.assertEqual(self.client.get("/api/marketflow/export?until=2000-01-01").text, "")
+
+    def test_queued_then_cancelled(self):
+        """Submitted jobs are QUEUED right away and can be cancelled until they finish"""
+        body = {"customer_domain": "stridewell.example", "project_description": "Metro 3 launch"}
+        with patch.object(routes, "get_admission_controller"), patch.object(routes, "_send_flow"):
+            job_id = self.client.post("/api/marketflow", json=body).json()["job_id"]
+        status = self.client.get(f"/api/marketflow/{job_id}").json()
+        self.assertEqual((status["status"], status["events"], status["started_at"]), ("QUEUED", [], None))
+        self.assertIsNotNone(status["created_at"])
+
+        self.assertEqual(self.client.post(f"/api/marketflow/{job_id}/cancel").json()["status"], "CANCELLED")
+        self.assertEqual(self.client.post(f"/api/marketflow/{job_id}/cancel").status_code, 409)
+        self.assertEqual(self.client.post("/api/marketflow/missing/cancel").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/marketflow/{job_id}").json()["status"], "CANCELLED")
+
+    def test_lifecycle_stats(self):
+        """Queue wait and service time come from the lifecycle timestamps"""
+        with get_db_connection() as conn:
+            conn.execute(
+                """UPDATE jobs SET status = 'COMPLETE', created_at = datetime('now', 'localtime', '-70 seconds'),
+                started_at = datetime('now', 'localtime', '-60 seconds'), finished_at = datetime('now', 'localtime'),
+                updated_at = datetime('now', 'localtime') WHERE job_id = 'route_job'"""
+            )
+        body = self.client.get("/api/stats/lifecycle").json()
+        self.assertEqual(body["jobs"], {"COMPLETE": 1})
+        self.assertEqual((body["queue_wait_s"]["p50"], body["service_time_s"]["p50"]), (10.0, 60.0))
+
+    def test_task_result(self):
+        """Per-task results are served by task name"""
+        save_task_result("route_job", "marketing_strategy_task", {"name": "plan"})
+        response = self.client.get("/api/marketflow/route_job/result/marketing_strategy_task")
+        self.assertEqual(response.json()["result"], {"name": "plan"})
+        response = self.client.get("/api/marketflow/route_job/result/unknown_task")
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_job(self):
+        """Unknown jobs return 404"""
+        self.assertEqual(self.client.get("/api/marketflow/missing").status_code, 404)
+        self.assertEqual(self.client.get("/api/marketflow/missing/result").status_code, 404)
+
+    def test_research_stats(self):
+        """Research reuse stats report the hit rate over jobs"""
+        self.assertEqual(self.client.get("/api/research/stats").json()["hit_rate"], 0.0)
+        save_research("stridewell.example", {"output": {"raw": "report"}, "tasks": {}})
+        body = self.client.get("/api/research/stats").json()
+        self.assertEqual((body["domains"], body["hits"], body["runs"], body["hit_rate"]), (1, 0, 1, 0.0))
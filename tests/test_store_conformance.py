@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+import pytest
+
+from src.services.database.job_schemas import Event
+from src.services.database.sqlite_store import SQLiteJobStore
+from src.services.database.redis_store import RedisJobStore
+
+@pytest.fixture(params=["sqlite", "redis"])
+def store(request):
+    """Fixture yielding every job store backend, shared conformance suite"""
+    if request.param == "sqlite":
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        backend = SQLiteJobStore(path)
+        backend.initialize()
+        yield backend
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        yield RedisJobStore(client=fakeredis.FakeRedis(), threshold=64)
+
+def test_append_creates_job(store):
+    """Test the first event creates a STARTED job"""
+    store.append_event("job_1", "Flow Started")
+    store.append_event("job_1", "second event")
+    job = store.get_job("job_1")
+    assert job.status == "STARTED"
+    assert [event.data for event in job.events] == ["Flow Started", "second event"]
+
+def test_missing_job(store):
+    """Test unknown jobs are reported as None/False"""
+    assert store.get_job("missing") is None
+    assert store.get_job_result("missing") is None
+    assert store.update_job("missing", "COMPLETE", "", []) is False
+
+def test_update_text_result(store):
+    """Test text results are returned as JSON strings"""
+    store.append_event("job_2", "Flow Started")
+    assert store.update_job("job_2", "ERROR", "Error: boom", ["Flow Start Error"])
+    job = store.get_job("job_2")
+    assert job.status == "ERROR"
+    assert job.result == "Error: boom"
+    assert job.result_type == "text"
+    assert [event.data for event in job.events][-1] == "Flow Start Error"
+    assert json.loads(store.get_job_result("job_2")) == "Error: boom"
+
+def test_update_structured_large_result(store):
+    """Test large dict results survive compression and are loaded lazily"""
+    result = {"output": {"body": "copy " * 2000}, "tasks": {}}
+    store.append_event("job_3", "scraped " * 2000)
+    assert store.update_job("job_3", "COMPLETE", result, [])
+    job = store.get_job("job_3")
+    assert job.result_type == "json"
+    assert json.loads(job.result) == result
+    assert job.events[0].data == "scraped " * 2000
+    assert store.get_job("job_3", include_result=False).result is None
+    assert json.loads(store.get_job_result("job_3")) == result
+
+def test_task_results(store):
+    """Test per-task results are upserted"""
+    store.append_event("job_4", "Flow Started")
+    assert store.save_task_result("job_4", "marketing_strategy_task", {"name": "v1"})
+    assert store.save_task_result("job_4", "marketing_strategy_task", {"name": "v2" * 100})
+    assert json.loads(store.get_task_result("job_4", "marketing_strategy_task")) == {"name": "v2" * 100}
+    assert store.get_task_result("job_4", "unknown") is None
+
+def test_append_events_batch(store):
+    """Test batched events keep their timestamps and create the job"""
+    events = [Event(timestamp="2026-01-01 00:00:0%d" % i, data=f"event {i}") for i in range(3)]
+    store.append_events("job_5", events)
+    job = store.get_job("job_5")
+    assert job.status == "STARTED"
+    assert [(event.timestamp, event.data) for event in job.events] == [
+        (event.timestamp, event.data) for event in events
+    ]
+
+def test_research_reuse(store):
+    """Test research is replaced on save and hits/runs are counted per domain"""
+    assert store.get_research("stridewell.example") is None
+    report = {"output": {"raw": "report " * 500}, "tasks": {"research_task": {"raw": "report"}}}
+    assert store.save_research("stridewell.example", {"output": {"raw": "old"}, "tasks": {}})
+    assert store.save_research("stridewell.example", report)
+    store.record_research_hit("stridewell.example")
+    entry = store.get_research("stridewell.example")
+    assert entry.data == report
+    assert (entry.hits, entry.runs) == (1, 2)
+    assert entry.created_at
+    assert store.get_research_stats() == {"domains": 1, "hits": 1, "runs": 2}
+
+def test_tool_cache(store):
+    """Test cached tool results round-trip, large ones compressed"""
+    assert store.get_tool_result("page:missing") is None
+    html = "<p>" + "running shoes " * 1000 + "</p>"
+    assert store.save_tool_result("page:1", html)
+    assert store.save_tool_result("search:1", '{"organic": []}')
+    assert store.get_tool_result("page:1") == html
+    assert store.get_tool_result("search:1") == '{"organic": []}'
+
+def test_job_version(store):
+    """Test every write to a job changes its version"""
+    assert store.get_job_version("missing") is None
+    store.append_event("job_v", "Flow Started")
+    status, first = store.get_job_version("job_v")
+    store.append_events("job_v", [Event(timestamp="2026-01-01 00:00:00", data="a")])
+    store.update_job("job_v", "COMPLETE", "done", ["Flow complete"])
+    status, last = store.get_job_version("job_v")
+    assert status == "COMPLETE"
+    assert last > first
+
+def test_get_jobs_batch(store):
+    """Test many jobs load at once with their events, missing ids left out"""
+    for index in range(3):
+        store.append_event(f"batch_{index}", f"event {index}")
+    store.update_job("batch_1", "COMPLETE", {"name": "x"}, ["Flow complete"])
+    jobs = store.get_jobs(["batch_0", "batch_1", "batch_2", "missing", "batch_0"], include_result=True)
+    assert sorted(jobs) == ["batch_0", "batch_1", "batch_2"]
+    assert [event.data for event in jobs["batch_1"].events] == ["event 1", "Flow complete"]
+    assert jobs["batch_1"].status == "COMPLETE"
+    assert json.loads(jobs["batch_1"].result) == {"name": "x"}
+    assert store.get_jobs(["batch_0"])["batch_0"].result is None
+
+def test_list_jobs_pages(store):
+    """Test job listing pages through every job once, filtered by status"""
+    for index in range(5):
+        store.append_event(f"list_{index}", "Flow Started")
+    store.update_job("list_3", "COMPLETE", "done", [])
+    seen, after = [], None
+    while True:
+        page = store.list_jobs(limit=2, after=after)
+        if not page:
+            break
+        seen += [job.job_id for job in page]
+        after = (page[-1].updated_at, page[-1].job_id)
+    assert sorted(seen) == [f"list_{index}" for index in range(5)]
+    assert [job.job_id for job in store.list_jobs(status="COMPLETE")] == ["list_3"]
+    assert len(store.list_jobs(status="STARTED")) == 4
+    assert store.list_jobs(since="2999-01-01 00:00:00") == []
+    assert store.list_jobs(until="2000-01-01 00:00:00") == []
+    assert len(store.list_jobs(until="2999-01-01 00:00:00")) == 5
+
+def test_webhook_outbox(store):
+    """Test terminal updates queue a webhook, leased to one claimer at a time"""
+    store.append_event("job_w", "Flow Started")
+    assert store.update_job("job_w", "COMPLETE", "done", [], callback_url="http://receiver.example/hook")
+    claimed = store.claim_webhooks(10, 60)
+    assert [(d.job_id, d.status, d.url, d.attempts) for d in claimed] == [
+        ("job_w", "COMPLETE", "http://receiver.example/hook", 0)
+    ]
+    assert store.claim_webhooks(10, 60) == []
+    store.finish_webhook(claimed[0], False, "HTTP 503", retry_at=0)
+    retried = store.claim_webhooks(10, 60)
+    assert [d.attempts for d in retried] == [1]
+    store.finish_webhook(retried[0], True)
+    assert store.claim_webhooks(10, 0) == []
+
+def test_job_lifecycle(store):
+    """Test QUEUED -> RUNNING -> terminal, with timestamps, and terminal states being final"""
+    assert store.create_job("job_l")
+    assert not store.create_job("job_l")
+    job = store.get_job("job_l")
+    assert (job.status, job.events, job.started_at) == ("QUEUED", [], None)
+    assert job.created_at is not None
+    assert store.start_job("job_l")
+    assert store.start_job("job_l")  # phase retries
+    store.append_event("job_l", "Flow Started")
+    job = store.get_job("job_l")
+    assert (job.status, len(job.events), job.finished_at) == ("RUNNING", 1, None)
+    assert store.update_job("job_l", "CANCELLED", "", ["Job cancelled"])
+    assert not store.update_job("job_l", "COMPLETE", "done", [])
+    assert not store.start_job("job_l")
+    job = store.get_job("job_l", include_result=False)
+    assert job.status == "CANCELLED"
+    assert job.finished_at is not None
+    assert [summary.status for summary in store.list_jobs()] == ["CANCELLED"]
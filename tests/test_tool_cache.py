@@ -0,0 +1,60 @@
+import unittest
+
+from unittest.mock import MagicMock, patch
+from src.core.tools import prefetch, tool_cache
+from src.core.tools.cached_search import CachedSerperDevTool
+from src.core.tools.tool_cache import fetch_page, page_key, search_key
+from src.services.database.connection import get_db_connection, initialize_database
+
+SEARCH_RESULTS = {"organic": [
+    {"title": "Stridewell", "link": "https://stridewell.example/", "snippet": "Running shoes", "position": 1},
+    {"title": "Metro 3", "link": "https://stridewell.example/metro-3", "snippet": "City trainer", "position": 2},
+]}
+
+
+class TestToolCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        initialize_database()
+
+    def setUp(self):
+        with get_db_connection() as conn:
+            conn.execute("DELETE FROM tool_cache")
+            conn.commit()
+
+    def test_keys(self):
+        """Equivalent searches and URLs share a cache key"""
+        self.assertEqual(search_key("stridewell.example competitors"), search_key(" STRIDEWELL.example  Competitors"))
+        self.assertNotEqual(search_key("stridewell shoes -site:amazon.com"), search_key("stridewell shoes site:amazon.com"))
+        self.assertNotEqual(search_key('"stridewell metro 3"'), search_key("stridewell metro 3"))
+        self.assertNotEqual(search_key("stridewell.example"), search_key("stridewell.example", "news"))
+        self.assertEqual(page_key("https://stridewell.example/shop/"), page_key("https://stridewell.example/shop#top"))
+
+    @patch.object(tool_cache.requests, "get")
+    def test_fetch_page_is_cached(self, get):
+        """Pages are fetched once, error pages are not cached"""
+        get.return_value = MagicMock(ok=True, text="<p>Metro 3</p>")
+        self.assertEqual(fetch_page("https://stridewell.example/"), "<p>Metro 3</p>")
+        self.assertEqual(fetch_page("https://stridewell.example"), "<p>Metro 3</p>")
+        self.assertEqual(get.call_count, 1)
+        get.return_value = MagicMock(ok=False, text="Not found")
+        fetch_page("https://stridewell.example/missing")
+        fetch_page("https://stridewell.example/missing")
+        self.assertEqual(get.call_count, 3)
+
+    @patch.object(tool_cache.requests, "get")
+    @patch("crewai_tools.SerperDevTool._make_api_request", return_value=SEARCH_RESULTS)
+    def test_prefetch_warms_agent_tools(self, api, get):
+        """Prefetched searches and pages are cache hits for the agent's tools"""
+        get.return_value = MagicMock(ok=True, text="<p>Metro 3</p>")
+        counts = prefetch.prefetch_research("stridewell.example", queries=["{customer_domain} competitors"], pages=2)
+        self.assertEqual(counts, {"queries": 1, "pages": 2, "errors": 0})
+
+        results = CachedSerperDevTool().run(search_query="Stridewell.example Competitors")
+        self.assertEqual(results["organic"][0]["link"], "https://stridewell.example/")
+        fetch_page("https://stridewell.example/metro-3")
+        self.assertEqual((api.call_count, get.call_count), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import threading
+import unittest
+
+from http.server import ThreadingHTTPServer
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind
+from src.api.routes import flow_router
+from src.config.settings import LLM_PROFILES
+from src.services.database import job_store
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.tracing import tracer
+from src.services.tracing.crew_spans import install_crew_spans
+from src.tasks import market_tasks
+from tests.test_worker_memory import FakeLLM
+
+
+class TestTracing(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        initialize_database()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLM)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        install_crew_spans()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        with get_db_connection() as conn:
+            for table in ("events", "task_results", "jobs"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+        endpoint = {"provider": "openai", "base_url": f"http://127.0.0.1:{self.server.server_port}/v1",
+                    "api_key": "fake", "model": "trace-test"}
+        patches = [
+            patch.dict(LLM_PROFILES, {name: endpoint for name in ("default", "fast", "quality")}, clear=True),
+            patch.object(market_tasks, "get_admission_controller"),
+            patch.object(tracer, "TRACING_ENABLED", True),
+            patch.object(job_store, "TRACING_ENABLED", True),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        job_store.get_job_store.cache_clear()
+        self.addCleanup(job_store.get_job_store.cache_clear)
+        for signal, handler in ((before_task_publish, tracer.inject_task_headers),
+                                (task_prerun, tracer.start_task_span), (task_postrun, tracer.end_task_span)):
+            signal.connect(handler, weak=False)
+            self.addCleanup(signal.disconnect, handler)
+        self.exporter = self.use_provider(1.0)
+
+    def use_provider(self, ratio: float) -> InMemorySpanExporter:
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(ratio)))
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        patcher = patch.object(tracer, "_provider", provider)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return exporter
+
+    def run_job(self, job_id: str, headers=None):
+        market_tasks.kickoff_flow.apply(args=[job_id, {
+            "customer_domain": f"{job_id}.example", "project_description": "Metro 3 launch"
+        }], headers=headers)
+
+    def test_job_trace_follows_message_headers(self):
+        """The worker continues the publisher's trace: task, phase, crew task, LLM call and DB spans nest under it"""
+        with tracer.get_tracer().start_as_current_span("POST /api/marketflow") as root:
+            headers = {}
+            tracer.inject_task_headers(headers=headers)
+        self.assertIn("traceparent", headers)
+        self.run_job("traced_job", headers)
+
+        spans = self.exporter.get_finished_spans()
+        by_id = {span.context.span_id: span for span in spans}
+        self.assertEqual({span.context.trace_id for span in spans}, {root.get_span_context().trace_id})
+
+        def parent(span):
+            return by_id.get(span.parent.span_id) if span.parent else None
+
+        run = next(span for span in spans if span.name == "run kickoff_flow")
+        self.assertEqual(run.kind, SpanKind.CONSUMER)
+        self.assertEqual(run.parent.span_id, root.get_span_context().span_id)
+        self.assertEqual(run.attributes["job.id"], "traced_job")
+        self.assertEqual(run.attributes["celery.state"], "SUCCESS")
+
+        phases = [span for span in spans if span.name.startswith("phase ")]
+        self.assertEqual([span.name for span in phases], ["phase analyze_market_crew", "phase create_content_crew"])
+        self.assertTrue(all(parent(span) is run for span in phases))
+
+        crew_tasks = [span for span in spans if span.name.startswith("crew_task ")]
+        self.assertTrue(crew_tasks)
+        self.assertTrue(all(parent(span).name.startswith("phase ") for span in crew_tasks))
+        llm_calls = [span for span in spans if span.name == "llm openai/trace-test"]
+        self.assertTrue(llm_calls)
+        self.assertTrue(all(parent(span).name.startswith("crew_task ") for span in llm_calls))
+
+        db_operations = {span.attributes["db.operation"] for span in spans if span.name.startswith("db ")}
+        self.assertTrue({"start_job", "save_task_result", "update_job"} <= db_operations)
+
+    def test_request_span_continues_caller_trace(self):
+        caller = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        app = FastAPI()
+        app.include_router(flow_router, prefix="/api")
+        app.middleware("http")(tracer.trace_request)
+        client = TestClient(app)
+        self.assertEqual(client.get("/api/marketflow/unknown", headers={"traceparent": caller}).status_code, 404)
+
+        spans = self.exporter.get_finished_spans()
+        span = spans[-1]
+        self.assertEqual(span.name, "GET /api/marketflow/{job_id}")
+        self.assertEqual(span.kind, SpanKind.SERVER)
+        self.assertEqual(format(span.context.trace_id, "032x"), "0af7651916cd43dd8448eb211c80319c")
+        self.assertEqual(span.attributes["http.status_code"], 404)
+        # the job lookup runs inside the request span
+        self.assertTrue(all(other.parent.span_id == span.context.span_id for other in spans[:-1]))
+
+    def test_unsampled_job_records_nothing(self):
+        exporter = self.use_provider(0.0)
+        self.run_job("untraced_job")
+        self.assertEqual(exporter.get_finished_spans(), ())
+        self.assertEqual(job_store.get_job_by_id("untraced_job").status, "COMPLETE")
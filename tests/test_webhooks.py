@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api import routes
+from src.services.database.connection import get_db_connection
+from src.services.database.sqlite_store import SQLiteJobStore
+from src.services.webhooks import delivery
+from src.services.webhooks.delivery import check_callback_url, deliver_due, new_client, retry_delay, sign
+
+
+class Receiver(BaseHTTPRequestHandler):
+    """local webhook endpoint answering with the status code queued in `responses`"""
+    requests = []
+    responses = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        Receiver.requests.append((dict(self.headers), body))
+        self.send_response(Receiver.responses.pop(0) if Receiver.responses else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestWebhooks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Receiver)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/hooks/marketflow"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        Receiver.requests, Receiver.responses = [], []
+        patcher = patch.object(delivery, "WEBHOOK_SECRET", "s3cret")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = os.path.join(tempfile.mkdtemp(), "webhooks.db")
+        self.store = SQLiteJobStore(self.path)
+        self.store.initialize()
+
+    def deliver(self):
+        async def run():
+            async with new_client() as client:
+                return await deliver_due(self.store, client)
+        return asyncio.run(run())
+
+    def complete(self, job_id: str, status: str = "COMPLETE", url: str = None):
+        self.store.append_event(job_id, "Flow Started")
+        self.store.update_job(job_id, status, {"output": {"id": job_id}}, ["Flow complete"], callback_url=url or self.url)
+
+    def test_signed_delivery(self):
+        """Completed jobs are posted once with their result and a verifiable signature"""
+        self.complete("hook_1")
+        self.assertEqual(self.deliver(), {"delivered": 1, "retry": 0, "dead": 0})
+        headers, body = Receiver.requests[0]
+        self.assertEqual(json.loads(body), {"job_id": "hook_1", "status": "COMPLETE", "result": {"output": {"id": "hook_1"}}})
+        self.assertEqual(headers["X-MarketFlow-Event"], "job.complete")
+        self.assertEqual(headers["X-MarketFlow-Signature"], sign(body, int(headers["X-MarketFlow-Timestamp"]), "s3cret"))
+        self.assertEqual(self.deliver()["delivered"], 0)
+        self.assertEqual(len(Receiver.requests), 1)
+
+    def test_no_delivery_without_secret(self):
+        """Webhooks are never sent unsigned, they wait for a secret to be configured"""
+        self.complete("hook_7")
+        with patch.object(delivery, "WEBHOOK_SECRET", ""), patch.object(delivery, "_unconfigured_reported", False):
+            with self.assertLogs(delivery.logger, "ERROR"):
+                self.assertEqual(self.deliver(), {"delivered": 0, "retry": 0, "dead": 0})
+            self.assertEqual(self.deliver()["delivered"], 0)
+        self.assertEqual(Receiver.requests, [])
+        self.assertEqual(self.deliver()["delivered"], 1)
+
+    def test_callback_url_checked(self):
+        """Results are only posted to public http(s) hosts, and only with a secret to sign them"""
+        self.assertIsNone(check_callback_url("https://93.184.216.34/hooks/marketflow"))
+        for url in ("http://127.0.0.1:8000/hook", "http://localhost/hook", "http://10.0.0.5/hook",
+                    "http://169.254.169.254/latest/meta-data", "http://[::1]/hook", "http://[fe80::1]/hook"):
+            self.assertIn("not a public address", check_callback_url(url), url)
+        self.assertIn("http and https", check_callback_url("ftp://93.184.216.34/hook"))
+        with patch.object(delivery, "WEBHOOK_ALLOW_PRIVATE_HOSTS", True):
+            self.assertIsNone(check_callback_url(self.url))
+        with patch.object(delivery, "WEBHOOK_SECRET", ""):
+            self.assertIn("not enabled", check_callback_url("https://93.184.216.34/hooks/marketflow"))
+
+        app = FastAPI()
+        app.include_router(routes.flow_router, prefix="/api")
+        body = {"customer_domain": "stridewell.example", "project_description": "Metro 3 launch",
+                "callback_url": "http://169.254.169.254/latest/meta-data"}
+        with patch.object(routes, "get_admission_controller") as admission, patch.object(routes, "_send_flow") as send:
+            response = TestClient(app).post("/api/marketflow", json=body)
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("not a public address", response.json()["detail"])
+        admission.assert_not_called()
+        send.assert_not_called()
+
+    def test_no_callback_for_running_jobs(self):
+        """Only terminal updates with a callback_url are queued"""
+        self.store.append_event("hook_2", "Flow Started")
+        self.store.update_job("hook_2", "RUNNING", "", [], callback_url=self.url)
+        self.store.update_job("hook_2", "COMPLETE", "done", [])
+        self.assertEqual(self.deliver(), {"delivered": 0, "retry": 0, "dead": 0})
+
+    def test_retry_then_dead(self):
+        """Server errors are retried with backoff, rejected requests are not"""
+        self.complete("hook_3")
+        self.complete("hook_4", "ERROR")
+        Receiver.responses = [503, 503]
+        self.assertEqual(self.deliver(), {"delivered": 0, "retry": 2, "dead": 0})
+        self.assertEqual(self.deliver()["retry"], 0)  # not due yet
+
+        with get_db_connection(self.path) as conn:
+            conn.execute("UPDATE webhook_outbox SET next_attempt_at = ?", (time.time(),))
+            conn.commit()
+        Receiver.responses = [400, 200]
+        self.assertEqual(self.deliver(), {"delivered": 1, "retry": 0, "dead": 1})
+        with get_db_connection(self.path) as conn:
+            row = conn.execute("SELECT attempts, next_attempt_at, last_error FROM webhook_outbox").fetchone()
+        self.assertEqual((row[0], row[1], row[2]), (2, None, "HTTP 400"))
+
+    def test_outbox_commits_with_update(self):
+        """A status update whose webhook can't be queued is rolled back"""
+        self.store.append_event("hook_6", "Flow Started")
+        with get_db_connection(self.path) as conn:
+            conn.execute("DROP TABLE webhook_outbox")
+        self.assertFalse(self.store.update_job("hook_6", "COMPLETE", "done", ["Flow complete"], callback_url=self.url))
+        job = self.store.get_job("hook_6")
+        self.assertEqual((job.status, len(job.events)), ("STARTED", 1))
+
+    def test_unreachable_receiver(self):
+        """Connection errors are retried"""
+        self.complete("hook_5", url="http://127.0.0.1:9/unreachable")
+        self.assertEqual(self.deliver(), {"delivered": 0, "retry": 1, "dead": 0})
+
+    def test_concurrency_limit(self):
+        """At most WEBHOOK_CONCURRENCY requests are in flight"""
+        in_flight, peak = [0], [0]
+        lock = threading.Lock()
+        original = Receiver.do_POST
+
+        def slow_post(handler):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.05)
+            original(handler)
+            with lock:
+                in_flight[0] -= 1
+
+        for index in range(12):
+            self.complete(f"hook_c{index}")
+        with patch.object(Receiver, "do_POST", slow_post), patch.object(delivery, "WEBHOOK_CONCURRENCY", 4):
+            self.assertEqual(self.deliver()["delivered"], 12)
+        self.assertLessEqual(peak[0], 4)
+
+    def test_backoff(self):
+        """Retry delays double per attempt up to the cap"""
+        self.assertLessEqual(retry_delay(0), delivery.WEBHOOK_RETRY_BASE_SECONDS)
+        self.assertGreaterEqual(retry_delay(3), delivery.WEBHOOK_RETRY_BASE_SECONDS * 4)
+        self.assertLessEqual(retry_delay(30), delivery.WEBHOOK_RETRY_MAX_SECONDS)
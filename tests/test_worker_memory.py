@@ -0,0 +1,124 @@
+import os
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+
+import gc
+import json
+import threading
+import time
+import tracemalloc
+import unittest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from crewai import Agent, Task
+from src.config.settings import LLM_PROFILES
+from src.services.celery import celery_app
+from src.services.celery.memory import TaskMemoryProfiler, rss_bytes
+from src.services.database.connection import get_db_connection, initialize_database
+from src.services.database.job_store import get_job_by_id
+from src.tasks import market_tasks
+
+# structured answers by a field of the output_json schema in the prompt
+STRUCTURED_ANSWERS = {
+    "campaigns": {"campaigns": [{"name": "Run the city", "audience": "Urban runners aged 25-35", "channel": "Instagram"}]},
+    "kpis": {"name": "Urban runners", "tactics": ["Run clubs"], "channels": ["Instagram"], "kpis": ["CAC"]},
+    "body": {"name": "Spring launch", "title": "Meet Metro 3",
+             "body": "Lace up for spring with the new Metro 3, our lightest city trainer yet, built for asphalt."},
+}
+
+
+class FakeLLM(BaseHTTPRequestHandler):
+    """OpenAI-compatible endpoint giving every task its final answer right away"""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = "\n".join(str(message.get("content")) for message in request["messages"])
+        answer = "Stridewell competes on price and comfort."
+        if "content in the following format:" in prompt:
+            schema = prompt.split("content in the following format:")[-1]
+            answer = next(json.dumps(data) for key, data in STRUCTURED_ANSWERS.items() if f'"{key}"' in schema)
+        body = json.dumps({
+            "id": "chatcmpl-memory",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                "role": "assistant", "content": f"Thought: I now can give a great answer\nFinal Answer: {answer}"
+            }}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def live_crew_objects() -> int:
+    gc.collect()
+    return sum(1 for obj in gc.get_objects() if type(obj) in (Agent, Task))
+
+
+class TestWorkerMemory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        initialize_database()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLM)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        with get_db_connection() as conn:
+            for table in ("events", "task_results", "jobs"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+        endpoint = {"provider": "openai", "base_url": f"http://127.0.0.1:{self.server.server_port}/v1",
+                    "api_key": "fake", "model": "memory-test"}
+        patches = [
+            patch.dict(LLM_PROFILES, {name: endpoint for name in ("default", "fast", "quality")}, clear=True),
+            patch.object(market_tasks, "get_admission_controller"),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_jobs(self, count: int, offset: int = 0):
+        for index in range(offset, offset + count):
+            market_tasks.kickoff_flow.apply(args=[f"memory_job_{index}", {
+                "customer_domain": f"brand{index}.example", "project_description": "Metro 3 launch"
+            }])
+
+    def test_memory_is_bounded_over_200_jobs(self):
+        """Crews are released after each job: no live agents or tasks pile up, RSS levels off"""
+        self.run_jobs(20)  # imports, clients and caches of the first jobs
+        self.assertEqual(get_job_by_id("memory_job_19").status, "COMPLETE")
+        objects, rss = live_crew_objects(), rss_bytes()
+
+        self.run_jobs(180, offset=20)
+        self.assertEqual(get_job_by_id("memory_job_199").status, "COMPLETE")
+        self.assertLessEqual(live_crew_objects(), objects)
+        # about 60 MiB when every crew was kept alive
+        self.assertLess(rss_bytes() - rss, 24 * 1024 * 1024)
+
+    def test_task_memory_recorded_with_job_events(self):
+        """tracemalloc mode adds the RSS and heap growth of each phase to the job's events"""
+        self.addCleanup(tracemalloc.stop)
+        workflow = MagicMock()
+        workflow.return_value.analyze_market_crew.side_effect = lambda: {"output": {"raw": "x" * 200_000}, "tasks": {}}
+        with patch.object(celery_app, "memory_profiler", TaskMemoryProfiler("tracemalloc", top=3)), \
+                patch.object(market_tasks, "Workflow", workflow), patch.object(market_tasks, "ModelRegistry"):
+            market_tasks.research_phase.apply(args=["memory_job", {"customer_domain": "stridewell.example"}])
+        event = get_job_by_id("memory_job").events[-1].data
+        self.assertRegex(event, r"^Memory: RSS [\d.]+ MiB \([+-][\d.]+ MiB\), Python heap [+-][\d.]+ MiB, grew most at ")
+
+    def test_profiling_is_off_by_default(self):
+        profiler = TaskMemoryProfiler("off")
+        profiler.started("task")
+        self.assertIsNone(profiler.finished("task"))